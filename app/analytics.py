@@ -0,0 +1,401 @@
+# votesys/app/analytics.py
+# Anketler arası istatistik indeksi: en çok oy alan anketler, son pencerede
+# (varsayılan 1 saat) yükselenler, toplam oy ve kullanıcı başına katılım.
+# İndeks API'nin yazma yollarından (anket oluşturma, oy, silme) artımlı
+# güncellenir; sorgular anket dosyalarını okumaz, maliyeti istenen kayıt
+# sayısıyla orantılıdır. Katalogla aynı düzen kullanılır:
+# * analytics.json: anlık görüntü, analytics.log: sonraki kayıtların ekleme günlüğü
+# * Diğer işçilerin eklediği kayıtlar her erişimde günlükten okunur
+# * Oy kayıtları istek yolunda yalnızca işlem içi tampona eklenir; tampon
+#   ANALYTICS_FLUSH_MS'de bir (ve bu işlemdeki her sorgudan önce) tek
+#   eklemeyle günlüğe yazılır, böylece oy yolu ortak kilidi beklemez
+# * Anlık görüntü bir kuşak numarası taşır; günlük kayıtları yazıldıkları
+#   kuşağı taşır ve eski kuşağın kayıtları yeni görüntüye uygulanmaz
+# Son pencere ANALYTICS_BUCKET_S'lik zaman dilimlerinde tutulur; dilim
+# pencereden tamamen çıkınca sayıları düşülür.
+# İndeks kaybolursa ya da bozulursa depolamadan yeniden kurulur:
+#   python -m app.analytics rebuild
+
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from . import xml_utils
+from .applog import LogTail, append_records
+from .codec import decode_poll
+from .locks import ProcessFileLock
+from .metrics import TimedLock
+from .models import Poll
+
+# ————— Ayarlar —————
+# ANALYTICS_WINDOW_S: "Yükselenler" penceresi (sn)
+# ANALYTICS_BUCKET_S: Penceredeki zaman dilimi uzunluğu (sn)
+WINDOW = int(os.getenv("ANALYTICS_WINDOW_S", "3600"))
+BUCKET = int(os.getenv("ANALYTICS_BUCKET_S", "60"))
+# ANALYTICS_FLUSH_MS: Oy kayıtlarının günlüğe toplu yazılma aralığı (ms);
+#                     diğer işçilerin istatistikleri en fazla bu kadar geriden gelir
+FLUSH_MS = float(os.getenv("ANALYTICS_FLUSH_MS", "1000"))
+
+
+class Leaderboard:
+    """
+    Anahtar -> puan sözlüğü ve (-puan, anahtar) sıralı listesi.
+    İlk k kayıt O(k) ile okunur; güncelleme ikili arama + liste kaydırmadır.
+    Puanı sıfıra inen anahtar sıralamadan çıkar.
+    """
+
+    def __init__(self, scores: Iterable[Tuple[Hashable, int]] = ()):
+        self._scores = {k: n for k, n in scores if n > 0}
+        self._order = sorted((-n, k) for k, n in self._scores.items())
+
+    def get(self, key: Hashable) -> int:
+        return self._scores.get(key, 0)
+
+    def add(self, key: Hashable, delta: int) -> None:
+        old = self._scores.get(key, 0)
+        new = old + delta
+        if old:
+            del self._order[bisect.bisect_left(self._order, (-old, key))]
+        if new > 0:
+            bisect.insort(self._order, (-new, key))
+            self._scores[key] = new
+        else:
+            self._scores.pop(key, None)
+
+    def discard(self, key: Hashable) -> int:
+        """Anahtarı sıralamadan çıkarır; eski puanını döner."""
+        score = self._scores.get(key, 0)
+        if score:
+            self.add(key, -score)
+        return score
+
+    def top(self, k: int) -> List[Tuple[Hashable, int]]:
+        """Puana göre azalan, eşitlikte anahtara göre artan ilk k kayıt."""
+        return [(key, -n) for n, key in self._order[:k]]
+
+    def items(self) -> List[Tuple[Hashable, int]]:
+        return list(self._scores.items())
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class AnalyticsIndex:
+    """
+    İstatistik indeksi. Kayıtlar:
+    * poll: anket oluşturuldu (sahip, soru, oluşturulma, başlangıç oyları)
+    * vote: ankete oy verenler ve zaman
+    * del:  anket silindi (oy verenleri katılım sayılarından düşülür)
+    Kayıtlar depolama işlemi bittikten sonra, başka kilit tutulmadan eklenir;
+    yalnızca yeniden kurulum bu kilit altında anket kilitlerini alır.
+    Oy kayıtları tamponda bekler (bkz. flush); anket ve silme kayıtları
+    bekleyen oylarla birlikte, sırası korunarak hemen yazılır.
+    """
+
+    def __init__(self, snapshot: str, log: str, lock: str,
+                 window: int = WINDOW, bucket: int = BUCKET, flush_ms: float = FLUSH_MS):
+        self.snapshot, self.log_path = snapshot, log
+        self.window, self.bucket = window, bucket
+        self.flush_s = flush_ms / 1000
+        self._lock = TimedLock(ProcessFileLock(lock), "analytics")
+        self._guard = threading.RLock()
+        self._pending: List[Dict] = []
+        self._pending_guard = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._gen = 0
+        self._snap_sig = None
+        self._log = LogTail(log)
+        self._log_records = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._polls: Dict[int, Dict] = {}
+        self._votes = Leaderboard()              # anket -> toplam oy
+        self._recent = Leaderboard()             # anket -> penceredeki oy
+        self._buckets: Dict[int, Dict[int, int]] = {}
+        self._voters = Leaderboard()             # kullanıcı -> verdiği oy
+        self._created: Dict[str, int] = {}
+        self._last_vote: Dict[str, float] = {}
+        self._total = 0
+        self._recent_total = 0
+
+    # ————— Dosyalar —————
+    def _refresh(self) -> None:
+        """Dosyalar değiştiyse bellekteki indeksi günceller; pencereden çıkan dilimleri düşer."""
+        try:
+            st = os.stat(self.snapshot)
+            sig = (st.st_ino, st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            sig = None
+        if sig != self._snap_sig:
+            self._reset()
+            self._gen = 0
+            if sig:
+                with open(self.snapshot, "r") as f:
+                    self._load_snapshot(json.load(f))
+            self._snap_sig = sig
+            self._log = LogTail(self.log_path)
+            self._log_records = 0
+        reset, records = self._log.read_new()
+        if reset:
+            # Günlük başka bir işlemce sıkıştırıldı; anlık görüntüden yeniden kur
+            self._snap_sig = ()
+            return self._refresh()
+        for rec in records:
+            # Eski kuşağın kayıtları görüntüye zaten katlandı (görüntü yerine
+            # konup günlük henüz silinmeden okunmuş olabilir)
+            if rec.get("g", 0) >= self._gen:
+                self._apply(rec)
+        self._log_records += len(records)
+        self._expire(time.time())
+
+    def _load_snapshot(self, data: Dict) -> None:
+        self._gen = data.get("gen", 0)
+        self._polls = {pid: meta for pid, meta, _ in data["polls"]}
+        self._votes = Leaderboard((pid, n) for pid, _, n in data["polls"])
+        self._total = sum(n for _, _, n in data["polls"])
+        self._buckets = {start: {pid: n for pid, n in counts} for start, counts in data["buckets"]}
+        recent: Dict[int, int] = {}
+        for counts in self._buckets.values():
+            for pid, n in counts.items():
+                recent[pid] = recent.get(pid, 0) + n
+        self._recent = Leaderboard(recent.items())
+        self._recent_total = sum(recent.values())
+        self._voters = Leaderboard(data["voters"])
+        self._created = data["created"]
+        self._last_vote = data["last_vote"]
+
+    def _append(self, *recs: Dict) -> None:
+        """Kayıtları günlüğe ekler; günlük indeksten büyükse sıkıştırır. Kilit altında çağrılır."""
+        append_records(self.log_path, (dict(r, g=self._gen) for r in recs))
+        self._refresh()
+        if self._log_records >= max(1000, len(self._polls) + len(self._voters)):
+            self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
+        """
+        Anlık görüntüyü bir sonraki kuşak olarak atomik yazar ve günlüğü siler.
+        Görüntü yerine konduktan sonra silinene kadar günlüğü okuyan işlemler
+        eski kuşağın kayıtlarını atlar. Kilit altında çağrılır.
+        """
+        os.makedirs(os.path.dirname(self.snapshot), exist_ok=True)
+        tmp = self.snapshot + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                "gen":       self._gen + 1,
+                "polls":     [[pid, meta, self._votes.get(pid)] for pid, meta in self._polls.items()],
+                "buckets":   [[start, list(counts.items())] for start, counts in self._buckets.items()],
+                "voters":    self._voters.items(),
+                "created":   self._created,
+                "last_vote": self._last_vote,
+            }, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot)
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        self._snap_sig = ()
+        self._refresh()
+
+    # ————— Kayıtların uygulanması —————
+    def _apply(self, rec: Dict) -> None:
+        op, poll_id = rec["op"], rec["id"]
+        if op == "vote":
+            # Tamponda beklerken silinen anketin oyları sayılmaz
+            if poll_id not in self._polls:
+                return
+            users, at = rec["u"], rec["t"]
+            self._votes.add(poll_id, len(users))
+            self._total += len(users)
+            start = int(at // self.bucket * self.bucket)
+            if start + self.bucket > time.time() - self.window:
+                counts = self._buckets.setdefault(start, {})
+                counts[poll_id] = counts.get(poll_id, 0) + len(users)
+                self._recent.add(poll_id, len(users))
+                self._recent_total += len(users)
+            for user in users:
+                self._voters.add(user, 1)
+                self._last_vote[user] = max(at, self._last_vote.get(user, 0))
+        elif op == "poll":
+            self._drop(poll_id, ())
+            owner = rec["owner"]
+            self._polls[poll_id] = {"owner": owner, "question": rec["question"],
+                                    "created": rec["created"]}
+            if owner is not None:
+                self._created[owner] = self._created.get(owner, 0) + 1
+            self._votes.add(poll_id, rec["votes"])
+            self._total += rec["votes"]
+        elif op == "del":
+            self._drop(poll_id, rec["u"])
+
+    def _drop(self, poll_id: int, users: Iterable[str]) -> None:
+        meta = self._polls.pop(poll_id, None)
+        if meta is None:
+            return
+        owner = meta["owner"]
+        if owner is not None:
+            self._created[owner] -= 1
+            if not self._created[owner]:
+                del self._created[owner]
+        self._total -= self._votes.discard(poll_id)
+        self._recent_total -= self._recent.discard(poll_id)
+        for counts in self._buckets.values():
+            counts.pop(poll_id, None)
+        for user in users:
+            self._voters.add(user, -1)
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window
+        for start in [s for s in self._buckets if s + self.bucket <= cutoff]:
+            for poll_id, n in self._buckets.pop(start).items():
+                self._recent.add(poll_id, -n)
+                self._recent_total -= n
+
+    # ————— Yazma yolları —————
+    def _record(self, *recs: Dict) -> None:
+        """Bekleyen oylarla birlikte kayıtları tek eklemeyle yazar."""
+        with self._guard, self._lock:
+            with self._pending_guard:
+                pending, self._pending = self._pending, []
+            self._refresh()
+            if pending or recs:
+                self._append(*pending, *recs)
+
+    def flush(self) -> int:
+        """Tampondaki oy kayıtlarını günlüğe yazar; yazılan kayıt sayısını döner."""
+        with self._pending_guard:
+            count = len(self._pending)
+        if count:
+            self._record()
+        return count
+
+    def _current(self) -> None:
+        """Sorgulardan önce: bu işlemin bekleyen oyları da görünsün."""
+        if self._pending:
+            self.flush()
+        self._refresh()
+
+    @staticmethod
+    def _poll_record(poll: Poll, created: float) -> Dict:
+        return {"op": "poll", "id": poll.id, "owner": poll.owner, "question": poll.question,
+                "created": created, "votes": sum(o.votes for o in poll.options)}
+
+    def poll_created(self, poll: Poll) -> None:
+        self._record(self._poll_record(poll, time.time()))
+
+    def votes_cast(self, poll_id: int, usernames: List[str]) -> None:
+        """Oyu tampona ekler; dosya kilidi alınmaz, yazma zamanlayıcıya bırakılır."""
+        if not usernames:
+            return
+        with self._pending_guard:
+            self._pending.append({"op": "vote", "id": poll_id, "u": usernames, "t": time.time()})
+            # Zamanlayıcı thread'i fork sonrası çocukta canlı görünmez
+            if self._timer is None or not self._timer.is_alive():
+                self._timer = threading.Timer(self.flush_s, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def poll_deleted(self, poll_id: int, usernames: List[str]) -> None:
+        self._record({"op": "del", "id": poll_id, "u": usernames})
+
+    def rebuild(self, store) -> int:
+        """
+        İndeksi depolamadaki anketlerden ve oy verenlerden (oy zamanlarıyla)
+        yeniden kurar; anket sayısını döner. Kurulum süresince diğer işçilerin
+        kayıtları kilidi bekler. Taramadan önce kaydedilip kaydı kurulumdan
+        sonra eklenen bir oy iki kez sayılabilir; yoğun trafikte çalıştırılmamalı.
+        """
+        with self._guard, self._lock:
+            # Bekleyen oylar depolamaya zaten yazıldı; taramada sayılır.
+            # Güncel kuşak öğrenilir ki yeni görüntü ondan sonra gelsin
+            with self._pending_guard:
+                self._pending = []
+            self._refresh()
+            # Yarıda kalırsa bir sonraki erişimde dosyalardan yeniden yüklenir
+            self._snap_sig = ()
+            self._reset()
+            for poll_id, created, xml_bytes, voter_list in store.export_polls():
+                poll = decode_poll(xml_bytes, poll_id)
+                # Başlangıç oyları: kaydı olmayan (oluştururken verilmiş) oylar
+                rec = self._poll_record(poll, created or 0.0)
+                rec["votes"] = max(0, rec["votes"] - len(voter_list))
+                self._apply(rec)
+                for username, at in voter_list:
+                    self._apply({"op": "vote", "id": poll_id, "u": [username], "t": at})
+            self._expire(time.time())
+            self._write_snapshot()
+            return len(self._polls)
+
+    def load(self, store) -> int:
+        """İndeksi yükler; hiç kurulmamışsa depolamadan kurar. Anket sayısını döner."""
+        with self._guard:
+            if not os.path.exists(self.snapshot) and not os.path.exists(self.log_path):
+                return self.rebuild(store)
+            self._refresh()
+            return len(self._polls)
+
+    # ————— Sorgular —————
+    def _ranked(self, board: Leaderboard, k: int) -> List[Dict]:
+        items = []
+        for poll_id, votes in board.top(k):
+            meta = self._polls.get(poll_id, {})
+            items.append({"id": poll_id, "owner": meta.get("owner"),
+                          "question": meta.get("question", ""), "votes": votes})
+        return items
+
+    def top_polls(self, k: int) -> List[Dict]:
+        """En çok oy alan k anket (oysuz anketler listelenmez)."""
+        with self._guard:
+            self._current()
+            return self._ranked(self._votes, k)
+
+    def trending(self, k: int) -> List[Dict]:
+        """Son pencerede en çok oy alan k anket; votes penceredeki oy sayısıdır."""
+        with self._guard:
+            self._current()
+            return self._ranked(self._recent, k)
+
+    def top_voters(self, k: int) -> List[Dict]:
+        """En çok ankete katılan k kullanıcı."""
+        with self._guard:
+            self._current()
+            return [self._participation(u) for u, _ in self._voters.top(k)]
+
+    def _participation(self, username: str) -> Dict:
+        return {"username": username, "votes": self._voters.get(username),
+                "polls_created": self._created.get(username, 0),
+                "last_vote": self._last_vote.get(username)}
+
+    def participation(self, username: str) -> Dict:
+        """Kullanıcının oy verdiği anket sayısı, oluşturduğu anketler, son oy zamanı."""
+        with self._guard:
+            self._current()
+            return self._participation(username)
+
+    def summary(self) -> Dict:
+        with self._guard:
+            self._current()
+            return {"polls": len(self._polls), "votes": self._total,
+                    "voters": len(self._voters), "window": self.window,
+                    "recent_votes": self._recent_total}
+
+
+ANALYTICS = AnalyticsIndex(os.path.join(xml_utils.DATA_DIR, "analytics.json"),
+                           os.path.join(xml_utils.DATA_DIR, "analytics.log"),
+                           os.path.join(xml_utils.LOCK_DIR, "analytics.lock"))
+
+
+if __name__ == "__main__":
+    # python -m app.analytics rebuild
+    if sys.argv[1:] == ["rebuild"]:
+        from .storage import STORE
+        started = time.perf_counter()
+        count = ANALYTICS.rebuild(STORE)
+        print(f"{count} anket için istatistik kuruldu ({time.perf_counter() - started:.2f} sn)")
+    else:
+        print("Kullanım: python -m app.analytics rebuild")
+        sys.exit(2)
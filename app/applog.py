@@ -0,0 +1,68 @@
+# votesys/app/applog.py
+# JSON satırlarından oluşan ekleme (append-only) günlükleri için ortak yardımcılar.
+# Oy günlüğü, oy veren kayıtları gibi dosyalar aynı düzeni kullanır:
+# her kayıt tek satır JSON, yazma yalnızca sona ekleme, okuma kaldığı yerden devam.
+
+import json
+import os
+from typing import Dict, Iterable, List, Tuple
+
+
+def append_records(path: str, records: Iterable[Dict], fsync: bool = False) -> None:
+    """Kayıtları tek bir yazma ile dosyanın sonuna ekler."""
+    data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode()
+    if not data:
+        return
+    with open(path, "ab") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class LogTail:
+    """
+    Bir günlük dosyasını artımlı okur.
+    Dosya yeniden yazıldıysa ya da silindiyse baştan okur ve bunu
+    çağırana bildirir ki kendi indeksini sıfırlasın. Silinen dosyanın inode
+    numarası yeniden kullanılabileceği için dosyanın ilk baytları da karşılaştırılır.
+    """
+
+    PREFIX = 64
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self._stat = None
+        self._prefix = b""
+
+    def read_new(self) -> Tuple[bool, List[Dict]]:
+        """
+        (sıfırlandı_mı, yeni_kayıtlar) döner.
+        Yarım yazılmış son satır bir sonraki çağrıya bırakılır.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            reset = self.offset > 0
+            self.offset, self._stat, self._prefix = 0, None, b""
+            return reset, []
+
+        key = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if key == self._stat:
+            return False, []
+
+        with open(self.path, "rb") as f:
+            reset = False
+            if self.offset and (st.st_size < self.offset
+                                or os.pread(f.fileno(), len(self._prefix), 0) != self._prefix):
+                reset, self.offset, self._prefix = True, 0, b""
+            f.seek(self.offset)
+            chunk = f.read(st.st_size - self.offset)
+        self._stat = key
+
+        end = chunk.rfind(b"\n") + 1
+        if not self.offset:
+            self._prefix = chunk[:min(end, self.PREFIX)]
+        self.offset += end
+        return reset, [json.loads(line) for line in chunk[:end].splitlines() if line]
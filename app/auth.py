@@ -1,22 +1,33 @@
 """
 Kullanıcı yönetimi + JWT yardımcıları
 ------------------------------------
-* JSON dosyasında kullanıcılar (username, email, pw_hash, role)
+* Kullanıcılar (username, email, pw_hash, role) depolama arka ucunda:
+  users.json + users.log (users.UserRepo) ya da SQLite users tablosu
 * .env’deki ADMIN_USER / ADMIN_PASSWORD her start’ta senkron
 * bcrypt ile güvenli parola
 * /login için OAuth2PasswordBearer
+* Doğrulanmış token’lar exp anına kadar önbellekte; silinen kullanıcıların
+  token’ları revoked.log iptal listesiyle reddedilir
 """
 
-import os, json, bcrypt
+import os, json, bcrypt, threading, asyncio, time, hmac, hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from jose import jwt, JWTError
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 
+from .applog import LogTail, append_records
+from .locks import ProcessFileLock
+from .metrics import STAGE, Counter, Gauge
+from .storage import STORE
+
 # ————————— Ayarlar —————————
 # .env’den anahtarları al, JWT ve admin bilgilerini tanımla
 load_dotenv()
@@ -25,60 +36,89 @@ ALGORITHM        = "HS256"
 TOKEN_EXPIRE_MIN = 60
 ADMIN_USER       = os.getenv("ADMIN_USER", "admin")
 ADMIN_PASS       = os.getenv("ADMIN_PASSWORD", "secret")
-# Kullanıcı verisi klasörü ve dosyası
-DATA_DIR   = Path(__file__).parent / "data"
-USERS_FILE = DATA_DIR / "users.json"
+# Yardımcı dosyaların klasörü: admin.sync, revoked.log (VOTESYS_DATA_DIR ile değiştirilebilir)
+DATA_DIR   = Path(os.getenv("VOTESYS_DATA_DIR", Path(__file__).parent / "data"))
+ADMIN_SYNC   = DATA_DIR / "admin.sync"
+REVOKED_LOG  = DATA_DIR / "revoked.log"
+REVOKED_LOCK = DATA_DIR / "locks" / "revoked.lock"
 DATA_DIR.mkdir(exist_ok=True)
+# bcrypt işleri için thread havuzu: AUTH_WORKERS iş parçacığı,
+# en fazla AUTH_QUEUE bekleyen istek; fazlası 503 alır
+AUTH_WORKERS = int(os.getenv("AUTH_WORKERS", os.cpu_count() or 2))
+AUTH_QUEUE   = int(os.getenv("AUTH_QUEUE", "64"))
+# Doğrulanmış token önbelleği boyutu (0 = kapalı) ve diğer işçilerin
+# kullanıcı silme (token iptali) kayıtlarına bakma aralığı (ms)
+AUTH_TOKEN_CACHE       = int(os.getenv("AUTH_TOKEN_CACHE", "4096"))
+AUTH_REVOKE_REFRESH_MS = int(os.getenv("AUTH_REVOKE_REFRESH_MS", "1000"))
 # OAuth2 token mekanizması için URL
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
 
-# ————— Yardımcı IO İşlemleri —————
-def _load_users() -> List[Dict]:
-    """users.json varsa oku, yoksa boş liste döndür."""
-    return json.loads(USERS_FILE.read_text()) if USERS_FILE.exists() else []
-
-def _save_users(users: List[Dict]) -> None:
-    """Kullanıcı listesi JSON olarak kaydet."""
-    USERS_FILE.write_text(json.dumps(users, indent=2))
+# Kullanıcı deposu seçili depolama arka ucundan gelir (users.json/.log ya da SQLite)
+users_repo = STORE.users
 
 
 # ————— Parola Hash & Doğrulama —————
 def _hash_pw(password: str) -> str:
     """Düz metin şifreyi bcrypt ile hash’le."""
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    with STAGE.time("bcrypt_hash"):
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
 
 def _verify_pw(password: str, pw_hash: str) -> bool:
     """Girilen şifre ile hash’i karşılaştır."""
-    return bcrypt.checkpw(password.encode(), pw_hash.encode())
+    with STAGE.time("bcrypt_verify"):
+        return bcrypt.checkpw(password.encode(), pw_hash.encode())
 
 
 # ————— Admin Hesabı Senkronizasyonu —————
+def _admin_fingerprint(admin: Dict) -> str:
+    """
+    .env’deki admin bilgisi + kayıttaki rol ve hash için JWT_SECRET anahtarlı özet.
+    Anahtarsız olsaydı admin.sync’i okuyan biri parolayı bcrypt’e takılmadan deneyebilirdi.
+    """
+    msg = "\0".join((ADMIN_USER, ADMIN_PASS, admin.get("role", ""), admin["password_hash"]))
+    return hmac.new(SECRET_KEY.encode(), msg.encode(), hashlib.sha256).hexdigest()
+
+def _admin_in_sync(admin: Optional[Dict]) -> bool:
+    try:
+        stored = ADMIN_SYNC.read_text().strip()
+    except FileNotFoundError:
+        return False
+    return admin is not None and hmac.compare_digest(stored, _admin_fingerprint(admin))
+
 def _ensure_admin() -> None:
     """
-    .env’deki admin bilgisiyle users.json’u kontrol et.
+    .env’deki admin bilgisiyle kullanıcı deposunu kontrol et.
     Yoksa ekle, varsa rol ve şifre hash’ini güncelle.
+    Son eşitlemenin parmak izi admin.sync’te tutulur; .env ve kayıt
+    değişmediyse bcrypt çalıştırılmaz (her işlem açılışında ~0.2-0.4 sn).
     """
-    users = _load_users()
-    admin = next((u for u in users if u["username"] == ADMIN_USER), None)
-
-    if admin:
-        updated = False
-        if admin.get("role") != "admin":
-            admin["role"] = "admin"; updated = True
-        if not _verify_pw(ADMIN_PASS, admin["password_hash"]):
-            admin["password_hash"] = _hash_pw(ADMIN_PASS); updated = True
-        if updated:
-            _save_users(users)
-    else:
-        users.append({
-            "username":       ADMIN_USER,
-            "email":          f"{ADMIN_USER}@example.com",
-            "password_hash":  _hash_pw(ADMIN_PASS),
-            "role":           "admin",
-            "email_confirmed": True
-        })
-        _save_users(users)
+    with users_repo.locked():
+        admin = users_repo.get(ADMIN_USER)
+        if _admin_in_sync(admin):
+            return
+
+        if admin:
+            updated = False
+            if admin.get("role") != "admin":
+                admin["role"] = "admin"; updated = True
+            if not _verify_pw(ADMIN_PASS, admin["password_hash"]):
+                admin["password_hash"] = _hash_pw(ADMIN_PASS); updated = True
+            if updated:
+                users_repo.put(admin)
+        else:
+            admin = {
+                "username":       ADMIN_USER,
+                "email":          f"{ADMIN_USER}@example.com",
+                "password_hash":  _hash_pw(ADMIN_PASS),
+                "role":           "admin",
+                "email_confirmed": True
+            }
+            users_repo.put(admin)
+
+        tmp = ADMIN_SYNC.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(_admin_fingerprint(admin))
+        os.replace(tmp, ADMIN_SYNC)
 
 # Modül yüklendiğinde admin kontrolünü yap
 _ensure_admin()
@@ -87,24 +127,27 @@ _ensure_admin()
 # ————— Kullanıcı İşlemleri —————
 def register(username: str, email: str, password: str, role: str = "user") -> None:
     """Yeni kullanıcı oluşturur; aynı isimde varsa hata fırlatır."""
-    users = _load_users()
-    if any(u["username"] == username for u in users):
+    if users_repo.get(username):
         raise HTTPException(400, "Kullanıcı adı kullanımda")
-    users.append({
+    # bcrypt yavaş olduğu için hash kilit dışında hesaplanır, sonra tekrar kontrol edilir
+    user = {
         "username":      username,
         "email":         email,
         "password_hash": _hash_pw(password),
         "role":          role.lower(),
         "email_confirmed": True
-    })
-    _save_users(users)
+    }
+    with users_repo.locked():
+        if users_repo.get(username):
+            raise HTTPException(400, "Kullanıcı adı kullanımda")
+        users_repo.put(user)
 
 def authenticate(username: str, password: str) -> Dict:
     """
     Kullanıcı adı + şifre kontrolü yapar.
     Başarısızsa veya e-posta onaylı değilse HTTPException fırlatır.
     """
-    user = next((u for u in _load_users() if u["username"] == username), None)
+    user = users_repo.get(username)
     if not user or not _verify_pw(password, user["password_hash"]):
         raise HTTPException(400, "Hatalı giriş")
     if not user["email_confirmed"]:
@@ -112,34 +155,190 @@ def authenticate(username: str, password: str) -> Dict:
     return user
 
 
+# ————— Event Loop Dışında Parola İşleri —————
+# bcrypt bilinçli olarak yavaştır (onlarca-yüzlerce ms). async uç noktalardan
+# doğrudan çağrılırsa tüm event loop durur; bu yüzden ayrı havuzda çalıştırılır.
+_pw_pool = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="bcrypt")
+_pw_pending = 0
+Gauge("votesys_auth_pool_pending", "Parola havuzunda çalışan ya da bekleyen iş sayısı",
+      callback=lambda: {(): _pw_pending})
+_pw_rejected = Counter("votesys_auth_rejected_total", "Havuz dolu olduğu için 503 alan istekler").labels()
+
+async def _offload(fn, *args):
+    """
+    fn’i parola havuzunda çalıştırır.
+    Havuz ve kuyruk doluysa beklemeden 503 döner (loop’u tıkamak yerine).
+    """
+    global _pw_pending
+    if _pw_pending >= AUTH_WORKERS + AUTH_QUEUE:
+        _pw_rejected.inc()
+        raise HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            "Sunucu yoğun, lütfen tekrar deneyin",
+            headers={"Retry-After": "1"},
+        )
+    _pw_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_pw_pool, partial(fn, *args))
+    finally:
+        _pw_pending -= 1
+
+async def authenticate_async(username: str, password: str) -> Dict:
+    """authenticate’in event loop’u bloklamayan sürümü."""
+    return await _offload(authenticate, username, password)
+
+async def register_async(username: str, email: str, password: str, role: str = "user") -> None:
+    """register’ın event loop’u bloklamayan sürümü."""
+    return await _offload(register, username, email, password, role)
+
+
+# ————— Doğrulanmış Token Önbelleği & İptal Listesi —————
+class TokenCache:
+    """
+    Doğrulanmış token -> claim sözlüğü (LRU, en fazla size kayıt).
+    Kayıt token’ın exp anında geçersiz olur; aynı token’la gelen sonraki
+    istekler imza doğrulaması ve JSON çözümlemesi yapmaz.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._items: "OrderedDict[str, Dict]" = OrderedDict()
+        self._guard = threading.Lock()
+
+    def get(self, token: str, now: float) -> Optional[Dict]:
+        with self._guard:
+            claims = self._items.get(token)
+            if claims is None:
+                return None
+            if claims["exp"] <= now:
+                del self._items[token]
+                return None
+            self._items.move_to_end(token)
+            return claims
+
+    def put(self, token: str, claims: Dict) -> None:
+        if self.size <= 0:
+            return
+        with self._guard:
+            self._items[token] = claims
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._guard:
+            self._items.clear()
+
+
+class RevocationList:
+    """
+    Kullanıcı adı -> iptal zamanı. Bu zamandan önce (ya da o anda) verilmiş
+    token’lar reddedilir; silinen kullanıcı token süresi dolmadan dışarıda kalır.
+    * Kayıtlar revoked.log’a eklenir; diğer işlemler dosyayı en fazla
+      refresh saniyede bir okur, bu işlemdeki iptaller hemen geçerlidir
+    * Token ömrünü geçmiş kayıtların anlamı kalmaz; günlük büyüyünce
+      yalnızca geçerli kayıtlarla atomik olarak yeniden yazılır
+    """
+
+    def __init__(self, path: Path, lock: Path, refresh: float):
+        self.path = path
+        self.refresh = refresh
+        self._lock = ProcessFileLock(lock)
+        self._guard = threading.Lock()
+        self._revoked: Dict[str, float] = {}
+        self._log = LogTail(str(path))
+        self._records = 0
+        self._next_check = 0.0
+
+    def _refresh(self) -> None:
+        reset, records = self._log.read_new()
+        if reset:
+            self._revoked, self._records = {}, 0
+        for rec in records:
+            self._revoked[rec["sub"]] = max(rec["at"], self._revoked.get(rec["sub"], 0))
+        self._records += len(records)
+
+    def revoked_at(self, username: str, now: float) -> Optional[float]:
+        """Kullanıcının iptal zamanı ya da None (çoğu çağrıda tek sözlük araması)."""
+        if now >= self._next_check:
+            with self._guard:
+                self._next_check = now + self.refresh
+                self._refresh()
+        return self._revoked.get(username)
+
+    def revoke(self, username: str) -> None:
+        """Kullanıcının şu ana kadar verilmiş tüm token’larını geçersiz kılar."""
+        at = time.time()
+        with self._lock, self._guard:
+            DATA_DIR.mkdir(exist_ok=True)
+            append_records(str(self.path), [{"sub": username, "at": at}])
+            self._refresh()
+            self._revoked[username] = max(at, self._revoked.get(username, 0))
+            if self._records >= 1000:
+                self._compact(at - TOKEN_EXPIRE_MIN * 60)
+
+    def _compact(self, oldest: float) -> None:
+        live = [{"sub": u, "at": at} for u, at in self._revoked.items() if at >= oldest]
+        tmp = self.path.with_suffix(".log.tmp")
+        tmp.write_text("".join(json.dumps(r) + "\n" for r in live))
+        os.replace(tmp, self.path)
+        self._refresh()
+
+
+token_cache = TokenCache(AUTH_TOKEN_CACHE)
+revocations = RevocationList(REVOKED_LOG, REVOKED_LOCK, AUTH_REVOKE_REFRESH_MS / 1000)
+_token_lookups = Counter("votesys_auth_token_cache_total",
+                         "Token önbelleği isabet/ıskalama sayıları", ["result"])
+_token_hit, _token_miss = _token_lookups.labels("hit"), _token_lookups.labels("miss")
+
+
 # ————— JWT Oluşturma & Kullanıcı Getirme —————
 def create_access_token(payload: dict) -> str:
-    """Payload’a süre sonu ekleyip JWT üretir."""
+    """Payload’a veriliş zamanı ve süre sonu ekleyip JWT üretir."""
     payload = {**payload, "role": str(payload.get("role", "user")).lower()}
+    # iat ondalıklıdır: iptal ile aynı saniyede verilen yeni token reddedilmez
+    payload["iat"] = time.time()
     payload["exp"] = datetime.utcnow() + timedelta(minutes=TOKEN_EXPIRE_MIN)
-    return jwt.encode(payload, SECRET_KEY, ALGORITHM)
+    with STAGE.time("jwt_encode"):
+        return jwt.encode(payload, SECRET_KEY, ALGORITHM)
+
+def _unauthorized() -> HTTPException:
+    return HTTPException(
+        status.HTTP_401_UNAUTHORIZED,
+        "Geçersiz veya süresi dolmuş token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
-def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict:
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict:
     """
     Gelen token’ı doğrular, decode eder.
-    Hatalıysa 401 döner.
+    Daha önce doğrulanmış token’lar önbellekten gelir; iptal edilmiş
+    kullanıcının token’ları reddedilir. Hatalıysa 401 döner.
+    async’tir: önbellek isabetinde iş parçacığı havuzuna gidilmez.
     """
-    try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
-        raise HTTPException(
-            status.HTTP_401_UNAUTHORIZED,
-            "Geçersiz veya süresi dolmuş token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    now = time.time()
+    claims = token_cache.get(token, now)
+    if claims is not None:
+        _token_hit.inc()
+    else:
+        _token_miss.inc()
+        try:
+            with STAGE.time("jwt_decode"):
+                claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise _unauthorized()
+        token_cache.put(token, claims)
+    revoked = revocations.revoked_at(claims.get("sub"), now)
+    if revoked is not None and claims.get("iat", 0) <= revoked:
+        raise _unauthorized()
+    return dict(claims)
 
 
 # ————— FastAPI Bağımlılıkları —————
-def logged_user(user = Depends(get_current_user)):
+async def logged_user(user = Depends(get_current_user)):
     """Giriş yapmış kullanıcıyı sağlar (sadece kontrol)."""
     return user
 
-def admin_only(user = Depends(get_current_user)):
+async def admin_only(user = Depends(get_current_user)):
     """Yalnızca admin rolündeyse geçer; değilse 403 döner."""
     if user.get("role") != "admin":
         raise HTTPException(403, "Admin yetkisi gerekli")
@@ -147,16 +346,36 @@ def admin_only(user = Depends(get_current_user)):
 
 
 # ————— Yöneticiye Özel Yardımcılar —————
+def _public(u: Dict) -> Dict:
+    return {"username": u["username"], "email": u["email"], "role": u["role"]}
+
 def list_users() -> List[Dict]:
     """Tüm kullanıcıları şifre hariç listele."""
-    return [
-        {"username": u["username"], "email": u["email"], "role": u["role"]}
-        for u in _load_users()
-    ]
+    return [_public(u) for u in users_repo.all()]
+
+def users_page(cursor: Optional[str] = None, limit: int = 100,
+               prefix: str = "") -> Tuple[List[Dict], Optional[str]]:
+    """
+    Kullanıcı adına göre sıralı bir sayfa ve sonraki sayfanın imleci.
+    İmleç sayfadaki son kullanıcı adıdır; son sayfada None döner.
+    """
+    users = users_repo.page(cursor, limit + 1, prefix)
+    more = len(users) > limit
+    users = users[:limit]
+    return [_public(u) for u in users], (users[-1]["username"] if more else None)
+
+def iter_users(prefix: str = "", cursor: Optional[str] = None,
+               batch: int = 500) -> Iterator[Dict]:
+    """Kullanıcıları sayfa sayfa okuyarak tek tek verir (tümü belleğe alınmaz)."""
+    while True:
+        users = users_repo.page(cursor, batch, prefix)
+        yield from map(_public, users)
+        if len(users) < batch:
+            return
+        cursor = users[-1]["username"]
 
 def delete_user(username: str) -> None:
-    """Verilen kullanıcıyı sil; yoksa 404 döner."""
-    users = _load_users()
-    if not any(u["username"] == username for u in users):
+    """Verilen kullanıcıyı sil ve token’larını iptal et; yoksa 404 döner."""
+    if not users_repo.remove(username):
         raise HTTPException(404, "Kullanıcı bulunamadı")
-    _save_users([u for u in users if u["username"] != username])
+    revocations.revoke(username)
@@ -0,0 +1,227 @@
+# votesys/app/bulk.py
+# Anketlerin ve oy verenlerinin toplu dışa/içe aktarımı (yedek, taşıma).
+# Dışa aktarma anket anket akan bir üreteçtir; içe aktarma girdiyi satır satır
+# (NDJSON) ya da öğe öğe (XML, iterparse) okur, doğrular ve partiler halinde
+# yazar. Bellek kullanımı anket sayısından bağımsızdır.
+#
+# NDJSON: her satır bir anket
+#   {"id", "owner", "question", "options": [...], "created", "voters": [[kullanıcı, zaman], ...]}
+# XML:
+#   <archive version="1">
+#     <entry created="..."><poll id=".." owner="..">...</poll>
+#       <voters><voter t="...">kullanıcı</voter>...</voters></entry>
+#   </archive>
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from lxml import etree
+
+from . import xml_utils
+from .codec import _escape, decode_element
+from .models import Poll
+from .storage import BACKENDS, STORE, Storage, open_storage
+
+FORMATS = ("ndjson", "xml")
+# Tek dizin kilidi altında yazılan anket sayısı
+BATCH = int(os.getenv("IMPORT_BATCH", "500"))
+# İçe aktarma raporunda tutulan en fazla hata mesajı
+MAX_ERRORS = 20
+
+
+# ————— Dışa Aktarma —————
+def export_ndjson(store: Optional[Storage] = None) -> Iterator[bytes]:
+    """Tüm anketleri NDJSON satırları olarak üretir."""
+    for poll_id, created, xml_bytes, voter_list in (store or STORE).export_polls():
+        rec = xml_utils._parse_poll(poll_id, xml_bytes).model_dump()
+        rec["created"], rec["voters"] = created, voter_list
+        yield (json.dumps(rec, ensure_ascii=False) + "\n").encode()
+
+
+def export_xml(store: Optional[Storage] = None) -> Iterator[bytes]:
+    """
+    Tüm anketleri XML arşivi olarak üretir. Anket XML'i XSD ile doğrulanmış
+    haliyle gömülür (dosya arka ucunda diskteki baytlar olduğu gibi).
+    """
+    yield b"<?xml version='1.0' encoding='UTF-8'?>\n<archive version=\"1\">\n"
+    for _, created, xml_bytes, voter_list in (store or STORE).export_polls():
+        parts = [f'<entry created="{created!r}">'.encode() if created is not None else b"<entry>",
+                 xml_bytes[xml_bytes.index(b"<poll"):], b"<voters>"]
+        parts.extend(f'<voter t="{at!r}">{_escape(user)}</voter>'.encode()
+                     for user, at in voter_list)
+        parts.append(b"</voters></entry>\n")
+        yield b"".join(parts)
+    yield b"</archive>\n"
+
+
+def export(fmt: str = "ndjson", store: Optional[Storage] = None) -> Iterator[bytes]:
+    if fmt not in FORMATS:
+        raise ValueError(f"Bilinmeyen biçim: {fmt}")
+    return export_ndjson(store) if fmt == "ndjson" else export_xml(store)
+
+
+# ————— İçe Aktarma —————
+Record = Union[Dict, Exception]
+
+
+def _records_ndjson(f: BinaryIO) -> Iterator[Record]:
+    for n, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"satır {n}: {e}")
+
+
+def _records_xml(f: BinaryIO) -> Iterator[Record]:
+    # Her <entry> işlendikten sonra silinir; ağaç büyümez
+    context = etree.iterparse(f, events=("end",), tag="entry", resolve_entities=False,
+                              no_network=True, huge_tree=True)
+    try:
+        for n, (_, el) in enumerate(context, 1):
+            try:
+                poll_el = el.find("poll")
+                if poll_el is None:
+                    raise ValueError("<poll> öğesi yok")
+                rec = decode_element(poll_el).model_dump()
+                rec["created"] = float(el.get("created")) if el.get("created") else None
+                rec["voters"] = [(v.text or "", float(v.get("t", 0)))
+                                 for v in el.iterfind("voters/voter")]
+                yield rec
+            except (ValueError, TypeError) as e:
+                yield ValueError(f"kayıt {n}: {e}")
+            finally:
+                el.clear()
+                while el.getprevious() is not None:
+                    del el.getparent()[0]
+    except etree.XMLSyntaxError as e:
+        raise ValueError(f"Arşiv XML'i bozuk: {e}") from e
+
+
+def _sniff(f: BinaryIO) -> str:
+    """Girdinin biçimini ilk anlamlı bayttan tahmin eder."""
+    head = f.peek(64) if hasattr(f, "peek") else b""
+    if not head:
+        pos = f.tell()
+        head = f.read(64)
+        f.seek(pos)
+    return "xml" if head.lstrip()[:1] == b"<" else "ndjson"
+
+
+def _prepare(rec: Dict) -> Tuple[Poll, bytes, List[Tuple[str, float]], Optional[float]]:
+    """Kaydı doğrular: model + XSD (XML_VALIDATE=never değilse) + oy verenler."""
+    data = {k: rec[k] for k in ("owner", "question", "options") if k in rec}
+    data["id"] = rec.get("id") or 0
+    poll = Poll.model_validate(data)
+    xml_bytes = xml_utils.serialize_poll(poll)
+    voter_list = list({str(u): float(t) for u, t in rec.get("voters") or []}.items())
+    created = rec.get("created")
+    return poll, xml_bytes, voter_list, float(created) if created is not None else None
+
+
+def import_stream(f: BinaryIO, fmt: Optional[str] = None, replace: bool = False,
+                  batch_size: int = BATCH, store: Optional[Storage] = None) -> Dict:
+    """
+    NDJSON ya da XML arşivini içe aktarır. Geçersiz kayıtlar atlanır ve raporlanır;
+    var olan anketler replace verilmezse atlanır, verilirse baştan yazılır.
+    Partiler store.import_batch ile yazılır (dosyada tek dizin kilidi,
+    SQLite'ta tek yazma işlemi).
+    """
+    store = store or STORE
+    fmt = fmt or _sniff(f)
+    if fmt not in FORMATS:
+        raise ValueError(f"Bilinmeyen biçim: {fmt}")
+    records = _records_ndjson(f) if fmt == "ndjson" else _records_xml(f)
+    report = {"imported": 0, "skipped": 0, "failed": 0, "errors": []}
+    batch: List[Tuple] = []
+
+    def flush():
+        imported, skipped = store.import_batch(batch, replace)
+        report["imported"] += imported
+        report["skipped"] += skipped
+        batch.clear()
+
+    for n, rec in enumerate(records, 1):
+        try:
+            if isinstance(rec, Exception):
+                raise rec
+            batch.append(_prepare(rec))
+        except (ValueError, TypeError, AttributeError, etree.DocumentInvalid) as e:
+            report["failed"] += 1
+            if len(report["errors"]) < MAX_ERRORS:
+                report["errors"].append(f"{n}: {e}")
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return report
+
+
+# ————— Arka Uçlar Arası Taşıma —————
+def migrate(src: Storage, dst: Storage, replace: bool = False) -> Dict:
+    """
+    Anketleri XML arşivi üzerinden (geçici dosya, sabit bellek) src'den dst'ye
+    taşır; arşiv içe aktarılırken her anket yeniden XSD ile doğrulanır.
+    Kullanıcı kayıtları (parola hash'leri dahil) olduğu gibi kopyalanır.
+    """
+    with tempfile.TemporaryFile() as f:
+        for chunk in export_xml(src):
+            f.write(chunk)
+        f.seek(0)
+        report = import_stream(f, "xml", replace, store=dst)
+    users = src.users.all()
+    with dst.users.locked():
+        for user in users:
+            dst.users.put(user)
+    report["users"] = len(users)
+    return report
+
+
+if __name__ == "__main__":
+    # python -m app.bulk export [--format xml] [-o yedek.ndjson]
+    # python -m app.bulk import yedek.ndjson [--replace]
+    # python -m app.bulk migrate --from files --to sqlite
+    ap = argparse.ArgumentParser(prog="python -m app.bulk")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export", help="tüm anketleri dışa aktar")
+    ex.add_argument("--format", choices=FORMATS, default="ndjson")
+    ex.add_argument("-o", "--out", help="çıktı dosyası (varsayılan: stdout)")
+    im = sub.add_parser("import", help="arşivden içe aktar")
+    im.add_argument("path")
+    im.add_argument("--format", choices=FORMATS, help="varsayılan: içerikten tahmin")
+    im.add_argument("--replace", action="store_true", help="var olan anketlerin üzerine yaz")
+    im.add_argument("--batch", type=int, default=BATCH)
+    mg = sub.add_parser("migrate", help="anketleri ve kullanıcıları başka arka uca taşı")
+    mg.add_argument("--from", dest="src", choices=BACKENDS, default="files")
+    mg.add_argument("--to", dest="dst", choices=BACKENDS, required=True)
+    mg.add_argument("--replace", action="store_true", help="hedefte var olan anketlerin üzerine yaz")
+    args = ap.parse_args()
+
+    started = time.perf_counter()
+    if args.cmd == "export":
+        out = open(args.out, "wb") if args.out else sys.stdout.buffer
+        try:
+            for chunk in export(args.format):
+                out.write(chunk)
+        finally:
+            if args.out:
+                out.close()
+        print(f"dışa aktarma bitti ({time.perf_counter() - started:.2f} sn)", file=sys.stderr)
+    elif args.cmd == "import":
+        with open(args.path, "rb") as f:
+            report = import_stream(f, args.format, args.replace, args.batch)
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        print(f"içe aktarma bitti ({time.perf_counter() - started:.2f} sn)", file=sys.stderr)
+    else:
+        if args.src == args.dst:
+            ap.error("--from ile --to farklı olmalı")
+        report = migrate(open_storage(args.src), open_storage(args.dst), args.replace)
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        print(f"taşıma bitti ({time.perf_counter() - started:.2f} sn)", file=sys.stderr)
@@ -0,0 +1,81 @@
+# votesys/app/cache.py
+# Ayrıştırılmış Poll nesneleri için sınırlı boyutlu LRU önbellek
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+from .models import Poll
+from .slots import OptionSlots
+
+
+class PollCache:
+    """
+    Anket ID'si -> (imza, Poll) eşlemesi tutan LRU önbellek.
+    İmza dosyanın (mtime_ns, boyut, inode) bilgisidir; dosya değiştiyse
+    kayıt geçersiz sayılır. Böylece başka bir işlemin yazdığı dosya da fark edilir.
+    Her kayıtla birlikte anketin seçenek yuvaları (OptionSlots) da tutulabilir.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = max(0, capacity)
+        self._items: "OrderedDict[int, Tuple[Hashable, Poll, Optional[OptionSlots]]]" = OrderedDict()
+        self._guard = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, poll_id: int, signature: Hashable) -> Optional[Poll]:
+        """İmza eşleşirse önbellekteki Poll'u döner (kopyalamaz)."""
+        with self._guard:
+            item = self._items.get(poll_id)
+            if item is None or item[0] != signature:
+                self.misses += 1
+                return None
+            self._items.move_to_end(poll_id)
+            self.hits += 1
+            return item[1]
+
+    def slots(self, poll_id: int, poll: Poll) -> Optional[OptionSlots]:
+        """Kayıttaki anket verilen nesnenin kendisiyse onun seçenek yuvaları."""
+        with self._guard:
+            item = self._items.get(poll_id)
+            return item[2] if item is not None and item[1] is poll else None
+
+    def set_slots(self, poll_id: int, poll: Poll, slots: OptionSlots) -> None:
+        with self._guard:
+            item = self._items.get(poll_id)
+            if item is not None and item[1] is poll:
+                self._items[poll_id] = (item[0], poll, slots)
+
+    def put(self, poll_id: int, signature: Hashable, poll: Poll,
+            slots: Optional[OptionSlots] = None) -> None:
+        """Kaydı ekler; kapasite aşılırsa en eski kaydı çıkarır."""
+        if not self.capacity:
+            return
+        with self._guard:
+            self._items[poll_id] = (signature, poll, slots)
+            self._items.move_to_end(poll_id)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, poll_id: int) -> None:
+        """Ankete ait kaydı siler (yazma/silme sonrası)."""
+        with self._guard:
+            if self._items.pop(poll_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._guard:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Önbellek boyutlandırması için sayaçlar."""
+        with self._guard:
+            return {
+                "capacity":      self.capacity,
+                "size":          len(self._items),
+                "hits":          self.hits,
+                "misses":        self.misses,
+                "evictions":     self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,232 @@
+# votesys/app/catalog.py
+# Anket kataloğu: her anketin özeti (id, sahip, soru, oluşturulma zamanı,
+# seçenek sayısı, toplam oy) bellekte sıralı bir indekste tutulur.
+# Listeleme ve varlık kontrolü dizin taraması yapmaz; sunucu tarafında
+# atomik ID ayırma da buradan yapılır.
+
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .applog import LogTail, append_records
+from .locks import ProcessFileLock
+from .metrics import TimedLock
+
+
+class PollCatalog:
+    """
+    Anket özetlerini id -> kayıt sözlüğünde ve sıralı id listesinde tutar.
+    * catalog.json: anlık görüntü, catalog.log: sonraki değişikliklerin ekleme günlüğü
+    * Her erişimde yalnızca dosya imzalarına bakılır; diğer işlemlerin
+      yazdıkları günlükten okunur
+    * İkisi de yoksa (ilk çalıştırma, silinmiş veri klasörü) katalog
+      loader ile diskteki anketlerden yeniden kurulur
+    Kilit sıralaması: dir_lock -> poll_lock -> katalog kilidi (en içte).
+    """
+
+    def __init__(self, snapshot: str, log: str, lock: str,
+                 loader: Callable[[], Iterable[Dict]]):
+        self.snapshot, self.log_path = snapshot, log
+        self._loader = loader
+        self._lock = TimedLock(ProcessFileLock(lock), "catalog")
+        self._guard = threading.RLock()
+        self._entries: Dict[int, Dict] = {}
+        self._ids: List[int] = []
+        self._next_id = 1
+        self._snap_sig = None
+        self._log = LogTail(log)
+        self._log_records = 0
+        self.rebuilds = 0
+
+    def _refresh(self) -> None:
+        """Dosyalar değiştiyse bellekteki indeksi günceller."""
+        try:
+            st = os.stat(self.snapshot)
+            sig = (st.st_ino, st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            sig = None
+        if sig is None and not os.path.exists(self.log_path):
+            self._rebuild()
+            return
+        if sig != self._snap_sig:
+            data = {"next_id": 1, "polls": []}
+            if sig:
+                with open(self.snapshot, "r") as f:
+                    data = json.load(f)
+            self._entries = {e["id"]: e for e in data["polls"]}
+            self._ids = sorted(self._entries)
+            self._next_id = data["next_id"]
+            self._snap_sig = sig
+            self._log = LogTail(self.log_path)
+            self._log_records = 0
+        reset, records = self._log.read_new()
+        if reset:
+            # Günlük başka bir işlemce sıkıştırıldı; anlık görüntüden yeniden kur
+            self._snap_sig = None
+            return self._refresh()
+        for rec in records:
+            self._apply(rec)
+        self._log_records += len(records)
+
+    def _apply(self, rec: Dict) -> None:
+        if rec["op"] == "put":
+            entry = rec["poll"]
+            if entry["id"] not in self._entries:
+                bisect.insort(self._ids, entry["id"])
+            self._entries[entry["id"]] = entry
+        elif rec["op"] == "del":
+            if self._entries.pop(rec["id"], None) is not None:
+                del self._ids[bisect.bisect_left(self._ids, rec["id"])]
+        else:
+            self._next_id = max(self._next_id, rec["next_id"])
+
+    def _append(self, *recs: Dict) -> None:
+        """Kayıtları günlüğe ekler; günlük indeksten büyükse sıkıştırır. Kilit altında çağrılır."""
+        append_records(self.log_path, recs)
+        self._refresh()
+        if self._log_records >= max(1000, len(self._entries)):
+            self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
+        """Anlık görüntüyü atomik olarak yeniden yazar ve günlüğü siler."""
+        os.makedirs(os.path.dirname(self.snapshot), exist_ok=True)
+        tmp = self.snapshot + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"next_id": self._next_id,
+                       "polls": [self._entries[i] for i in self._ids]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot)
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        self._snap_sig = None
+        self._refresh()
+
+    def _rebuild(self) -> None:
+        """
+        Kataloğu diskteki anketlerden kurar. Anket dosyaları kilitsiz okunur;
+        eşzamanlı bir yazma ya da silme kendi kaydını katalog kilidi
+        bırakıldıktan sonra ekleyeceği için sonuç tutarlı kalır.
+        """
+        with self._lock:
+            if os.path.exists(self.snapshot) or os.path.exists(self.log_path):
+                self._snap_sig = None
+                return self._refresh()
+            self._entries = {e["id"]: e for e in self._loader()}
+            self._ids = sorted(self._entries)
+            self._next_id = (self._ids[-1] + 1) if self._ids else 1
+            self.rebuilds += 1
+            self._write_snapshot()
+
+    def rebuild(self) -> None:
+        """Mevcut katalog dosyalarını atıp diskten yeniden kurar."""
+        with self._guard, self._lock:
+            for path in (self.snapshot, self.log_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._snap_sig = None
+            self._refresh()
+
+    def load(self) -> int:
+        """Kataloğu yükler (gerekirse diskten kurar); anket sayısını döner."""
+        with self._guard:
+            self._refresh()
+            return len(self._ids)
+
+    def generation(self) -> str:
+        """
+        Katalog içeriğinin sürümü: anlık görüntü imzası + okunan günlük uzunluğu.
+        Herhangi bir işlemin yaptığı her değişiklikte farklılaşır (ETag için).
+        """
+        with self._guard:
+            self._refresh()
+            ino, size, mtime = self._snap_sig or (0, 0, 0)
+            return f"{ino:x}.{size:x}.{mtime:x}.{self._log.offset:x}"
+
+    def exists(self, poll_id: int) -> bool:
+        """Anket katalogda var mı? (O(1))"""
+        with self._guard:
+            self._refresh()
+            return poll_id in self._entries
+
+    def get(self, poll_id: int) -> Optional[Dict]:
+        """Anketin katalog kaydının kopyası."""
+        with self._guard:
+            self._refresh()
+            entry = self._entries.get(poll_id)
+            return dict(entry) if entry else None
+
+    def ids(self) -> List[int]:
+        """Tüm anket ID'leri, sıralı."""
+        with self._guard:
+            self._refresh()
+            return list(self._ids)
+
+    def page(self, offset: int, limit: int) -> Tuple[int, List[Dict]]:
+        """(toplam, sayfadaki kayıtlar) döner; maliyet sayfa boyutuyla orantılıdır."""
+        with self._guard:
+            self._refresh()
+            return len(self._ids), [dict(self._entries[i])
+                                    for i in self._ids[offset:offset + limit]]
+
+    def put(self, entry: Dict) -> None:
+        """
+        Anket kaydını ekler ya da günceller. Kayıt zaten varsa
+        ilk oluşturulma zamanı korunur; aynı içerik tekrar yazılmaz.
+        """
+        with self._guard, self._lock:
+            self._refresh()
+            old = self._entries.get(entry["id"])
+            entry = dict(entry, created=old["created"] if old else entry.get("created", time.time()))
+            if entry != old:
+                self._append({"op": "put", "poll": entry})
+
+    def put_many(self, entries: Iterable[Dict]) -> None:
+        """put'un toplu hali: tüm kayıtlar tek bir günlük eklemesiyle yazılır."""
+        with self._guard, self._lock:
+            self._refresh()
+            recs = []
+            for entry in entries:
+                old = self._entries.get(entry["id"])
+                entry = dict(entry, created=old["created"] if old else entry.get("created", time.time()))
+                if entry != old:
+                    recs.append({"op": "put", "poll": entry})
+            if recs:
+                self._append(*recs)
+
+    def remove(self, poll_id: int) -> bool:
+        """Anketi katalogdan siler; yoksa False döner."""
+        with self._guard, self._lock:
+            self._refresh()
+            if poll_id not in self._entries:
+                return False
+            self._append({"op": "del", "id": poll_id})
+            return True
+
+    def allocate_id(self) -> int:
+        """
+        Kullanılmamış yeni bir anket ID'si ayırır.
+        Ayrılan ID günlüğe yazıldığı için başka bir işlem aynısını alamaz;
+        istemcinin seçtiği ID'lerden de her zaman büyüktür.
+        """
+        with self._guard, self._lock:
+            self._refresh()
+            poll_id = max(self._next_id, (self._ids[-1] + 1) if self._ids else 1)
+            self._append({"op": "alloc", "next_id": poll_id + 1})
+            return poll_id
+
+
+if __name__ == "__main__":
+    # python -m app.catalog rebuild
+    if sys.argv[1:] == ["rebuild"]:
+        from .xml_utils import CATALOG
+        started = time.perf_counter()
+        CATALOG.rebuild()
+        print(f"{CATALOG.load()} anket kataloglandı ({time.perf_counter() - started:.2f} sn)")
+    else:
+        print("Kullanım: python -m app.catalog rebuild")
+        sys.exit(2)
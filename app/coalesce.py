@@ -0,0 +1,84 @@
+# votesys/app/coalesce.py
+# Oy birleştirici (group commit): aynı ankete kısa bir pencere içinde gelen oylar
+# toplanır ve STORE.cast_votes ile tek okuma/doğrulama/yazmada uygulanır.
+# Her istek yine kendi sonucunu (kabul ya da 403/400/404) alır.
+
+import asyncio
+import os
+from typing import Dict, List, Set, Tuple
+
+from .storage import STORE
+from .models import Poll
+
+# ————— Ayarlar —————
+# VOTE_COALESCE: 1 ise /vote istekleri birleştirici üzerinden geçer
+# VOTE_COALESCE_WINDOW_MS: Bir anketin ilk oyundan sonra ne kadar beklenir
+# VOTE_COALESCE_MAX: Bu kadar oy birikince pencere beklenmeden yazılır
+ENABLED   = os.getenv("VOTE_COALESCE", "0") == "1"
+WINDOW_MS = float(os.getenv("VOTE_COALESCE_WINDOW_MS", "5"))
+MAX_BATCH = int(os.getenv("VOTE_COALESCE_MAX", "256"))
+
+
+class VoteCoalescer:
+    """
+    Anket başına bekleyen oy grubunu tutar. Grubun ilk oyu pencereyi başlatır;
+    pencere dolunca ya da grup MAX_BATCH'e ulaşınca grup thread havuzunda
+    yazılır. Yazma sürerken gelen oylar bir sonraki gruba girer, böylece
+    sıcak bir ankette her yazma bir öncekinin beklettiği tüm oyları taşır.
+    """
+
+    def __init__(self, window_ms: float = WINDOW_MS, max_batch: int = MAX_BATCH):
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self._pending: Dict[int, List[Tuple[int, str, asyncio.Future]]] = {}
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+        self._commits: Set[asyncio.Task] = set()
+        self.batches = self.votes = 0
+
+    async def submit(self, poll_id: int, option_id: int, username: str) -> Poll:
+        """Oyu gruba ekler ve grubun yazılmasını bekler; reddedilirse HTTPException fırlatır."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        batch = self._pending.setdefault(poll_id, [])
+        batch.append((option_id, username, fut))
+        if len(batch) >= self.max_batch:
+            self._flush(poll_id)
+        elif poll_id not in self._timers:
+            self._timers[poll_id] = loop.call_later(self.window, self._flush, poll_id)
+        return await fut
+
+    def _flush(self, poll_id: int) -> None:
+        """Anketin bekleyen grubunu alır ve yazmayı başlatır."""
+        timer = self._timers.pop(poll_id, None)
+        if timer:
+            timer.cancel()
+        batch = self._pending.pop(poll_id, None)
+        if batch:
+            # Görev referansı tutulur, yoksa yazma sürerken toplanabilir
+            task = asyncio.ensure_future(self._commit(poll_id, batch))
+            self._commits.add(task)
+            task.add_done_callback(self._commits.discard)
+
+    async def _commit(self, poll_id: int, batch: List[Tuple[int, str, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.votes += len(batch)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                None, STORE.cast_votes, poll_id, [(o, u) for o, u, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, _, fut), result in zip(batch, results):
+            if fut.done():
+                continue
+            if isinstance(result, Exception):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+
+    def stats(self) -> Dict[str, float]:
+        """Yazılan grup ve oy sayıları, ortalama grup boyu."""
+        return {"batches": self.batches, "votes": self.votes,
+                "avg_batch": self.votes / self.batches if self.batches else 0.0}
+
+
+coalescer = VoteCoalescer()
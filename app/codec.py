@@ -0,0 +1,106 @@
+# votesys/app/codec.py
+# poll.xsd biçimine özel XML kodlayıcı/çözücü.
+# * Yazma: lxml ağacı kurmadan doğrudan bayt üretir (şemaya uygun yapı garanti)
+# * Okuma: tek bir lxml parse; modeller tür dönüşümü burada yapıldığı için
+#   pydantic doğrulaması atlanarak (model_construct) kurulur
+
+import re
+import threading
+from typing import List, Optional
+
+from lxml import etree
+
+from .models import Option, Poll
+
+# XML 1.0'da yazılamayan karakterler (lxml de bunları reddeder)
+_INVALID_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+_DECLARATION = "<?xml version='1.0' encoding='UTF-8'?>\n"
+
+# Parser nesneleri thread'ler arasında paylaşılmamalı
+_local = threading.local()
+
+
+def _parser() -> etree.XMLParser:
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = _local.parser = etree.XMLParser(resolve_entities=False, no_network=True)
+    return parser
+
+
+def _escape(value: str, attr: bool = False) -> str:
+    """Metni XML'e güvenle yazılacak hale getirir; geçersiz karakterde ValueError."""
+    if _INVALID_CHARS.search(value):
+        raise ValueError(f"XML'de geçersiz karakter: {value!r}")
+    value = value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    if attr:
+        value = (value.replace('"', "&quot;").replace("\n", "&#10;")
+                 .replace("\r", "&#13;").replace("\t", "&#9;"))
+    elif "\r" in value:
+        value = value.replace("\r", "&#13;")
+    return value
+
+
+POLL_TAIL = b"</options></poll>"
+
+
+def encode_head(poll: Poll) -> bytes:
+    """XML bildirimi, <poll> açılışı, soru ve <options> açılışı."""
+    parts: List[str] = [_DECLARATION, f'<poll id="{int(poll.id)}"']
+    if poll.owner:
+        parts.append(f' owner="{_escape(poll.owner, attr=True)}"')
+    parts.append(f"><question>{_escape(poll.question)}</question><options>")
+    return "".join(parts).encode("utf-8")
+
+
+def encode_option(opt: Option) -> bytes:
+    """Tek bir <option> öğesi."""
+    return (f'<option id="{int(opt.id)}"><text>{_escape(opt.text)}</text>'
+            f"<votes>{int(opt.votes)}</votes></option>").encode("utf-8")
+
+
+def encode_poll(poll: Poll) -> bytes:
+    """Poll modelini poll.xsd'ye uygun XML baytlarına çevirir."""
+    return encode_head(poll) + b"".join(map(encode_option, poll.options)) + POLL_TAIL
+
+
+def _decode_option(oe: etree._Element) -> Option:
+    # Şemadaki sıra (<text>, <votes>) tutuyorsa çocuklara konumla erişilir;
+    # findtext'e göre belirgin şekilde hızlıdır. Tutmuyorsa adla aranır.
+    if len(oe) == 2:
+        text_el, votes_el = oe
+        if text_el.tag == "text" and votes_el.tag == "votes":
+            return Option.model_construct(id=int(oe.get("id")), text=text_el.text or "",
+                                          votes=int(votes_el.text))
+    return Option.model_construct(id=int(oe.get("id")), text=oe.findtext("text") or "",
+                                  votes=int(oe.findtext("votes")))
+
+
+def decode_poll(xml_bytes: bytes, poll_id: Optional[int] = None,
+                schema: Optional[etree.XMLSchema] = None) -> Poll:
+    """
+    XML baytlarını tek parse ile Poll modeline çevirir.
+    schema verilirse aynı ağaç üzerinde XSD doğrulaması da yapılır (yeniden parse yok).
+    Yapı bozuksa ValueError fırlatır.
+    """
+    try:
+        root = etree.fromstring(xml_bytes, _parser())
+        if schema is not None:
+            schema.assertValid(root)
+    except (etree.XMLSyntaxError, etree.DocumentInvalid) as e:
+        raise ValueError(f"Anket XML'i çözülemedi: {e}") from e
+    return decode_element(root, poll_id)
+
+
+def decode_element(root: etree._Element, poll_id: Optional[int] = None) -> Poll:
+    """Ayrıştırılmış bir <poll> öğesini Poll modeline çevirir (arşiv okuma da kullanır)."""
+    if root.tag != "poll":
+        raise ValueError(f"Beklenmeyen kök: {root.tag}")
+    try:
+        options = [_decode_option(oe) for oe in root.iterfind("options/option")]
+        pid = root.get("id")
+        return Poll.model_construct(id=int(pid) if pid is not None else poll_id,
+                                    owner=root.get("owner"),
+                                    question=root.findtext("question") or "",
+                                    options=options)
+    except TypeError as e:
+        raise ValueError(f"Anket XML'i çözülemedi: {e}") from e
@@ -0,0 +1,135 @@
+# votesys/app/counters.py
+# Sıcak anketler için işlemler arası paylaşılan oy sayaçları (VOTE_COUNTERS=shm).
+# Her anketin sayaçları poll_{id}.counts dosyasında durur; tüm işçi işlemleri
+# dosyayı mmap ile eşler, okuma sistem çağrısı ya da ayrıştırma gerektirmez.
+# Dosya türetilmiş veridir: XML + oy günlüğünden her an yeniden kurulabilir.
+#
+# Düzen (8 baytlık işaretli tamsayılar):
+#   [0] sihirli sözcük  [1] sıra (seqlock)  [2..3] durum etiketi (12 bayt + dolgu)
+#   [4] seçenek sayısı  [5..] (seçenek id, oy) çiftleri
+# Yazan (anket kilidi altında) güncellemeden önce sırayı tek, sonra çift yapar;
+# okuyan kilitsiz okur ve sıra değiştiyse ya da tekse sonucu kullanmaz.
+# Yazma yarıda kalırsa (çökme) sıra tek kalır ve sayaçlar yeniden kurulur.
+
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+MAGIC = int.from_bytes(b"VSCNT001", "little")
+_SEQ, _COUNT, _PAIRS = 1, 4, 5
+_TAG = slice(16, 28)
+
+
+class CounterRegion:
+    """Tek bir anketin eşlenmiş sayaç dosyası."""
+
+    def __init__(self, path: str):
+        with open(path, "r+b") as f:
+            self._mm = mmap.mmap(f.fileno(), 0)
+        self._words = memoryview(self._mm).cast("q")
+        if len(self._words) < _PAIRS or self._words[0] != MAGIC:
+            raise ValueError(f"Geçersiz sayaç dosyası: {path}")
+        n = self._words[_COUNT]
+        # seçenek id -> oy sayısının sözcük konumu
+        self._slots = {self._words[_PAIRS + 2 * i]: _PAIRS + 2 * i + 1 for i in range(n)}
+
+    @staticmethod
+    def create(path: str, totals: Dict[int, int], tag: bytes) -> "CounterRegion":
+        """Sayaç dosyasını geçici dosya + os.replace ile atomik olarak yazar."""
+        words = array("q", [MAGIC, 0, 0, 0, len(totals)])
+        for option_id, votes in totals.items():
+            words.extend((option_id, votes))
+        data = bytearray(words.tobytes())
+        data[_TAG] = tag
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return CounterRegion(path)
+
+    def snapshot(self, tag: bytes) -> Optional[Dict[int, int]]:
+        """
+        Etiket eşleşiyorsa {seçenek: oy} döner. Yazma sürüyorsa, yarıda
+        kaldıysa ya da sayaçlar diskteki durumla uyuşmuyorsa None döner.
+        """
+        words = self._words
+        seq = words[_SEQ]
+        if seq & 1 or self._mm[_TAG] != tag:
+            return None
+        totals = {option_id: words[slot] for option_id, slot in self._slots.items()}
+        if words[_SEQ] != seq:
+            return None
+        return totals
+
+    @contextmanager
+    def writing(self) -> Iterator["CounterRegion"]:
+        """
+        Güncelleme penceresi; çağıranın anket kilidini tutması beklenir.
+        Hata olursa sıra tek bırakılır, sayaçlar bir sonraki okumada yeniden kurulur.
+        """
+        self._words[_SEQ] += 1
+        yield self
+        self._words[_SEQ] += 1
+
+    def add(self, option_id: int, votes: int = 1) -> None:
+        self._words[self._slots[option_id]] += votes
+
+    def set_tag(self, tag: bytes) -> None:
+        self._mm[_TAG] = tag
+
+
+class SharedCounters:
+    """
+    Bu işlemdeki sayaç eşlemelerini anket başına tutar (LRU).
+    Dosya başka bir işlemce yeniden kurulduysa eski eşlemenin etiketi
+    tutmayacağı için okuma yavaş yola düşer ve eşleme yenilenir.
+    """
+
+    def __init__(self, path_for: Callable[[int], str], size: int = 1024):
+        self.path_for = path_for
+        self.size = size
+        self._regions: "OrderedDict[int, CounterRegion]" = OrderedDict()
+        self._guard = threading.Lock()
+        self.rebuilds = 0
+
+    def get(self, poll_id: int, remap: bool = False) -> Optional[CounterRegion]:
+        """Anketin eşlemesini döner; remap verilirse dosya yeniden eşlenir."""
+        with self._guard:
+            region = self._regions.get(poll_id)
+            if region is not None and not remap:
+                self._regions.move_to_end(poll_id)
+                return region
+        try:
+            region = CounterRegion(self.path_for(poll_id))
+        except (FileNotFoundError, ValueError):
+            return None
+        self._store(poll_id, region)
+        return region
+
+    def totals(self, poll_id: int, tag: bytes) -> Optional[Dict[int, int]]:
+        """Geçerli sayaçlar ya da None (kilitsiz)."""
+        region = self.get(poll_id)
+        return region.snapshot(tag) if region is not None else None
+
+    def rebuild(self, poll_id: int, totals: Dict[int, int], tag: bytes) -> CounterRegion:
+        """Sayaçları verilen toplamlarla yeniden kurar; anket kilidi altında çağrılır."""
+        region = CounterRegion.create(self.path_for(poll_id), totals, tag)
+        self._store(poll_id, region)
+        self.rebuilds += 1
+        return region
+
+    def forget(self, poll_id: int) -> None:
+        with self._guard:
+            self._regions.pop(poll_id, None)
+
+    def _store(self, poll_id: int, region: CounterRegion) -> None:
+        # Eşlemeler kapatılmaz; başka bir thread okuyor olabilir, çöp toplayıcı bırakır
+        with self._guard:
+            self._regions[poll_id] = region
+            self._regions.move_to_end(poll_id)
+            while len(self._regions) > self.size:
+                self._regions.popitem(last=False)
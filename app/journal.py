@@ -0,0 +1,240 @@
+# votesys/app/journal.py
+# Oy günlüğü (journal): her oy, anketin XML'i yeniden yazılmadan
+# poll_{id}.journal dosyasına tek satır olarak eklenir. Sıkıştırıcı (compactor)
+# günlüğü belirli aralıklarla poll_{id}.xml'e katlar; okumalar XML anlık görüntüsü
+# ile günlük kuyruğunu birleştirir, böylece sonuçlar her an kesindir.
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from . import voters, xml_utils
+from .applog import LogTail, append_records
+from .metrics import STAGE
+from .models import Poll
+from .slots import OptionSlots, with_votes
+
+logger = logging.getLogger(__name__)
+
+# ————— Ayarlar —————
+# JOURNAL_COMPACT_INTERVAL: Arka plan sıkıştırıcının çalışma aralığı (saniye)
+# JOURNAL_COMPACT_MAX: Bu kadar kayıt birikince oy anında sıkıştır
+# JOURNAL_FSYNC: 1 ise her ekleme diske zorlanır (daha yavaş, daha dayanıklı)
+COMPACT_INTERVAL = float(os.getenv("JOURNAL_COMPACT_INTERVAL", "5"))
+COMPACT_MAX      = int(os.getenv("JOURNAL_COMPACT_MAX", "10000"))
+FSYNC            = os.getenv("JOURNAL_FSYNC", "0") == "1"
+
+
+class _Tail:
+    """Bir anket günlüğünün bu işlemde okunmuş kısmının özeti."""
+
+    def __init__(self, path: str):
+        self.log = LogTail(path)
+        self.counts: Dict[int, int] = {}
+        self.users: List[Tuple[str, float]] = []
+        self.user_set: Set[str] = set()
+
+    def refresh(self) -> "_Tail":
+        """Günlüğe eklenen yeni kayıtları özete işler."""
+        reset, records = self.log.read_new()
+        if reset:
+            self.counts, self.users, self.user_set = {}, [], set()
+        for rec in records:
+            self.counts[rec["o"]] = self.counts.get(rec["o"], 0) + 1
+            self.users.append((rec["u"], rec.get("t", 0)))
+            self.user_set.add(rec["u"])
+        return self
+
+
+_tails: Dict[int, _Tail] = {}
+_dirty: Set[int] = set()
+_guard = threading.Lock()
+
+
+def _folded_path(poll_id: int) -> str:
+    return xml_utils._journal_filepath(poll_id) + ".folded"
+
+
+def _next_path(poll_id: int) -> str:
+    return xml_utils._poll_filepath(poll_id) + ".next"
+
+
+def _recover(poll_id: int) -> None:
+    """
+    Yarıda kalmış bir sıkıştırmayı tamamlar ya da geri alır.
+    Taahhüt noktası günlüğün .folded adıyla yeniden adlandırılmasıdır:
+    - .folded varsa katlama geçerlidir; .next XML yerine konur, oy verenler eklenir
+    - yalnızca .next varsa katlama taahhüt edilmemiştir; silinir
+    Çağıranın poll_lock tutması beklenir.
+    """
+    folded, nxt = _folded_path(poll_id), _next_path(poll_id)
+    if os.path.exists(folded):
+        if os.path.exists(nxt):
+            os.replace(nxt, xml_utils._poll_filepath(poll_id))
+            xml_utils.POLL_CACHE.invalidate(poll_id)
+        voters.add(poll_id, _Tail(folded).refresh().users)
+        poll, slots = xml_utils.read_snapshot(poll_id)
+        xml_utils.CATALOG.put(xml_utils.catalog_entry(poll, slots.total_votes(poll),
+                                                      voters.count(poll_id)))
+        os.remove(folded)
+    elif os.path.exists(nxt):
+        os.remove(nxt)
+
+
+def _tail(poll_id: int) -> _Tail:
+    """
+    Günlüğün yeni eklenen kısmını okuyup özeti günceller.
+    Çağıranın poll_lock tutması beklenir.
+    """
+    with _guard:
+        tail = _tails.get(poll_id)
+        if tail is None:
+            tail = _tails[poll_id] = _Tail(xml_utils._journal_filepath(poll_id))
+    return tail.refresh()
+
+
+def read_snapshot(poll_id: int) -> Tuple[Poll, OptionSlots]:
+    """
+    XML anlık görüntüsü + günlük kuyruğu = güncel anket, seçenek yuvalarıyla.
+    Günlük yoksa kilit almadan önbellekteki sürüm döner; varsa bekleyen oylar
+    yeni bir sürüme uygulanır. Dönen sürüm paylaşılır, değiştirilmemeli.
+    """
+    # Sıkıştırma .folded dosyasını XML değiştirildikten sonra sildiği için
+    # ikisi de yoksa XML anlık görüntüsü günceldir
+    if not os.path.exists(xml_utils._journal_filepath(poll_id)) \
+            and not os.path.exists(_folded_path(poll_id)):
+        return xml_utils.read_snapshot(poll_id)
+    with xml_utils.poll_lock(poll_id):
+        _recover(poll_id)
+        poll, slots = xml_utils.read_snapshot(poll_id)
+        tail = _tail(poll_id)
+    return with_votes(poll, slots, tail.counts)
+
+
+def read_poll(poll_id: int) -> Poll:
+    """read_snapshot'ın değiştirilebilir kopyası."""
+    return read_snapshot(poll_id)[0].model_copy(deep=True)
+
+
+def pending_votes(poll_id: int) -> int:
+    """Henüz XML'e katlanmamış oy sayısı (günlük yoksa kilitsiz 0)."""
+    if not os.path.exists(xml_utils._journal_filepath(poll_id)) \
+            and not os.path.exists(_folded_path(poll_id)):
+        return 0
+    with xml_utils.poll_lock(poll_id):
+        _recover(poll_id)
+        return len(_tail(poll_id).users)
+
+
+def has_voted(poll_id: int, username: str) -> bool:
+    """Kullanıcının henüz katlanmamış bir oyu var mı?"""
+    if not os.path.exists(xml_utils._journal_filepath(poll_id)):
+        return False
+    with xml_utils.poll_lock(poll_id):
+        return username in _tail(poll_id).user_set
+
+
+def append(poll_id: int, username: str, option_id: int) -> None:
+    """
+    Tek bir oyu günlüğe ekler (O(1)).
+    Doğrulama (sahip, tekrar oy, seçenek) çağıranın sorumluluğundadır.
+    """
+    append_batch(poll_id, [(username, option_id)])
+
+
+def append_batch(poll_id: int, entries: List[Tuple[str, int]]) -> None:
+    """(kullanıcı, seçenek) oylarını tek bir yazma ile günlüğe ekler."""
+    now = time.time()
+    records = [{"u": username, "o": option_id, "t": now} for username, option_id in entries]
+    with xml_utils.poll_lock(poll_id):
+        _recover(poll_id)
+        with STAGE.time("journal_append"):
+            append_records(xml_utils._journal_filepath(poll_id), records, fsync=FSYNC)
+        pending = len(_tail(poll_id).users)
+        with _guard:
+            _dirty.add(poll_id)
+        if pending >= COMPACT_MAX:
+            compact(poll_id)
+
+
+def compact(poll_id: int) -> int:
+    """
+    Günlüğü poll_{id}.xml'e katlar ve katlanan kayıt sayısını döner.
+    Sıra: .next yaz -> günlüğü .folded yap (taahhüt) -> XML'i değiştir
+    -> oy verenleri ekle -> .folded sil. Her adım _recover ile tamamlanabilir.
+    """
+    with STAGE.time("compact"), xml_utils.poll_lock(poll_id):
+        _recover(poll_id)
+        with _guard:
+            _dirty.discard(poll_id)
+        tail = _tail(poll_id)
+        if not tail.users:
+            return 0
+        try:
+            poll, slots = xml_utils.read_snapshot(poll_id)
+        except FileNotFoundError:
+            return 0
+        # Yalnızca sayılar değişir: XML değişmeyen seçenek parçalarından kurulur
+        poll, slots = with_votes(poll, slots, tail.counts)
+
+        path = xml_utils._poll_filepath(poll_id)
+        with open(_next_path(poll_id), "wb") as f:
+            f.write(slots.encode(poll))
+            f.flush()
+            sig = xml_utils.advance_mtime(f.fileno(), os.stat(path).st_mtime_ns)
+            os.fsync(f.fileno())
+        os.replace(xml_utils._journal_filepath(poll_id), _folded_path(poll_id))
+        os.replace(_next_path(poll_id), path)
+        xml_utils.POLL_CACHE.put(poll_id, sig, poll, slots)
+        voters.add(poll_id, tail.users)
+        xml_utils.CATALOG.put(xml_utils.catalog_entry(poll, slots.total_votes(poll),
+                                                      voters.count(poll_id)))
+        os.remove(_folded_path(poll_id))
+        _tails.pop(poll_id, None)
+        return len(tail.users)
+
+
+def compact_all() -> int:
+    """Bu işlemde oy alan tüm anketlerin günlüklerini katlar."""
+    with _guard:
+        pending = list(_dirty)
+    folded = 0
+    for poll_id in pending:
+        folded += compact(poll_id)
+    return folded
+
+
+# ————— Arka Plan Sıkıştırıcı —————
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _run(interval: float) -> None:
+    while not _stop.wait(interval):
+        try:
+            compact_all()
+        except Exception:
+            logger.exception("Günlük sıkıştırma başarısız; bir sonraki turda yeniden denenecek")
+
+
+def start_compactor(interval: float = COMPACT_INTERVAL) -> None:
+    """Sıkıştırıcı thread'ini başlatır (zaten çalışıyorsa bir şey yapmaz)."""
+    global _thread
+    if _thread and _thread.is_alive():
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, args=(interval,),
+                               name="journal-compactor", daemon=True)
+    _thread.start()
+
+
+def stop_compactor() -> None:
+    """Sıkıştırıcıyı durdurur ve kalan günlükleri katlar."""
+    global _thread
+    _stop.set()
+    if _thread:
+        _thread.join()
+        _thread = None
+    compact_all()
@@ -0,0 +1,203 @@
+# votesys/app/live.py
+# Canlı sonuç yayını: oy kaydedildiğinde değişen seçeneklerin güncel sayıları
+# yayıncıya bildirilir; yayıncı her tikte anket başına tek bir olay üretip
+# tüm abonelere (SSE bağlantılarına) dağıtır. İzleyici sayısı ne olursa olsun
+# anket başına tik başına bir serileştirme yapılır. Birden çok işçi işlemi
+# varken diğer işlemlerin kaydettiği oylar, izlenen anketlerin dosya
+# imzalarına her tikte bakılarak yakalanır; bu işlemin kendi yazmaları
+# imzayı ilerlettiği için yeniden okunmaz.
+
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+from typing import Callable, Dict, Optional, Set
+
+# ————— Ayarlar —————
+# LIVE_TICK_MS: Birikmiş değişikliklerin yayınlanma aralığı (ms)
+# LIVE_QUEUE: Abone başına bekleyebilecek olay sayısı; dolarsa abone tam
+#             anlık görüntüyle yeniden eşitlenir
+TICK_MS    = float(os.getenv("LIVE_TICK_MS", "250"))
+QUEUE_SIZE = int(os.getenv("LIVE_QUEUE", "16"))
+# LIVE_WATCH: Diğer işçilerin oylarını imzalardan yakalama. auto: WEB_CONCURRENCY > 1
+#             ya da uvicorn --workers altında açık; 1/0: her zaman açık/kapalı
+WATCH      = os.getenv("LIVE_WATCH", "auto").lower()
+
+# Kuyruğu taşan aboneye gönderilen işaret
+RESYNC = object()
+
+
+class Subscriber:
+    """Tek bir izleyici bağlantısının olay kuyruğu."""
+
+    def __init__(self, poll_id: int, size: int):
+        self.poll_id = poll_id
+        self.queue: asyncio.Queue = asyncio.Queue(size)
+
+    def offer(self, event: str) -> None:
+        """Olayı kuyruğa koyar; kuyruk doluysa boşaltıp RESYNC bırakır."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self, timeout: float):
+        """Sıradaki olayı bekler; süre dolarsa None döner."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class TallyBroadcaster:
+    """
+    Anket başına {seçenek: güncel oy} değişikliklerini biriktirir ve yayar.
+    publish her thread'den çağrılabilir; abonelik ve yayın event loop'ta yapılır.
+    Sayılar mutlak değer olarak gönderildiği için bir olayın iki kez
+    uygulanması ya da anlık görüntüyle çakışması sonucu bozmaz.
+    """
+
+    def __init__(self, tick_ms: float = TICK_MS, queue_size: int = QUEUE_SIZE):
+        self.tick = tick_ms / 1000
+        self.queue_size = queue_size
+        self._subs: Dict[int, Set[Subscriber]] = {}
+        self._pending: Dict[int, Dict[int, int]] = {}
+        self._guard = threading.Lock()
+        self._ticker: Optional[asyncio.Task] = None
+        self._signature: Optional[Callable[[int], Optional[str]]] = None
+        self._totals: Optional[Callable[[int], Dict[int, int]]] = None
+        self._sigs: Dict[int, Optional[str]] = {}
+        self.broadcasts = 0
+
+    def watch(self, signature: Callable[[int], Optional[str]],
+              totals: Callable[[int], Dict[int, int]]) -> None:
+        """
+        Başka işlemlerin kaydettiği oyları da yayınlamak için kaynak bağlar:
+        signature(poll_id) yalnızca stat ile hesaplanan sürüm imzası,
+        totals(poll_id) tüm seçeneklerin güncel sayıları.
+        """
+        self._signature, self._totals = signature, totals
+
+    def watching(self, poll_id: int) -> bool:
+        """Anket izleniyor ve imzası takip ediliyorsa True (publish'e imza verilmeli)."""
+        with self._guard:
+            return self._signature is not None and poll_id in self._subs
+
+    def publish(self, poll_id: int, totals: Dict[int, int],
+                before: Optional[str] = None, after: Optional[str] = None) -> None:
+        """
+        Değişen seçeneklerin güncel sayılarını bildirir (izleyen yoksa atılır).
+        before/after yazmanın kilit altında alınmış önceki ve sonraki imzasıdır:
+        son görülen imza before ise yazma yalnızca bu işleminkidir ve imza
+        after'a ilerletilir; böylece check_sources anketi yeniden okumaz.
+        """
+        with self._guard:
+            if poll_id not in self._subs:
+                return
+            self._pending.setdefault(poll_id, {}).update(totals)
+            if after is not None and self._sigs.get(poll_id) == before:
+                self._sigs[poll_id] = after
+
+    def subscribe(self, poll_id: int) -> Subscriber:
+        """Yeni abone ekler; yayın görevi çalışmıyorsa başlatır."""
+        sub = Subscriber(poll_id, self.queue_size)
+        # İlk abonede imza kaydedilir; bundan sonraki her değişiklik yakalanır
+        sig = self._signature(poll_id) if self._signature and poll_id not in self._subs else None
+        with self._guard:
+            if poll_id not in self._subs:
+                self._sigs[poll_id] = sig
+            self._subs.setdefault(poll_id, set()).add(sub)
+        loop = asyncio.get_running_loop()
+        if self._ticker is None or self._ticker.done() or self._ticker.get_loop() is not loop:
+            self._ticker = loop.create_task(self._run())
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._guard:
+            subs = self._subs.get(sub.poll_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.poll_id]
+                    self._pending.pop(sub.poll_id, None)
+                    self._sigs.pop(sub.poll_id, None)
+
+    def subscribers(self, poll_id: int) -> int:
+        with self._guard:
+            return len(self._subs.get(poll_id, ()))
+
+    def flush(self) -> int:
+        """Biriken değişiklikleri yayınlar; gönderilen olay sayısını döner."""
+        with self._guard:
+            pending, self._pending = self._pending, {}
+            targets = {pid: list(self._subs.get(pid, ())) for pid in pending}
+        for poll_id, totals in pending.items():
+            # Olay anket başına bir kez serileştirilir, tüm abonelere aynı metin gider
+            event = sse("tally", {"id": poll_id, "options": totals})
+            for sub in targets[poll_id]:
+                sub.offer(event)
+            self.broadcasts += 1
+        return len(pending)
+
+    def check_sources(self) -> int:
+        """
+        İzlenen anketlerden imzası değişenleri okuyup tüm sayılarını yayınlar
+        (başka bir işçinin aldığı oylar). Okunan anket sayısını döner.
+        """
+        if self._signature is None:
+            return 0
+        with self._guard:
+            watched = {pid: self._sigs.get(pid) for pid in self._subs}
+        changed = 0
+        for poll_id, last in watched.items():
+            # İmza okumadan önce alınır; arada bir yazma olursa
+            # imza yine farklı görüneceği için sonraki tikte yeniden okunur
+            sig = self._signature(poll_id)
+            if sig == last:
+                continue
+            with self._guard:
+                if poll_id not in self._subs:
+                    continue
+                self._sigs[poll_id] = sig
+            try:
+                totals = self._totals(poll_id)
+            except Exception:
+                continue
+            self.publish(poll_id, totals)
+            changed += 1
+        return changed
+
+    async def _run(self) -> None:
+        """Abone kaldıkça her tikte diğer işlemlerin oylarını toplar ve flush eder."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.tick)
+            if self._signature is not None:
+                # Anket okuması event loop'u bekletmesin
+                await loop.run_in_executor(None, self.check_sources)
+            self.flush()
+            with self._guard:
+                if not self._subs:
+                    return
+
+
+def watch_enabled() -> bool:
+    """
+    İmza izleme yalnızca birden çok işçi varken gerekir. uvicorn --workers
+    işçileri multiprocessing alt işlemi olarak başlatır (--reload de öyledir);
+    gunicorn için WEB_CONCURRENCY verilmelidir.
+    """
+    if WATCH != "auto":
+        return WATCH in ("1", "true", "on")
+    return int(os.getenv("WEB_CONCURRENCY", "1")) > 1 or multiprocessing.parent_process() is not None
+
+
+def sse(event: str, data) -> str:
+    """Server-Sent Events biçiminde tek bir olay."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+broadcaster = TallyBroadcaster()
@@ -0,0 +1,105 @@
+# votesys/app/locks.py
+# İşlemler arası dosya kilitleri: fcntl.flock + işlem içi RLock.
+# * Aynı thread kilidi iç içe alabilir (reentrant); diğer thread'ler RLock'ta,
+#   diğer işlemler flock'ta bekler. Bekleme çekirdekte yapılır, kilit
+#   bırakıldığı anda uyanılır (yoklama yok).
+# * Fork sonrası çocuk işlem ebeveynden kalan durumu kullanmaz; kendi
+#   kilidini ilk kullanımda kurar (gunicorn --preload, multiprocessing fork).
+# filelock'a göre alma/bırakma maliyeti çok düşüktür; zaman aşımı hatası için
+# yine filelock.Timeout fırlatılır ki çağıranlar değişmesin.
+
+import fcntl
+import os
+import threading
+import time
+
+from filelock import Timeout
+
+# ————— Ayarlar —————
+# LOCK_POLL_MS: Zaman aşımı verilen almalarda kilidin yeniden denenme aralığı (ms)
+POLL_INTERVAL = float(os.getenv("LOCK_POLL_MS", "1")) / 1000
+
+
+class ProcessFileLock:
+    """Süreçler arası, thread'ler arası ve iç içe alınabilen dosya kilidi."""
+
+    __slots__ = ("path", "_pid", "_rlock", "_fd", "_depth")
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._pid = os.getpid()
+        self._rlock = threading.RLock()
+        self._fd = None
+        self._depth = 0
+
+    def _check_fork(self) -> None:
+        if self._pid != os.getpid():
+            # Devralınan tanımlayıcı kapatılır ama kilidi bırakılmaz (LOCK_UN
+            # ebeveynin tuttuğu kilidi de bırakırdı)
+            if self._fd is not None:
+                os.close(self._fd)
+            self._pid, self._rlock, self._fd, self._depth = os.getpid(), threading.RLock(), None, 0
+
+    def acquire(self, timeout: float = -1, blocking: bool = True, **_):
+        self._check_fork()
+        if not blocking:
+            wait = 0
+        elif timeout is None or timeout < 0:
+            wait = -1
+        else:
+            wait = timeout
+        deadline = time.monotonic() + wait if wait >= 0 else None
+        if not self._rlock.acquire(timeout=wait):
+            raise Timeout(self.path)
+        if self._depth == 0:
+            try:
+                self._fd = self._lock_file(deadline)
+            except BaseException:
+                self._rlock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def _lock_file(self, deadline) -> int:
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if deadline is None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                return fd
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return fd
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise Timeout(self.path)
+                    time.sleep(POLL_INTERVAL)
+        except BaseException:
+            os.close(fd)
+            raise
+
+    def release(self, **_) -> None:
+        self._check_fork()
+        if self._depth == 0:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        self._rlock.release()
+
+    @property
+    def is_locked(self) -> bool:
+        return self._depth > 0
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
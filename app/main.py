@@ -2,29 +2,54 @@
 # Online Oylama Sistemi API'sinin ana dosyası
 
 # Gerekli kütüphaneleri içe aktar
-import json, traceback
-from pathlib import Path
-from typing import List
+import json
+import os
+import tempfile
+import traceback
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional, Union
 
 from fastapi import (
     FastAPI, Request, HTTPException, Query,
     Depends, status, Form
 )
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import (
+    HTMLResponse, PlainTextResponse, RedirectResponse, Response, StreamingResponse
+)
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 
-from .models import Poll
-from . import xml_utils
+from .models import Option, Poll
+from . import bulk, coalesce, journal, live, metrics, votes, xml_utils
+from .analytics import ANALYTICS
+from .storage import STORE
 from .auth import (
-    register, authenticate, create_access_token,
-    logged_user, admin_only, get_current_user,
-    list_users, delete_user
+    register_async, authenticate_async, create_access_token,
+    admin_only, get_current_user,
+    users_page, iter_users, delete_user
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Depolamayı hazırla (dosya arka ucunda katalog yoksa diskten kurulur)
+    STORE.load()
+    # İstatistik indeksi yoksa depolamadaki anketlerden kurulur
+    ANALYTICS.load(STORE)
+    # Günlük modunda arka plan sıkıştırıcıyı çalıştır, kapanışta kalanları katla
+    compactor = votes.JOURNAL_MODE and STORE.name == "files"
+    if compactor:
+        journal.start_compactor()
+    yield
+    if compactor:
+        journal.stop_compactor()
+    # Tamponda bekleyen istatistik kayıtları kapanışta yazılır
+    ANALYTICS.flush()
+
 # FastAPI uygulamasını başlat
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(metrics.HTTPMetricsMiddleware)
 
 # Statik dosyalar ve şablon dizinleri
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -44,8 +69,8 @@ async def register_page(request: Request):
 
 @app.post("/register")
 async def api_register(payload: RegisterRequest):
-    # Yeni kullanıcı kaydı işlemi
-    register(payload.username, payload.email, payload.password)
+    # Yeni kullanıcı kaydı işlemi (bcrypt event loop dışında çalışır)
+    await register_async(payload.username, payload.email, payload.password)
     return {"msg": "Kayıt başarılı!"}
 
 @app.get("/login", response_class=HTMLResponse)
@@ -55,8 +80,8 @@ async def login_page(request: Request):
 
 @app.post("/login")
 async def api_login(username: str = Form(...), password: str = Form(...)):
-    # Kullanıcı doğrulama ve token oluşturma
-    user   = authenticate(username, password)
+    # Kullanıcı doğrulama ve token oluşturma (bcrypt event loop dışında çalışır)
+    user   = await authenticate_async(username, password)
     token  = create_access_token({"sub": user["username"], "role": user["role"]})
     return {
         "access_token": token,
@@ -93,10 +118,31 @@ async def poll_create_page(request: Request):
     return templates.TemplateResponse("admin_create.html", {"request": request})
 
 # ───────── Admin API’leri ─────────
-@app.get("/api/users", dependencies=[Depends(admin_only)])
-async def api_list_users():
-    # Tüm kullanıcıları listele (sadece admin)
-    return list_users()
+class UserInfo(BaseModel):
+    # Yönetici listesi için kullanıcı (şifre özeti olmadan)
+    username: str
+    email: str
+    role: str
+
+class UserPage(BaseModel):
+    # Kullanıcı adına göre sıralı sayfa; next_cursor son sayfada None'dır
+    items: List[UserInfo]
+    next_cursor: Optional[str] = None
+
+@app.get("/api/users", dependencies=[Depends(admin_only)], response_model=UserPage)
+async def api_list_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    prefix: str = "",
+    format: Literal["json", "ndjson"] = "json",
+):
+    # Kullanıcıları sayfa sayfa listele (sadece admin); prefix ile kullanıcı adı araması.
+    # format=ndjson imleçten itibaren eşleşen tüm kullanıcıları satır satır akıtır
+    if format == "ndjson":
+        lines = (json.dumps(u, ensure_ascii=False) + "\n" for u in iter_users(prefix, cursor))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    items, next_cursor = users_page(cursor, limit, prefix)
+    return {"items": items, "next_cursor": next_cursor}
 
 @app.delete("/api/users/{username}", dependencies=[Depends(admin_only)])
 async def api_delete_user(username: str):
@@ -104,58 +150,261 @@ async def api_delete_user(username: str):
     delete_user(username)
     return {"msg": "Kullanıcı silindi"}
 
+@app.get("/api/stats/cache", dependencies=[Depends(admin_only)])
+async def api_cache_stats():
+    # Anket önbelleğinin isabet/ıskalama/çıkarma sayaçları (sadece admin)
+    return xml_utils.POLL_CACHE.stats()
+
+@app.get("/api/stats/coalesce", dependencies=[Depends(admin_only)])
+async def api_coalesce_stats():
+    # Oy birleştiricinin grup/oy sayaçları (sadece admin)
+    return coalesce.coalescer.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def api_metrics():
+    # Prometheus kazıma uç noktası (aşama süreleri, kilit beklemeleri, HTTP, disk)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # ───────── Poll API’leri (Token Korumalı) ─────────
-@app.get("/api/polls", response_model=List[int])
-async def api_poll_ids():
-    # Mevcut anket ID’lerini getir
-    return xml_utils.list_poll_ids()
+# Okuma yanıtları ETag ile döner; istemci/CDN If-None-Match ile yeniden doğrular.
+# HTTP_CACHE_MAX_AGE > 0 ise yanıt o kadar saniye doğrulamasız kullanılabilir.
+CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+CACHE_CONTROL = f"public, max-age={CACHE_MAX_AGE}" if CACHE_MAX_AGE > 0 else "public, no-cache"
+
+def _not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    # ETag başlıklarını yanıta koyar; istemcideki sürüm günceldeyse 304 döner
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    response.headers.update(headers)
+    inm = request.headers.get("if-none-match")
+    if inm and (inm.strip() == "*" or etag in (t.strip().removeprefix("W/") for t in inm.split(","))):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
+
+class PollSummary(BaseModel):
+    # Liste sayfaları için anket özeti (seçenek ayrıntısı olmadan)
+    id: int
+    question: str
+    owner: Optional[str] = None
+    created: float
+    option_count: int
+    total_votes: int
+
+class PollPage(BaseModel):
+    # Sayfalanmış anket özetleri; total tüm anketlerin sayısıdır
+    total: int
+    offset: int
+    limit: int
+    items: List[PollSummary]
+
+@app.get("/api/polls", response_model=Union[List[int], PollPage])
+async def api_poll_ids(
+    request: Request,
+    response: Response,
+    expand: Optional[Literal["summary"]] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    # expand yoksa mevcut anket ID’lerini getir;
+    # expand=summary ise bir sayfa anketin özetini tek yanıtta döndür
+    etag = STORE.list_etag() if expand is None else STORE.list_etag(offset, limit)
+    not_modified = _not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    if expand is None:
+        return STORE.list_poll_ids()
+    total, items = STORE.poll_summaries(offset, limit)
+    return {"total": total, "offset": offset, "limit": limit, "items": items}
 
 @app.get("/api/polls/{poll_id}", response_model=Poll)
-async def api_get_poll(poll_id: int):
-    # Tek bir anketin detayını oku
-    return xml_utils.read_poll(poll_id)
+async def api_get_poll(poll_id: int, request: Request, response: Response):
+    # Tek bir anketin detayını oku (katlanmamış oylar dahil);
+    # ETag eşleşirse dosya okunmadan 304 döner
+    etag = STORE.poll_etag(poll_id)
+    if etag:
+        not_modified = _not_modified(request, response, etag)
+        if not_modified:
+            return not_modified
+    return STORE.read_poll(poll_id)
+
+class OptionPage(BaseModel):
+    # Büyük anketlerde seçeneklerin bir sayfası; total seçenek sayısıdır
+    total: int
+    offset: int
+    limit: int
+    items: List[Option]
+
+@app.get("/api/polls/{poll_id}/options", response_model=OptionPage)
+async def api_poll_options(
+    poll_id: int,
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    # Seçenekleri sayfa sayfa getir (on binlerce seçenekli anketler için);
+    # ETag anketinkiyle aynıdır, anket değişmediyse 304 döner
+    etag = STORE.poll_etag(poll_id)
+    if etag:
+        not_modified = _not_modified(request, response, etag)
+        if not_modified:
+            return not_modified
+    total, items = STORE.read_options(poll_id, offset, limit)
+    return {"total": total, "offset": offset, "limit": limit, "items": items}
+
+@app.get("/api/polls/{poll_id}/stream")
+async def api_poll_stream(poll_id: int):
+    # Canlı sonuçlar (SSE): önce tam anlık görüntü, sonra her tikte değişen
+    # seçeneklerin güncel sayıları. Önce abone olunur ki arada oy kaçmasın.
+    sub = live.broadcaster.subscribe(poll_id)
+    try:
+        poll = STORE.read_poll(poll_id)
+    except HTTPException:
+        live.broadcaster.unsubscribe(sub)
+        raise
+
+    async def events():
+        snapshot = poll
+        try:
+            while True:
+                if snapshot is not None:
+                    yield live.sse("snapshot", snapshot.model_dump())
+                    snapshot = None
+                event = await sub.get(timeout=15)
+                if event is None:
+                    yield ": keepalive\n\n"
+                elif event is live.RESYNC:
+                    try:
+                        snapshot = STORE.read_poll(poll_id)
+                    except HTTPException:
+                        # Anket yayın sürerken silindi: izleyiciye bildirip akışı kapat
+                        yield live.sse("deleted", {"id": poll_id})
+                        return
+                else:
+                    yield event
+        finally:
+            live.broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
 
 class VoteRequest(BaseModel):
     # Oy verme isteği modeli
     option_id: int
 
-@app.post("/api/polls/{poll_id}/vote", response_model=Poll, dependencies=[Depends(logged_user)])
+@app.post("/api/polls/{poll_id}/vote", response_model=Poll)
 async def api_vote(poll_id: int, vote: VoteRequest, user=Depends(get_current_user)):
-    # Anket sahibinin kendi anketine oy vermesini engelle
-    poll = xml_utils.read_poll(poll_id)
-    if poll.owner == user["sub"]:
-        raise HTTPException(status.HTTP_403_FORBIDDEN, "Kendi anketinize oy veremezsiniz")
-    # Daha önce oy verildiyse engelle
-    voters_path = Path(f"{xml_utils._poll_filepath(poll_id)[:-4]}_voters.json")
-    voters = json.loads(voters_path.read_text()) if voters_path.exists() else []
-    if user["sub"] in voters:
-        raise HTTPException(status.HTTP_403_FORBIDDEN, "Bu ankete zaten oy verdiniz")
-    # Seçeneği bul ve oy sayısını artır, sonra kaydet
-    for opt in poll.options:
-        if opt.id == vote.option_id:
-            opt.votes += 1
-            xml_utils.write_poll(poll)
-            voters.append(user["sub"])
-            voters_path.write_text(json.dumps(voters))
-            return poll
-    # Geçersiz seçenek isteği
-    raise HTTPException(status.HTTP_400_BAD_REQUEST, "Seçenek bulunamadı")
-
-@app.post("/api/polls", response_model=Poll, status_code=201, dependencies=[Depends(logged_user)])
-async def api_create_poll(poll: Poll, user=Depends(get_current_user)):
-    # Aynı ID ile yeni anket oluşturmayı engelle
-    if poll.id in xml_utils.list_poll_ids():
+    # Doğrulama ve kayıt STORE.cast_votes içinde tek adımda yapılır (dosya
+    # arka ucunda anketin kilidi, SQLite'ta tek yazma işlemi altında);
+    # birleştirici açıksa aynı ankete gelen oylar tek yazmada toplanır
+    if coalesce.ENABLED:
+        poll = await coalesce.coalescer.submit(poll_id, vote.option_id, user["sub"])
+    else:
+        poll = STORE.cast_vote(poll_id, vote.option_id, user["sub"])
+    # Kabul edilen oy istatistik indeksine işlenir
+    ANALYTICS.votes_cast(poll_id, [user["sub"]])
+    return poll
+
+class PollCreateRequest(BaseModel):
+    # Anket oluşturma isteği; id verilmezse sunucu tarafında ayrılır
+    id: Optional[int] = None
+    question: str
+    options: List[Option]
+
+@app.post("/api/polls", response_model=Poll, status_code=201)
+async def api_create_poll(payload: PollCreateRequest, user=Depends(get_current_user)):
+    # Anket sahibini ayarla ve anketi kaydet
+    poll = Poll(id=payload.id or 0, owner=user["sub"],
+                question=payload.question, options=payload.options)
+    try:
+        STORE.create_poll(poll, allocate_id=payload.id is None)
+    except FileExistsError:
+        # Aynı ID ile yeni anket oluşturmayı engelle
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Bu ID zaten mevcut")
-    # Anket sahibini ayarla ve XML dosyasını oluştur
-    poll.owner = user["sub"]
-    xml_utils.write_poll(poll)
+    ANALYTICS.poll_created(poll)
     return poll
 
 @app.delete("/api/polls/{poll_id}", dependencies=[Depends(admin_only)])
 async def api_delete_poll(poll_id: int):
-    # Anketi ve ilgili voter kaydını sil (sadece admin)
-    path = Path(xml_utils._poll_filepath(poll_id))
-    if path.exists():
-        path.unlink()
-    Path(f"{path.with_suffix('').name}_voters.json").unlink(missing_ok=True)
+    # Anketi ve ilgili voter kaydını sil (sadece admin); oy verenlerin
+    # katılım sayıları istatistiklerden düşülür
+    voter_list = STORE.poll_voters(poll_id)
+    if STORE.delete_poll(poll_id):
+        ANALYTICS.poll_deleted(poll_id, [u for u, _ in voter_list])
     return {"msg": "Anket silindi"}
+
+# ───────── İstatistikler ─────────
+# Artımlı indeksten okunur; maliyet istenen kayıt sayısıyla orantılıdır
+class PollRank(BaseModel):
+    # Sıralamadaki anket; votes, yükselenlerde penceredeki oy sayısıdır
+    id: int
+    owner: Optional[str] = None
+    question: str
+    votes: int
+
+class Participation(BaseModel):
+    # Kullanıcının oy verdiği anket sayısı ve oluşturduğu anketler
+    username: str
+    votes: int
+    polls_created: int
+    last_vote: Optional[float] = None
+
+class AnalyticsSummary(BaseModel):
+    polls: int
+    votes: int
+    voters: int
+    window: int
+    recent_votes: int
+
+@app.get("/api/analytics/summary", response_model=AnalyticsSummary)
+async def api_analytics_summary():
+    # Anket, toplam oy, oy veren kullanıcı sayısı ve son penceredeki oylar
+    return ANALYTICS.summary()
+
+@app.get("/api/analytics/top", response_model=List[PollRank])
+async def api_analytics_top(limit: int = Query(10, ge=1, le=100)):
+    # En çok oy alan anketler
+    return ANALYTICS.top_polls(limit)
+
+@app.get("/api/analytics/trending", response_model=List[PollRank])
+async def api_analytics_trending(limit: int = Query(10, ge=1, le=100)):
+    # Son pencerede (ANALYTICS_WINDOW_S) en çok oy alan anketler
+    return ANALYTICS.trending(limit)
+
+@app.get("/api/analytics/voters", response_model=List[Participation],
+         dependencies=[Depends(admin_only)])
+async def api_analytics_voters(limit: int = Query(10, ge=1, le=100)):
+    # En çok ankete katılan kullanıcılar (sadece admin)
+    return ANALYTICS.top_voters(limit)
+
+@app.get("/api/analytics/users/{username}", response_model=Participation)
+async def api_analytics_user(username: str, user=Depends(get_current_user)):
+    # Kullanıcının katılımı; yalnızca kendisi ya da admin görebilir
+    if user["sub"] != username and user.get("role") != "admin":
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Yetkiniz yok")
+    return ANALYTICS.participation(username)
+
+# ───────── Toplu Aktarım (sadece admin) ─────────
+EXPORT_MEDIA = {"ndjson": "application/x-ndjson", "xml": "application/xml"}
+
+@app.get("/api/export", dependencies=[Depends(admin_only)])
+async def api_export(format: Literal["ndjson", "xml"] = "ndjson"):
+    # Tüm anketler ve oy verenleri tek akış halinde; anketler tek tek okunur
+    return StreamingResponse(bulk.export(format), media_type=EXPORT_MEDIA[format], headers={
+        "Content-Disposition": f'attachment; filename="votesys-export.{format}"'})
+
+@app.post("/api/import", dependencies=[Depends(admin_only)])
+async def api_import(request: Request, format: Optional[Literal["ndjson", "xml"]] = None,
+                     replace: bool = False):
+    # Gövde belleğe alınmadan geçici dosyaya akıtılır, sonra partiler halinde yazılır
+    with tempfile.TemporaryFile() as f:
+        async for chunk in request.stream():
+            f.write(chunk)
+        f.seek(0)
+        try:
+            report = await run_in_threadpool(bulk.import_stream, f, format, replace)
+        except ValueError as e:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e))
+    # İçe aktarılan anketler ve oyları istatistiklere toptan yansıtılır
+    if report["imported"]:
+        await run_in_threadpool(ANALYTICS.rebuild, STORE)
+    return report
@@ -0,0 +1,273 @@
+# votesys/app/metrics.py
+# Prometheus metin biçiminde basit metrik kaydı (harici bağımlılık yok).
+# Sıcak yollarda ölçüm bir perf_counter farkı + kilitli bir sayaç artışıdır;
+# üretimde açık bırakılabilecek kadar ucuzdur.
+
+import bisect
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Saniye cinsinden varsayılan kova sınırları (50µs .. 10sn)
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name, self.help = name, help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._guard = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, *values: str):
+        """Etiket değerlerine ait alt metriği döner (ilk çağrıda oluşturur)."""
+        child = self._children.get(values)
+        if child is None:
+            with self._guard:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """Yeni etiket değerleri için boş alt metrik."""
+
+    @abstractmethod
+    def _render_child(self, values, child):
+        """Alt metriğin metin biçimindeki satırları."""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value", "_guard")
+
+    def __init__(self):
+        self.value = 0.0
+        self._guard = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._guard:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_labels(self.labelnames, values)} {child.value:g}"]
+
+
+class Gauge(Counter):
+    """Anlık değer; callback verilirse değer her okumada ondan alınır."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, help, labelnames)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        if self.callback:
+            for values, value in self.callback().items():
+                self.labels(*values).set(value)
+        return super().render()
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_guard")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._guard = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._guard:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> "_Timer":
+        """with bloğunun süresini gözlemler."""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "started")
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.started)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def time(self, *values: str) -> _Timer:
+        return self.labels(*values).time()
+
+    def _render_child(self, values, child):
+        with child._guard:
+            counts, total, count = list(child.counts), child.sum, child.count
+        lines, cumulative = [], 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            cumulative += n
+            le = 'le="' + ("+Inf" if bound == float("inf") else f"{bound:g}") + '"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {total:.9g}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {count}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render() -> str:
+    """Tüm metrikleri Prometheus metin biçiminde döner."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ————— Uygulama Metrikleri —————
+STAGE = Histogram("votesys_stage_seconds",
+                  "Depolama, oy ve kimlik doğrulama aşamalarının süresi", ["stage"])
+LOCK_WAIT = Histogram("votesys_lock_wait_seconds", "Dosya kilidini alana kadar beklenen süre", ["lock"])
+HTTP_SECONDS = Histogram("votesys_http_request_seconds", "HTTP istek süresi", ["method", "route"])
+HTTP_REQUESTS = Counter("votesys_http_requests_total", "HTTP istek sayısı", ["method", "route", "status"])
+HTTP_IN_FLIGHT = Gauge("votesys_http_in_flight", "Şu an işlenen HTTP istek sayısı")
+
+
+class TimedLock:
+    """Bir kilidi sarar; alma süresini LOCK_WAIT'e yazar. Kilidin yerine geçer."""
+
+    __slots__ = ("lock", "_wait")
+
+    def __init__(self, lock, kind: str):
+        self.lock = lock
+        self._wait = LOCK_WAIT.labels(kind)
+
+    def acquire(self, *args, **kwargs):
+        started = time.perf_counter()
+        result = self.lock.acquire(*args, **kwargs)
+        self._wait.observe(time.perf_counter() - started)
+        return result
+
+    def release(self, *args, **kwargs):
+        return self.lock.release(*args, **kwargs)
+
+    @property
+    def is_locked(self) -> bool:
+        return self.lock.is_locked
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# Veri klasörü boyutu taraması pahalı olabileceği için belirli aralıkla yenilenir
+DATA_DIR_SCAN_INTERVAL = float(os.getenv("METRICS_DATA_DIR_INTERVAL", "30"))
+_dir_cache: Dict[str, Tuple[float, Tuple[int, int]]] = {}
+
+
+def data_dir_usage(path: str) -> Tuple[int, int]:
+    """Klasördeki (dosya sayısı, toplam bayt); sonuç önbelleklidir."""
+    now = time.monotonic()
+    cached = _dir_cache.get(path)
+    if cached and now - cached[0] < DATA_DIR_SCAN_INTERVAL:
+        return cached[1]
+    files = size = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                size += os.stat(os.path.join(root, name)).st_size
+                files += 1
+            except FileNotFoundError:
+                pass
+    _dir_cache[path] = (now, (files, size))
+    return files, size
+
+
+class HTTPMetricsMiddleware:
+    """
+    Saf ASGI ara katmanı: istek süresini, sayısını ve eşzamanlı istek sayısını yazar.
+    Rota etiketi yol şablonudur (/api/polls/{poll_id}); eşleşmeyenler "unmatched".
+    Akış yanıtlarında (SSE) süre gövde bitene kadar ölçülür.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._in_flight = HTTP_IN_FLIGHT.labels()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = [500]
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        self._in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            self._in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_SECONDS.labels(method, path).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, path, str(status[0])).inc()
@@ -0,0 +1,77 @@
+# votesys/app/slots.py
+# Büyük anketler (on binlerce seçenek) için seçenek yuvaları.
+# Önbellekteki her anket sürümü değişmez kabul edilir ve yanında bir
+# OptionSlots tutulur:
+# * index: seçenek ID -> yuva (options listesindeki konum), O(1) arama
+# * frags: yuva başına kodlanmış <option> parçası (ilk yazmada kurulur)
+# * total: toplam oy (ilk gerektiğinde hesaplanır, sonra farklarla güncellenir)
+# Oy yeni bir sürüm üretir: seçenek listesi işaretçi olarak kopyalanır,
+# yalnızca değişen yuvaların Option nesnesi ve XML parçası yenilenir;
+# değişmeyen seçenekler sürümler arasında paylaşılır.
+
+from typing import Dict, List, Optional, Tuple
+
+from .codec import POLL_TAIL, encode_head, encode_option
+from .models import Option, Poll
+
+
+class OptionSlots:
+    """
+    Bir anket sürümünün seçenek yuvaları. Aynı ID'li birden çok seçenek
+    varsa sonuncusu geçerlidir (oy doğrulamasıyla aynı kural).
+    """
+
+    __slots__ = ("index", "frags", "total")
+
+    def __init__(self, index: Dict[int, int], frags: Optional[List[bytes]] = None,
+                 total: Optional[int] = None):
+        self.index = index
+        self.frags = frags
+        self.total = total
+
+    @classmethod
+    def of(cls, poll: Poll) -> "OptionSlots":
+        return cls({o.id: i for i, o in enumerate(poll.options)})
+
+    def encode(self, poll: Poll) -> bytes:
+        """Anketin XML'i; seçenek parçaları yalnızca ilk çağrıda kodlanır."""
+        if self.frags is None:
+            self.frags = [encode_option(o) for o in poll.options]
+        return encode_head(poll) + b"".join(self.frags) + POLL_TAIL
+
+    def total_votes(self, poll: Poll) -> int:
+        if self.total is None:
+            self.total = sum(o.votes for o in poll.options)
+        return self.total
+
+
+def with_votes(poll: Poll, slots: OptionSlots,
+               deltas: Dict[int, int]) -> Tuple[Poll, OptionSlots]:
+    """
+    Seçenek ID -> eklenecek oy farklarını uygulayan yeni sürümü döner; verilen
+    sürüme dokunulmaz. Ankette olmayan seçenekler yok sayılır.
+    Maliyet: liste kopyası + değişen seçenek sayısı kadar nesne.
+    """
+    changed = [(slots.index[o], n) for o, n in deltas.items() if n and o in slots.index]
+    if not changed:
+        return poll, slots
+    options = list(poll.options)
+    frags = list(slots.frags) if slots.frags is not None else None
+    total = slots.total
+    for slot, n in changed:
+        old = options[slot]
+        options[slot] = opt = Option.model_construct(id=old.id, text=old.text, votes=old.votes + n)
+        if frags is not None:
+            frags[slot] = encode_option(opt)
+        if total is not None:
+            total += n
+    return detached(poll, options), OptionSlots(slots.index, frags, total)
+
+
+def detached(poll: Poll, options: Optional[List[Option]] = None) -> Poll:
+    """
+    Aynı seçenek nesnelerini paylaşan yeni bir Poll. Alanları ve seçenek
+    listesi serbestçe değiştirilebilir; seçenek nesneleri yerinde değiştirilmemeli.
+    """
+    return Poll.model_construct(id=poll.id, owner=poll.owner, question=poll.question,
+                                options=list(poll.options) if options is None else options)
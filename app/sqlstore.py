@@ -0,0 +1,379 @@
+# votesys/app/sqlstore.py
+# SQLite depolama (STORAGE_BACKEND=sqlite). Tüm anketler, seçenekler, oy
+# verenler ve kullanıcılar tek veritabanı dosyasındadır; WAL modunda okuyucular
+# yazanı, yazan okuyucuları bekletmez. Her işlem (ve thread) kendi bağlantısını
+# açar; fork sonrası ebeveynin bağlantısı kullanılmaz.
+#
+# Oy: tek yazma işlemi (BEGIN IMMEDIATE) içinde doğrulama, benzersiz
+# (anket, kullanıcı) oy veren satırı ve seçenek sayacının artırılması.
+# Tekrar oy koruması birincil anahtardadır; işçiler arasında kilit dosyası yoktur.
+#
+# Her yazma meta.generation'ı artırır ve anketin version sütununa yazar;
+# ETag'ler bu sayılardan hesaplanır (silinip yeniden oluşturulan anket de
+# yeni sürüm alır). Okunan anketler işlem başına sürüm numarasıyla önbelleğe
+# alınır; oy seçenek yuvalarıyla yeni sürüm üretir, tüm seçenekler yeniden okunmaz.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, status
+
+from . import votes, xml_utils
+from .cache import PollCache
+from .locks import ProcessFileLock
+from .metrics import STAGE
+from .models import Option, Poll
+from .slots import OptionSlots, detached, with_votes
+from .storage import ExportEntry, ImportEntry, Storage
+
+# ————— Ayarlar —————
+# SQLITE_BUSY_TIMEOUT_MS: Yazma kilidi için en fazla bekleme süresi (ms)
+# SQLITE_SYNCHRONOUS: NORMAL (WAL'de işlem başına fsync yok) ya da FULL
+BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SYNCHRONOUS  = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS polls (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    owner       TEXT,
+    question    TEXT NOT NULL,
+    created     REAL NOT NULL,
+    version     INTEGER NOT NULL,
+    total_votes INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS options (
+    poll_id INTEGER NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    pos     INTEGER NOT NULL,
+    id      INTEGER NOT NULL,
+    text    TEXT NOT NULL,
+    votes   INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (poll_id, pos)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS voters (
+    poll_id  INTEGER NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    username TEXT NOT NULL,
+    at       REAL NOT NULL,
+    PRIMARY KEY (poll_id, username)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    record   TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO meta VALUES ('generation', 0);
+"""
+
+
+class SQLiteStorage(Storage):
+    """Storage arayüzünün SQLite uygulaması."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._cache = PollCache(xml_utils.POLL_CACHE.capacity)
+        self.users = SQLiteUsers(self, os.path.join(xml_utils.LOCK_DIR, "users.lock"))
+
+    # ————— Bağlantı & İşlemler —————
+    def _db(self) -> sqlite3.Connection:
+        """Bu thread'in bağlantısı; yoksa (ya da fork sonrası) açılır."""
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT / 1000,
+                                 isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+            db.execute("PRAGMA foreign_keys=ON")
+            db.executescript(SCHEMA)
+            local.db, local.pid = db, os.getpid()
+        return local.db
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Yazma işlemi: kilit baştan alınır, hata olursa geri alınır."""
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        """Birden çok sorgunun aynı anlık görüntüyü görmesi için okuma işlemi."""
+        db = self._db()
+        db.execute("BEGIN")
+        try:
+            yield db
+        finally:
+            db.execute("COMMIT")
+
+    @staticmethod
+    def _bump(db: sqlite3.Connection) -> int:
+        """Genel sürüm sayacını artırır; yeni değeri döner."""
+        return db.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation' "
+                          "RETURNING value").fetchone()[0]
+
+    @staticmethod
+    def _load(db: sqlite3.Connection, poll_id: int) -> Optional[Poll]:
+        rows = db.execute(
+            "SELECT p.owner, p.question, o.id, o.text, o.votes FROM polls p "
+            "LEFT JOIN options o ON o.poll_id = p.id WHERE p.id = ? ORDER BY o.pos",
+            (poll_id,)).fetchall()
+        if not rows:
+            return None
+        return Poll.model_construct(id=poll_id, owner=rows[0][0], question=rows[0][1], options=[
+            Option.model_construct(id=oid, text=text, votes=n)
+            for _, _, oid, text, n in rows if oid is not None])
+
+    def _insert(self, db: sqlite3.Connection, poll: Poll, created: float, version: int) -> None:
+        cur = db.execute(
+            "INSERT INTO polls (id, owner, question, created, version, total_votes) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (poll.id or None, poll.owner, poll.question, created, version,
+             sum(o.votes for o in poll.options)))
+        poll.id = cur.lastrowid
+        db.executemany("INSERT INTO options (poll_id, pos, id, text, votes) VALUES (?, ?, ?, ?, ?)",
+                       [(poll.id, pos, o.id, o.text, o.votes) for pos, o in enumerate(poll.options)])
+
+    # ————— Anketler —————
+    def list_poll_ids(self) -> List[int]:
+        return [r[0] for r in self._db().execute("SELECT id FROM polls ORDER BY id")]
+
+    def poll_exists(self, poll_id: int) -> bool:
+        return self._db().execute("SELECT 1 FROM polls WHERE id = ?", (poll_id,)).fetchone() is not None
+
+    def _snapshot(self, db: sqlite3.Connection, poll_id: int) -> Optional[Tuple[Poll, OptionSlots, int]]:
+        """
+        Anketin güncel sürümü (paylaşılır, değiştirilmemeli), seçenek yuvaları ve
+        sürüm numarası. Sürüm önbellektekiyle aynıysa seçenekler okunmaz.
+        İşlem (_read/_write) içinde çağrılmalı.
+        """
+        row = db.execute("SELECT version FROM polls WHERE id = ?", (poll_id,)).fetchone()
+        if row is None:
+            return None
+        poll = self._cache.get(poll_id, row[0])
+        if poll is None:
+            with STAGE.time("read_io"):
+                poll = self._load(db, poll_id)
+            self._cache.put(poll_id, row[0], poll)
+        slots = self._cache.slots(poll_id, poll)
+        if slots is None:
+            slots = OptionSlots.of(poll)
+            self._cache.set_slots(poll_id, poll, slots)
+        return poll, slots, row[0]
+
+    def read_poll(self, poll_id: int) -> Poll:
+        with self._read() as db:
+            snapshot = self._snapshot(db, poll_id)
+        if snapshot is None:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, "Anket bulunamadı")
+        return detached(snapshot[0])
+
+    def write_poll(self, poll: Poll) -> None:
+        # Dosya arka ucuyla aynı kurallar: XML_VALIDATE=never değilse XSD doğrulaması
+        xml_utils.serialize_poll(poll)
+        with self._write() as db:
+            row = db.execute("SELECT created FROM polls WHERE id = ?", (poll.id,)).fetchone()
+            db.execute("DELETE FROM options WHERE poll_id = ?", (poll.id,))
+            if row:
+                db.execute("UPDATE polls SET owner = ?, question = ?, version = ?, total_votes = ? "
+                           "WHERE id = ?", (poll.owner, poll.question, self._bump(db),
+                                            sum(o.votes for o in poll.options), poll.id))
+                db.executemany("INSERT INTO options (poll_id, pos, id, text, votes) VALUES (?, ?, ?, ?, ?)",
+                               [(poll.id, pos, o.id, o.text, o.votes)
+                                for pos, o in enumerate(poll.options)])
+            else:
+                self._insert(db, poll, time.time(), self._bump(db))
+
+    def create_poll(self, poll: Poll, allocate_id: bool = False) -> Poll:
+        xml_utils.serialize_poll(poll)
+        with self._write() as db:
+            if allocate_id:
+                poll.id = 0
+            elif db.execute("SELECT 1 FROM polls WHERE id = ?", (poll.id,)).fetchone():
+                raise FileExistsError(f"Anket zaten mevcut: {poll.id}")
+            self._insert(db, poll, time.time(), self._bump(db))
+        return poll
+
+    def delete_poll(self, poll_id: int) -> bool:
+        with self._write() as db:
+            # Seçenekler ve oy verenler ON DELETE CASCADE ile silinir
+            deleted = db.execute("DELETE FROM polls WHERE id = ?", (poll_id,)).rowcount > 0
+            if deleted:
+                self._bump(db)
+        return deleted
+
+    def poll_etag(self, poll_id: int) -> Optional[str]:
+        row = self._db().execute("SELECT version FROM polls WHERE id = ?", (poll_id,)).fetchone()
+        return _poll_etag(poll_id, row[0]) if row else None
+
+    def list_etag(self, offset: int = 0, limit: int = 0) -> str:
+        # Toplam oylar da aynı sayaçla sürümlendiği için sayfa ayrıca imzalanmaz
+        row = self._db().execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return votes._etag(["sql", str(row[0])])
+
+    def poll_summaries(self, offset: int, limit: int) -> Tuple[int, List[Dict]]:
+        with self._read() as db:
+            total = db.execute("SELECT count(*) FROM polls").fetchone()[0]
+            rows = db.execute(
+                "SELECT id, owner, question, created, total_votes, "
+                "(SELECT count(*) FROM options o WHERE o.poll_id = p.id) "
+                "FROM polls p ORDER BY id LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+        return total, [{"id": pid, "owner": owner, "question": question, "created": created,
+                        "total_votes": total_votes, "option_count": option_count}
+                       for pid, owner, question, created, total_votes, option_count in rows]
+
+    # ————— Oylar —————
+    def cast_votes(self, poll_id: int, batch: List[Tuple[int, str]]) -> List[Union[Poll, HTTPException]]:
+        with STAGE.time("vote"), self._write() as db:
+            snapshot = self._snapshot(db, poll_id)
+            if snapshot is None:
+                return [HTTPException(status.HTTP_404_NOT_FOUND, "Anket bulunamadı")] * len(batch)
+            poll, slots, before = snapshot
+
+            def has_voted(username: str) -> bool:
+                return db.execute("SELECT 1 FROM voters WHERE poll_id = ? AND username = ?",
+                                  (poll_id, username)).fetchone() is not None
+
+            with STAGE.time("voters"):
+                errors, accepted = votes.tally_votes(poll, batch, has_voted, slots.index)
+            if accepted:
+                now = time.time()
+                # Yuva, seçeneğin pos'udur; aynı ID'li seçenekler varsa dosya
+                # arka ucundaki gibi sonuncusu sayılır
+                version = self._bump(db)
+                db.executemany("INSERT INTO voters (poll_id, username, at) VALUES (?, ?, ?)",
+                               [(poll_id, username, now) for username, _ in accepted])
+                db.executemany("UPDATE options SET votes = votes + 1 WHERE poll_id = ? AND pos = ?",
+                               [(poll_id, slots.index[option_id]) for _, option_id in accepted])
+                db.execute("UPDATE polls SET version = ?, total_votes = total_votes + ? WHERE id = ?",
+                           (version, len(accepted), poll_id))
+        if accepted:
+            # Yeni sürüm yalnızca işlem tamamlandıktan sonra önbelleğe girer
+            poll, slots = with_votes(poll, slots, Counter(o for _, o in accepted))
+            self._cache.put(poll_id, version, poll, slots)
+            # Sürümler işlem içinde okunduğu için imzalar kesindir
+            votes.publish_totals(poll, accepted, slots.index,
+                                 _poll_etag(poll_id, before), _poll_etag(poll_id, version))
+        return [e or poll for e in errors]
+
+    def poll_voters(self, poll_id: int) -> List[Tuple[str, float]]:
+        return self._db().execute("SELECT username, at FROM voters WHERE poll_id = ? "
+                                  "ORDER BY at, username", (poll_id,)).fetchall()
+
+    def live_totals(self, poll_id: int) -> Dict[int, int]:
+        rows = self._db().execute("SELECT id, votes FROM options WHERE poll_id = ? ORDER BY pos",
+                                  (poll_id,)).fetchall()
+        return dict(rows)
+
+    # ————— Toplu Aktarım —————
+    def export_polls(self) -> Iterator[ExportEntry]:
+        """
+        Anketler ID sırasıyla parça parça okunur; her anket ve oy verenleri tek
+        okuma işleminde alınır. XML, XML_VALIDATE=never değilse XSD ile doğrulanır.
+        """
+        last = 0
+        while True:
+            ids = [r[0] for r in self._db().execute(
+                "SELECT id FROM polls WHERE id > ? ORDER BY id LIMIT 256", (last,))]
+            if not ids:
+                return
+            for poll_id in ids:
+                last = poll_id
+                with self._read() as db:
+                    poll = self._load(db, poll_id)
+                    if poll is None:
+                        continue   # dışa aktarma sürerken silindi
+                    created = db.execute("SELECT created FROM polls WHERE id = ?",
+                                         (poll_id,)).fetchone()[0]
+                    voter_list = db.execute("SELECT username, at FROM voters WHERE poll_id = ? "
+                                            "ORDER BY at, username", (poll_id,)).fetchall()
+                yield poll_id, created, xml_utils.serialize_poll(poll), voter_list
+
+    def import_batch(self, batch: List[ImportEntry], replace: bool) -> Tuple[int, int]:
+        """Partinin tamamı tek yazma işlemidir."""
+        imported = skipped = 0
+        with self._write() as db:
+            version = self._bump(db)
+            for poll, _, voter_list, created in batch:
+                if poll.id and db.execute("SELECT 1 FROM polls WHERE id = ?", (poll.id,)).fetchone():
+                    if not replace:
+                        skipped += 1
+                        continue
+                    db.execute("DELETE FROM polls WHERE id = ?", (poll.id,))
+                self._insert(db, poll, created or time.time(), version)
+                db.executemany("INSERT INTO voters (poll_id, username, at) VALUES (?, ?, ?)",
+                               [(poll.id, username, at) for username, at in voter_list])
+                imported += 1
+        return imported, skipped
+
+
+def _poll_etag(poll_id: int, version: int) -> str:
+    return votes._etag([str(poll_id), "sql", str(version)])
+
+
+def _prefix_end(prefix: str) -> Optional[str]:
+    """Önekle başlayan tüm adlardan büyük en küçük dize; önek boşsa None."""
+    while prefix and prefix[-1] == "\U0010ffff":
+        prefix = prefix[:-1]
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else None
+
+
+class SQLiteUsers:
+    """
+    Kullanıcı deposu (users.UserRepo ile aynı yöntemler); kayıtlar users
+    tablosunda JSON olarak durur. locked() oku-kontrol et-yaz adımları için
+    işlemler arası kilittir.
+    """
+
+    def __init__(self, store: SQLiteStorage, lock: str):
+        self._store = store
+        self._lock = ProcessFileLock(lock)
+
+    def locked(self):
+        return self._lock
+
+    def get(self, username: str) -> Optional[Dict]:
+        row = self._store._db().execute("SELECT record FROM users WHERE username = ?",
+                                        (username,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def all(self) -> List[Dict]:
+        return [json.loads(r[0]) for r in
+                self._store._db().execute("SELECT record FROM users ORDER BY username")]
+
+    def page(self, after: Optional[str] = None, limit: int = 100,
+             prefix: str = "") -> List[Dict]:
+        # Birincil anahtar üzerinde aralık taraması; önek [prefix, sonraki önek) aralığıdır
+        sql, args = "SELECT record FROM users WHERE username >= ?", [prefix]
+        if after is not None:
+            sql += " AND username > ?"
+            args.append(after)
+        end = _prefix_end(prefix)
+        if end is not None:
+            sql += " AND username < ?"
+            args.append(end)
+        rows = self._store._db().execute(sql + " ORDER BY username LIMIT ?", (*args, limit))
+        return [json.loads(r[0]) for r in rows]
+
+    def put(self, user: Dict) -> None:
+        self._store._db().execute("INSERT OR REPLACE INTO users VALUES (?, ?)",
+                                  (user["username"], json.dumps(user, ensure_ascii=False)))
+
+    def remove(self, username: str) -> bool:
+        return self._store._db().execute("DELETE FROM users WHERE username = ?",
+                                         (username,)).rowcount > 0
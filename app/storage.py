@@ -0,0 +1,240 @@
+# votesys/app/storage.py
+# Depolama arayüzü ve seçimi. API, oy verme, toplu aktarım ve kullanıcı
+# işlemleri veriye yalnızca STORE üzerinden erişir; iki uygulama vardır:
+# * files (varsayılan): anket başına XML + oy veren/günlük dosyaları
+#   (xml_utils, votes, journal, voters modülleri)
+# * sqlite: tek veritabanı dosyası, WAL modu (sqlstore modülü)
+# Arka uçlar arasında taşıma, XSD ile doğrulanan XML arşivi üzerinden yapılır:
+#   python -m app.bulk migrate --from files --to sqlite
+
+import os
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from fastapi import HTTPException
+
+from . import journal, live, votes, voters, xml_utils
+from .applog import append_records
+from .codec import encode_poll
+from .models import Option, Poll
+from .users import UserRepo
+
+# ————— Ayarlar —————
+# STORAGE_BACKEND: files ya da sqlite
+# SQLITE_PATH: SQLite veritabanı dosyası (varsayılan: veri klasöründe votesys.db)
+BACKEND     = os.getenv("STORAGE_BACKEND", "files")
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(xml_utils.DATA_DIR, "votesys.db"))
+BACKENDS    = ("files", "sqlite")
+
+# Toplu aktarımda bir anket: (anket, XML baytları, oy verenler, oluşturulma)
+ImportEntry = Tuple[Poll, bytes, List[Tuple[str, float]], Optional[float]]
+# Dışa aktarımda bir anket: (id, oluşturulma, XML baytları, oy verenler)
+ExportEntry = Tuple[int, Optional[float], bytes, List[Tuple[str, float]]]
+
+
+class Storage(ABC):
+    """
+    Depolama arayüzü. Anket bulunamazsa read_poll 404 (HTTPException),
+    create_poll aynı ID varsa FileExistsError fırlatır.
+    users: get, all, put, remove, locked yöntemlerini sunan kullanıcı deposu.
+    """
+
+    name = ""
+    users = None
+
+    def load(self) -> None:
+        """Uygulama açılışında çağrılır (dizin/şema hazırlığı)."""
+
+    @abstractmethod
+    def list_poll_ids(self) -> List[int]:
+        ...
+
+    @abstractmethod
+    def poll_exists(self, poll_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    def read_poll(self, poll_id: int) -> Poll:
+        """Seçenek nesneleri önbellekle paylaşılabilir; yerinde değiştirilmemeli."""
+
+    def read_options(self, poll_id: int, offset: int, limit: int) -> Tuple[int, List[Option]]:
+        """Anketin seçeneklerinden bir sayfa: (toplam, sayfadaki seçenekler)."""
+        options = self.read_poll(poll_id).options
+        return len(options), options[offset:offset + limit]
+
+    @abstractmethod
+    def write_poll(self, poll: Poll) -> None:
+        """Anketi olduğu gibi (oy sayıları dahil) kaydeder; yoksa oluşturur."""
+
+    @abstractmethod
+    def create_poll(self, poll: Poll, allocate_id: bool = False) -> Poll:
+        ...
+
+    @abstractmethod
+    def delete_poll(self, poll_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    def poll_etag(self, poll_id: int) -> Optional[str]:
+        """Anketin güncel hali için ETag; anket yoksa None. Anket okunmaz."""
+
+    @abstractmethod
+    def list_etag(self, offset: int = 0, limit: int = 0) -> str:
+        """Anket listesi için ETag; limit verilirse o özet sayfası için."""
+
+    @abstractmethod
+    def poll_summaries(self, offset: int, limit: int) -> Tuple[int, List[Dict]]:
+        ...
+
+    @abstractmethod
+    def cast_votes(self, poll_id: int, batch: List[Tuple[int, str]]) -> List[Union[Poll, HTTPException]]:
+        """votes.cast_votes sözleşmesi: her oy için anket ya da HTTPException."""
+
+    def cast_vote(self, poll_id: int, option_id: int, username: str) -> Poll:
+        result = self.cast_votes(poll_id, [(option_id, username)])[0]
+        if isinstance(result, HTTPException):
+            raise result
+        return result
+
+    @abstractmethod
+    def poll_voters(self, poll_id: int) -> List[Tuple[str, float]]:
+        """Ankete oy verenler: (kullanıcı, zaman); anket yoksa boş liste."""
+
+    def live_totals(self, poll_id: int) -> Dict[int, int]:
+        return {o.id: o.votes for o in self.read_poll(poll_id).options}
+
+    @abstractmethod
+    def export_polls(self) -> Iterator[ExportEntry]:
+        """Tüm anketleri ID sırasıyla, her biri kendi içinde tutarlı olarak üretir."""
+
+    @abstractmethod
+    def import_batch(self, batch: List[ImportEntry], replace: bool) -> Tuple[int, int]:
+        """Doğrulanmış anketleri yazar; (içe_aktarılan, atlanan) döner."""
+
+
+class FileStorage(Storage):
+    """Dosya tabanlı depolama; işi mevcut modüllere devreder."""
+
+    name = "files"
+
+    def __init__(self):
+        data = Path(xml_utils.DATA_DIR)
+        self.users = UserRepo(data / "users.json", data / "users.log", data / "locks" / "users.lock")
+
+    def load(self) -> None:
+        xml_utils.CATALOG.load()
+
+    def list_poll_ids(self) -> List[int]:
+        return xml_utils.list_poll_ids()
+
+    def poll_exists(self, poll_id: int) -> bool:
+        return xml_utils.poll_exists(poll_id)
+
+    def read_poll(self, poll_id: int) -> Poll:
+        return votes.read_poll(poll_id)
+
+    def write_poll(self, poll: Poll) -> None:
+        # Bekleyen günlük önce katlanır, yoksa katlama yeni sayıların üstüne eklenirdi
+        with xml_utils.poll_lock(poll.id):
+            journal.compact(poll.id)
+            xml_utils.write_poll(poll)
+
+    def create_poll(self, poll: Poll, allocate_id: bool = False) -> Poll:
+        return xml_utils.create_poll(poll, allocate_id)
+
+    def delete_poll(self, poll_id: int) -> bool:
+        return xml_utils.delete_poll(poll_id)
+
+    def poll_etag(self, poll_id: int) -> Optional[str]:
+        return votes.poll_etag(poll_id)
+
+    def list_etag(self, offset: int = 0, limit: int = 0) -> str:
+        page = xml_utils.CATALOG.page(offset, limit)[1] if limit else []
+        return votes.list_etag([e["id"] for e in page])
+
+    def poll_summaries(self, offset: int, limit: int) -> Tuple[int, List[Dict]]:
+        return votes.poll_summaries(offset, limit)
+
+    def cast_votes(self, poll_id: int, batch: List[Tuple[int, str]]) -> List[Union[Poll, HTTPException]]:
+        return votes.cast_votes(poll_id, batch)
+
+    def poll_voters(self, poll_id: int) -> List[Tuple[str, float]]:
+        # Bekleyen günlükteki oy verenler de listeye girsin
+        with xml_utils.poll_lock(poll_id):
+            if self._has_journal(poll_id):
+                journal.compact(poll_id)
+            return list(voters.iter_voters(poll_id))
+
+    def export_polls(self) -> Iterator[ExportEntry]:
+        """
+        Her anket kendi kilidi altında okunur; bekleyen günlük önce katlanır ki
+        XML ile oy veren listesi birbiriyle tutarlı olsun. Anket önbelleği
+        doldurulmaz, ayrıştırma yapılmaz.
+        """
+        for poll_id in xml_utils.list_poll_ids():
+            entry = xml_utils.CATALOG.get(poll_id)
+            with xml_utils.poll_lock(poll_id):
+                if self._has_journal(poll_id):
+                    journal.compact(poll_id)
+                try:
+                    with open(xml_utils._poll_filepath(poll_id), "rb") as f:
+                        xml_bytes = f.read()
+                except FileNotFoundError:
+                    continue   # dışa aktarma sürerken silindi
+                voter_list = list(voters.iter_voters(poll_id))
+            yield poll_id, entry and entry.get("created"), xml_bytes, voter_list
+
+    @staticmethod
+    def _has_journal(poll_id: int) -> bool:
+        return any(os.path.exists(p) for p in (xml_utils._journal_filepath(poll_id),
+                                               journal._folded_path(poll_id),
+                                               journal._next_path(poll_id)))
+
+    def import_batch(self, batch: List[ImportEntry], replace: bool) -> Tuple[int, int]:
+        """
+        Partiyi tek dizin kilidi altında yazar; katalog tek eklemeyle güncellenir.
+        ID'siz kayıtlara yeni ID ayrılır.
+        """
+        imported = skipped = 0
+        entries: Dict[int, Dict] = {}
+        with xml_utils.dir_lock():
+            for poll, xml_bytes, voter_list, created in batch:
+                if not poll.id:
+                    poll.id = xml_utils.CATALOG.allocate_id()
+                    xml_bytes = encode_poll(poll)
+                elif poll.id in entries or xml_utils.CATALOG.exists(poll.id):
+                    if not replace:
+                        skipped += 1
+                        continue
+                    xml_utils.delete_poll(poll.id)
+                with xml_utils.poll_lock(poll.id):
+                    # Katalogda olmayan bir anketten kalmış oy veren günlüğü devralınmaz
+                    log = xml_utils._voter_log_filepath(poll.id)
+                    if os.path.exists(log):
+                        os.remove(log)
+                    xml_utils._write_file(poll.id, xml_bytes)
+                    append_records(log, ({"u": u, "t": t} for u, t in voter_list))
+                entries[poll.id] = dict(xml_utils.catalog_entry(poll, voter_count=len({u for u, _ in voter_list})),
+                                        created=created or time.time())
+                imported += 1
+            xml_utils.CATALOG.put_many(entries.values())
+        return imported, skipped
+
+
+def open_storage(name: str, sqlite_path: str = SQLITE_PATH) -> Storage:
+    """Adı verilen arka ucu kurar."""
+    if name == "files":
+        return FileStorage()
+    if name == "sqlite":
+        from .sqlstore import SQLiteStorage
+        return SQLiteStorage(sqlite_path)
+    raise ValueError(f"Bilinmeyen depolama: {name} (seçenekler: {', '.join(BACKENDS)})")
+
+
+STORE = open_storage(BACKEND)
+
+# Birden çok işçi varsa diğer işlemlerin kaydettiği oylar da canlı izleyicilere ulaşsın
+if live.watch_enabled():
+    live.broadcaster.watch(STORE.poll_etag, STORE.live_totals)
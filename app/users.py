@@ -0,0 +1,138 @@
+# votesys/app/users.py
+# Kullanıcı deposunun dosya sürümü (STORAGE_BACKEND=files).
+# SQLite sürümü sqlstore.SQLiteUsers'tır; ikisi de aynı yöntemleri sunar:
+# get, all, page, put, remove, locked.
+
+import bisect
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .applog import LogTail, append_records
+from .locks import ProcessFileLock
+
+
+class UserRepo:
+    """
+    Kullanıcıları bellekte username -> kayıt sözlüğünde tutar.
+    * users.json: anlık görüntü, users.log: sonraki değişikliklerin ekleme günlüğü
+    * Her erişimde yalnızca dosya imzalarına bakılır; değişen kısım yeniden okunur
+    * Yazmalar tek satırlık eklemedir; günlük büyüyünce anlık görüntü
+      geçici dosya + os.replace ile atomik olarak yeniden yazılır
+    * Kullanıcı adları ayrıca sıralı bir listede tutulur (sayfalama ve önek
+      araması için); günlük kayıtları listeyi ikili aramayla günceller
+    """
+
+    def __init__(self, snapshot: Path, log: Path, lock: Path):
+        self.snapshot, self.log_path = snapshot, log
+        self._lock = ProcessFileLock(lock)
+        self._guard = threading.RLock()
+        self._users: Dict[str, Dict] = {}
+        self._names: List[str] = []
+        self._snap_sig = None
+        self._log = LogTail(str(log))
+        self._log_records = 0
+
+    def _refresh(self) -> None:
+        """Dosyalar değiştiyse bellekteki sözlüğü günceller."""
+        try:
+            st = self.snapshot.stat()
+            sig = (st.st_ino, st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            sig = None
+        if sig != self._snap_sig:
+            users = json.loads(self.snapshot.read_text()) if sig else []
+            self._users = {u["username"]: u for u in users}
+            self._names = sorted(self._users)
+            self._snap_sig = sig
+            self._log = LogTail(str(self.log_path))
+            self._log_records = 0
+        reset, records = self._log.read_new()
+        if reset:
+            # Günlük başka bir işlemce sıkıştırıldı; anlık görüntüden yeniden kur
+            self._snap_sig = None
+            return self._refresh()
+        for rec in records:
+            self._apply(rec)
+        self._log_records += len(records)
+
+    def _apply(self, rec: Dict) -> None:
+        if rec["op"] == "put":
+            name = rec["user"]["username"]
+            if name not in self._users:
+                bisect.insort(self._names, name)
+            self._users[name] = rec["user"]
+        elif self._users.pop(rec["username"], None) is not None:
+            del self._names[bisect.bisect_left(self._names, rec["username"])]
+
+    def _append(self, rec: Dict) -> None:
+        """Kaydı günlüğe ekler; günlük sözlükten büyükse sıkıştırır. Kilit altında çağrılır."""
+        self.snapshot.parent.mkdir(exist_ok=True)
+        append_records(str(self.log_path), [rec])
+        self._refresh()
+        if self._log_records >= max(1000, len(self._users)):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Anlık görüntüyü atomik olarak yeniden yazar ve günlüğü siler."""
+        tmp = self.snapshot.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(list(self._users.values()), f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot)
+        self.log_path.unlink(missing_ok=True)
+        self._snap_sig = None
+        self._refresh()
+
+    def locked(self):
+        """Oku-kontrol et-yaz adımları için süreçler arası kilit."""
+        return self._lock
+
+    def get(self, username: str) -> Optional[Dict]:
+        """Kullanıcı kaydının kopyasını döner (O(1))."""
+        with self._guard:
+            self._refresh()
+            user = self._users.get(username)
+            return dict(user) if user else None
+
+    def all(self) -> List[Dict]:
+        """Tüm kullanıcı kayıtlarının kopyaları."""
+        with self._guard:
+            self._refresh()
+            return [dict(u) for u in self._users.values()]
+
+    def page(self, after: Optional[str] = None, limit: int = 100,
+             prefix: str = "") -> List[Dict]:
+        """
+        Kullanıcı adına göre sıralı, adı `after`'dan büyük ve `prefix` ile
+        başlayan en fazla `limit` kaydın kopyaları (O(log n + limit)).
+        """
+        with self._guard:
+            self._refresh()
+            names = self._names
+            start = bisect.bisect_left(names, prefix)
+            if after is not None:
+                start = max(start, bisect.bisect_right(names, after))
+            out = []
+            for name in names[start:start + limit]:
+                if not name.startswith(prefix):
+                    break
+                out.append(dict(self._users[name]))
+            return out
+
+    def put(self, user: Dict) -> None:
+        """Kullanıcıyı ekler ya da günceller."""
+        with self._lock, self._guard:
+            self._append({"op": "put", "user": user})
+
+    def remove(self, username: str) -> bool:
+        """Kullanıcıyı siler; yoksa False döner."""
+        with self._lock, self._guard:
+            self._refresh()
+            if username not in self._users:
+                return False
+            self._append({"op": "del", "username": username})
+            return True
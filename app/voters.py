@@ -0,0 +1,140 @@
+# votesys/app/voters.py
+# Ankete oy verenlerin kaydı: poll_{id}.voters ekleme günlüğü + bellekte küme indeksi.
+# Üyelik kontrolü O(1), yeni oy veren eklemek tek satırlık O(1) yazmadır;
+# eski poll_{id}_voters.json listeleri ilk erişimde bu biçime taşınır.
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Iterator, Set, Tuple
+
+from . import xml_utils
+from .applog import LogTail, append_records
+
+# Bellekte indeksi tutulan en fazla anket sayısı (LRU)
+INDEX_SIZE = int(os.getenv("VOTER_INDEX_SIZE", "128"))
+
+
+class _VoterIndex:
+    """Bir anketin oy veren kümesi; günlüğün yeni satırlarıyla güncellenir."""
+
+    def __init__(self, poll_id: int):
+        self.log = LogTail(xml_utils._voter_log_filepath(poll_id))
+        self.users: Set[str] = set()
+
+    def refresh(self) -> "_VoterIndex":
+        reset, records = self.log.read_new()
+        if reset:
+            self.users = set()
+        self.users.update(r["u"] for r in records)
+        return self
+
+
+_indexes: "OrderedDict[int, _VoterIndex]" = OrderedDict()
+_guard = threading.Lock()
+
+
+def _index(poll_id: int) -> _VoterIndex:
+    """Anketin indeksini (gerekirse taşıma yaparak) getirir ve günceller."""
+    with _guard:
+        idx = _indexes.get(poll_id)
+        if idx is not None:
+            _indexes.move_to_end(poll_id)
+    if idx is None:
+        with xml_utils.poll_lock(poll_id):
+            migrate(poll_id)
+        idx = _VoterIndex(poll_id)
+        with _guard:
+            idx = _indexes.setdefault(poll_id, idx)
+            while len(_indexes) > INDEX_SIZE:
+                _indexes.popitem(last=False)
+    return idx.refresh()
+
+
+def has_voted(poll_id: int, username: str) -> bool:
+    """Kullanıcı bu anket için kayıtlı mı? (O(1))"""
+    return username in _index(poll_id).users
+
+
+def add(poll_id: int, entries: Iterable[Tuple[str, float]]) -> int:
+    """
+    (kullanıcı, zaman) çiftlerini günlüğe ekler; zaten kayıtlı olanları atlar.
+    Tekrar çalıştırılması güvenlidir (sıkıştırma kurtarması bunu kullanır).
+    Eklenen kayıt sayısını döner.
+    """
+    with xml_utils.poll_lock(poll_id):
+        idx = _index(poll_id)
+        new, seen = [], set()
+        for user, at in entries:
+            if user not in idx.users and user not in seen:
+                seen.add(user)
+                new.append({"u": user, "t": at})
+        append_records(xml_utils._voter_log_filepath(poll_id), new)
+        idx.refresh()
+        return len(new)
+
+
+def iter_voters(poll_id: int) -> Iterator[Tuple[str, float]]:
+    """Günlükteki (kullanıcı, zaman) kayıtlarını sırayla verir."""
+    with xml_utils.poll_lock(poll_id):
+        migrate(poll_id)
+    path = xml_utils._voter_log_filepath(poll_id)
+    if os.path.exists(path):
+        yield from _read_all(path)
+
+
+def count(poll_id: int) -> int:
+    """Ankete oy vermiş kullanıcı sayısı."""
+    return len(_index(poll_id).users)
+
+
+def migrate(poll_id: int) -> bool:
+    """
+    Eski poll_{id}_voters.json listesini günlüğe taşır ve JSON dosyasını siler.
+    Oy zamanları bilinmediği için 0 yazılır. Çağıranın poll_lock tutması beklenir.
+    """
+    legacy = xml_utils._voters_filepath(poll_id)
+    if not os.path.exists(legacy):
+        return False
+    with open(legacy, "r") as f:
+        users = json.load(f)
+    path = xml_utils._voter_log_filepath(poll_id)
+    # Yarıda kalmış bir taşımadan kalan kayıtlar tekrar yazılmaz
+    done: Set[str] = set()
+    if os.path.exists(path):
+        done.update(u for u, _ in _read_all(path))
+    append_records(path, ({"u": u, "t": 0} for u in dict.fromkeys(users) if u not in done),
+                   fsync=True)
+    os.remove(legacy)
+    return True
+
+
+def _read_all(path: str) -> Iterator[Tuple[str, float]]:
+    with open(path, "rb") as f:
+        for line in f:
+            if line.endswith(b"\n"):
+                rec = json.loads(line)
+                yield rec["u"], rec.get("t", 0)
+
+
+def migrate_all() -> int:
+    """Veri klasöründeki tüm eski voter listelerini taşır; taşınan anket sayısını döner."""
+    moved = 0
+    for poll_id in xml_utils.list_poll_ids():
+        with xml_utils.poll_lock(poll_id):
+            moved += migrate(poll_id)
+    return moved
+
+
+if __name__ == "__main__":
+    # python -m app.voters migrate
+    if sys.argv[1:] == ["migrate"]:
+        started = time.perf_counter()
+        n = migrate_all()
+        print(f"{n} anket taşındı ({time.perf_counter() - started:.2f} sn)")
+    else:
+        print("Kullanım: python -m app.voters migrate")
+        sys.exit(2)
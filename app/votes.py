@@ -0,0 +1,272 @@
+# votesys/app/votes.py
+# Oy verme iş mantığı: doğrulama (sahip, tekrar oy, seçenek) ve
+# oyun kalıcı hale getirilmesi. İki mod vardır:
+# * Doğrudan (varsayılan): anket XML'i her oyda yeniden yazılır
+# * Günlük (VOTE_JOURNAL=1): oy, poll_{id}.journal'a tek satır eklenir
+# * Paylaşılan sayaçlar (VOTE_COUNTERS=shm): günlük moduna ek olarak anket
+#   sayıları tüm işçilerin eşlediği poll_{id}.counts'ta tutulur; okumalar
+#   günlüğü işlemeden doğrudan sayaçlardan yapılır
+
+import hashlib
+import os
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, status
+
+from . import journal, live, voters, xml_utils
+from .counters import SharedCounters
+from .metrics import STAGE
+from .models import Poll
+from .slots import OptionSlots, detached, with_votes
+
+# Paylaşılan sayaçlar kalıcılık için oy günlüğünü kullanır; XML anlık görüntüsü
+# her oyda değil sıkıştırıcının periyodik katlamalarında güncellenir
+SHARED_COUNTERS = os.getenv("VOTE_COUNTERS", "file") == "shm"
+JOURNAL_MODE = os.getenv("VOTE_JOURNAL", "0") == "1" or SHARED_COUNTERS
+
+COUNTERS = SharedCounters(xml_utils._counts_filepath,
+                          int(os.getenv("VOTE_COUNTERS_POLLS", "1024")))
+
+
+def read_poll(poll_id: int) -> Poll:
+    """
+    Anketin güncel halini (katlanmamış oylar dahil) döner; yoksa 404.
+    Seçenek nesneleri önbellekle paylaşılır, yerinde değiştirilmemeli.
+    """
+    return detached(read_snapshot(poll_id)[0])
+
+
+def read_snapshot(poll_id: int) -> Tuple[Poll, OptionSlots]:
+    """read_poll gibi; paylaşılan sürümü ve seçenek yuvalarını döner (değiştirilmemeli)."""
+    try:
+        if SHARED_COUNTERS:
+            return _read_shared(poll_id)
+        return journal.read_snapshot(poll_id)
+    except FileNotFoundError:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Anket bulunamadı")
+
+
+def _state_tag(poll_id: int) -> bytes:
+    """Sayaçların hangi disk durumuna ait olduğunu gösteren etiket (ETag'in baytları)."""
+    etag = poll_etag(poll_id)
+    if etag is None:
+        raise FileNotFoundError(poll_id)
+    return bytes.fromhex(etag.strip('"'))
+
+
+def _read_shared(poll_id: int) -> Tuple[Poll, OptionSlots]:
+    """
+    Anket yapısı (soru, seçenekler) XML önbelleğinden, oy sayıları paylaşılan
+    sayaçlardan gelir. Sayaçlar yoksa, diskteki durumla uyuşmuyorsa (katlama,
+    anket düzenleme) ya da bir yazma yarıda kaldıysa kilit altında
+    XML + günlükten yeniden kurulur.
+    """
+    totals = COUNTERS.totals(poll_id, _state_tag(poll_id))
+    if totals is None:
+        with xml_utils.poll_lock(poll_id):
+            # Başka bir işlem kilidi beklerken yeniden kurmuş olabilir
+            tag = _state_tag(poll_id)
+            region = COUNTERS.get(poll_id, remap=True)
+            totals = region.snapshot(tag) if region is not None else None
+            if totals is None:
+                poll, slots = journal.read_snapshot(poll_id)
+                COUNTERS.rebuild(poll_id, {o.id: o.votes for o in poll.options}, tag)
+                return poll, slots
+    # Önbellekteki sürüme yalnızca sayaçlarla farkı olan seçenekler uygulanır
+    base, slots = xml_utils.read_snapshot(poll_id)
+    return with_votes(base, slots, {o.id: totals[o.id] - o.votes
+                                    for o in base.options if o.id in totals})
+
+
+def _file_sig(path: str) -> str:
+    st = os.stat(path)
+    return f"{st.st_ino:x}.{st.st_size:x}.{st.st_mtime_ns:x}"
+
+
+def _journal_sigs(poll_id: int) -> List[str]:
+    """Katlanmamış oyları taşıyan dosyaların (günlük, .folded) imzaları."""
+    sigs = []
+    for path in (xml_utils._journal_filepath(poll_id), journal._folded_path(poll_id)):
+        try:
+            sigs.append(_file_sig(path))
+        except FileNotFoundError:
+            sigs.append("-")
+    return sigs
+
+
+def _etag(parts: Iterable[str]) -> str:
+    return '"' + hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest() + '"'
+
+
+def poll_etag(poll_id: int) -> Optional[str]:
+    """
+    Anketin güncel hali için güçlü ETag; yalnızca dosya imzalarından (stat)
+    hesaplanır, dosya okunmaz. Anket yoksa None döner.
+    Okumadan önce hesaplanmalıdır: arada bir yazma olursa etiket eski kalır
+    ve istemci bir sonraki istekte 304 yerine yeni içeriği alır.
+    """
+    try:
+        xml_sig = _file_sig(xml_utils._poll_filepath(poll_id))
+    except FileNotFoundError:
+        return None
+    return _etag([str(poll_id), xml_sig, *_journal_sigs(poll_id)])
+
+
+def list_etag(page_ids: Iterable[int] = ()) -> str:
+    """
+    Anket listesi için ETag: katalog sürümü + (özet sayfasında) sayfadaki
+    anketlerin günlük ve oy veren günlüğü imzaları, çünkü kataloğa yazılmayan
+    oylar toplamlara okurken eklenir.
+    """
+    parts = [xml_utils.CATALOG.generation()]
+    for poll_id in page_ids:
+        parts.extend(_journal_sigs(poll_id))
+        try:
+            parts.append(_file_sig(xml_utils._voter_log_filepath(poll_id)))
+        except FileNotFoundError:
+            parts.append("-")
+    return _etag(parts)
+
+
+def poll_summaries(offset: int, limit: int) -> Tuple[int, List[Dict]]:
+    """
+    Anket listesinin bir sayfasını katalogdan özet olarak döner: (toplam, özetler).
+    Maliyet sayfa boyutuyla orantılıdır. Katalog toplamı yalnızca oluşturma,
+    düzenleme ve katlamada yazılır; sonradan XML'e yazılan oylar oy veren
+    sayısındaki artıştan, katlanmamış oylar günlükten eklenir.
+    """
+    total, page = xml_utils.CATALOG.page(offset, limit)
+    items: List[Dict] = []
+    for entry in page:
+        # Anketin kilidi altında XML, oy verenler, günlük ve katalog birbiriyle tutarlıdır
+        with xml_utils.poll_lock(entry["id"]):
+            entry = xml_utils.CATALOG.get(entry["id"])
+            if entry is None:
+                continue
+            base = entry.pop("voters", None)
+            if base is None:
+                # Taramayla kurulmuş kayıt: oy veren sayısı bilinmiyor, anket okunur
+                poll, slots = read_snapshot(entry["id"])
+                entry["total_votes"] = slots.total_votes(poll)
+            else:
+                entry["total_votes"] += voters.count(entry["id"]) - base \
+                    + journal.pending_votes(entry["id"])
+        items.append(entry)
+    return total, items
+
+
+def has_voted(poll_id: int, username: str) -> bool:
+    """Kullanıcı bu ankete daha önce oy verdi mi?"""
+    return journal.has_voted(poll_id, username) \
+        or voters.has_voted(poll_id, username)
+
+
+def _has_voted_timed(poll_id: int, username: str) -> bool:
+    with STAGE.time("voters"):
+        return has_voted(poll_id, username)
+
+
+def cast_vote(poll_id: int, option_id: int, username: str) -> Poll:
+    """
+    Tek bir oyu doğrular ve kaydeder; güncel anketi döner.
+    Tüm adımlar anketin kilidi altında yapılır.
+    """
+    result = cast_votes(poll_id, [(option_id, username)])[0]
+    if isinstance(result, HTTPException):
+        raise result
+    return result
+
+
+def cast_votes(poll_id: int, batch: List[Tuple[int, str]]) -> List[Union[Poll, HTTPException]]:
+    """
+    (seçenek, kullanıcı) oylarını tek okuma/doğrulama/yazma ile uygular.
+    Her oy için ayrı sonuç döner: kabul edilenler için güncel anket,
+    reddedilenler için HTTPException (fırlatılmaz). Anket yoksa hepsi 404 alır.
+    """
+    with STAGE.time("vote"), xml_utils.poll_lock(poll_id):
+        # Doğrudan modda bekleyen günlük varsa önce katla,
+        # yoksa XML'e birleşik sayılar yazılıp iki kez sayılırdı
+        if not JOURNAL_MODE:
+            journal.compact(poll_id)
+        try:
+            poll, slots = read_snapshot(poll_id)
+        except HTTPException as e:
+            return [e] * len(batch)
+        # İzlenen ankette yazmanın önceki/sonraki imzası yayıncıya verilir
+        watched = live.broadcaster.watching(poll_id)
+        before = poll_etag(poll_id) if watched else None
+        errors, accepted = tally_votes(poll, batch, lambda u: _has_voted_timed(poll_id, u),
+                                       slots.index)
+        # Kabul edilen oyların hepsi tek seferde kaydedilir; yeni sürümde
+        # yalnızca oy alan seçenekler yenidir
+        if accepted:
+            poll, slots = with_votes(poll, slots, Counter(o for _, o in accepted))
+            if SHARED_COUNTERS:
+                # read_poll sayaçları bu kilit altında doğruladı; eşleme günceldir
+                region = COUNTERS.get(poll_id)
+                with region.writing():
+                    journal.append_batch(poll_id, accepted)
+                    for _, option_id in accepted:
+                        region.add(option_id)
+                    region.set_tag(_state_tag(poll_id))
+            elif JOURNAL_MODE:
+                journal.append_batch(poll_id, accepted)
+            else:
+                xml_utils.write_counts(poll, slots)
+                now = time.time()
+                with STAGE.time("voters"):
+                    voters.add(poll_id, [(username, now) for username, _ in accepted])
+            # Canlı izleyicilere değişen seçeneklerin güncel sayıları
+            publish_totals(poll, accepted, slots.index,
+                           before, poll_etag(poll_id) if watched else None)
+        return [e or poll for e in errors]
+
+
+def tally_votes(poll: Poll, batch: List[Tuple[int, str]], has_voted: Callable[[str], bool],
+                index: Optional[Dict[int, int]] = None) -> Tuple[List[Optional[HTTPException]],
+                                                                 List[Tuple[str, int]]]:
+    """
+    Oyları doğrular: (hatalar, kabul edilen (kullanıcı, seçenek)); kabul edilen
+    oyun hatası None'dur. Seçenek index'ten (ID -> yuva) O(1) aranır; anket
+    değiştirilmez. Kurallar tüm depolama türlerinde aynıdır; sayıları
+    uygulamak (with_votes) ve kalıcı hale getirmek çağıranın işidir.
+    """
+    if index is None:
+        index = OptionSlots.of(poll).index
+    errors: List[Optional[HTTPException]] = []
+    accepted: List[Tuple[str, int]] = []
+    seen = set()
+    for option_id, username in batch:
+        # Anket sahibinin kendi anketine oy vermesini engelle
+        if poll.owner == username:
+            errors.append(HTTPException(status.HTTP_403_FORBIDDEN, "Kendi anketinize oy veremezsiniz"))
+        # Daha önce (ya da aynı grupta) oy verildiyse engelle
+        elif username in seen or has_voted(username):
+            errors.append(HTTPException(status.HTTP_403_FORBIDDEN, "Bu ankete zaten oy verdiniz"))
+        # Seçenek ankette yoksa reddet
+        elif option_id not in index:
+            errors.append(HTTPException(status.HTTP_400_BAD_REQUEST, "Seçenek bulunamadı"))
+        else:
+            seen.add(username)
+            accepted.append((username, option_id))
+            errors.append(None)
+    return errors, accepted
+
+
+def publish_totals(poll: Poll, accepted: List[Tuple[str, int]],
+                   index: Optional[Dict[int, int]] = None,
+                   before: Optional[str] = None, after: Optional[str] = None) -> None:
+    """
+    Kabul edilen oyların değiştirdiği seçeneklerin güncel sayılarını yayınlar;
+    before/after yazmanın imzalarıdır (bkz. TallyBroadcaster.publish).
+    """
+    if index is None:
+        index = OptionSlots.of(poll).index
+    live.broadcaster.publish(poll.id, {o: poll.options[index[o]].votes for _, o in accepted},
+                             before, after)
+
+
+def _live_totals(poll_id: int) -> Dict[int, int]:
+    return {o.id: o.votes for o in read_snapshot(poll_id)[0].options}
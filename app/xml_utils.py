@@ -1,28 +1,76 @@
 # votesys/app/xml_utils.py
 
 import os
-from typing import List, Optional
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
 from lxml import etree
-from filelock import FileLock
-from .models import Poll, Option
+from .models import Poll
+from .cache import PollCache
+from .codec import decode_poll, encode_poll
+from .metrics import STAGE, Gauge, TimedLock, data_dir_usage
+from .catalog import PollCatalog
+from .locks import ProcessFileLock
+from .slots import OptionSlots
 
 # ————— Proje ayarları —————
 # SCHEMA_PATH: Anket XML’ini doğrulamak için XSD dosyası
-# DATA_DIR: XML dosyalarının ve oy kayıtlarının saklanacağı klasör
-# LOCK_PATH: Aynı anda birden fazla yazma işlemi olursa çatışmayı önlemek için kilit dosyası
+# DATA_DIR: XML dosyalarının ve oy kayıtlarının saklanacağı klasör (VOTESYS_DATA_DIR ile değiştirilebilir)
+# LOCK_PATH: Dizin düzeyindeki işlemler (anket oluşturma/silme) için kilit dosyası
+# LOCK_DIR: Her ankete ait ayrı kilit dosyalarının tutulduğu klasör
 BASE_DIR    = os.path.dirname(__file__)
 SCHEMA_PATH = os.path.join(BASE_DIR, "poll.xsd")
-DATA_DIR    = os.path.join(BASE_DIR, "data")
+DATA_DIR    = os.getenv("VOTESYS_DATA_DIR", os.path.join(BASE_DIR, "data"))
 LOCK_PATH   = os.path.join(BASE_DIR, "data.lock")
+LOCK_DIR    = os.path.join(DATA_DIR, "locks")
 
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# XSD doğrulamasının ne zaman yapılacağı (XML_VALIDATE):
+# write (varsayılan): yalnızca yazarken, always: okurken de, never: hiç (güvenilir mod)
+XML_VALIDATE = os.getenv("XML_VALIDATE", "write")
+
+# Ayrıştırılmış anketlerin önbelleği (POLL_CACHE_SIZE=0 ile kapatılır)
+POLL_CACHE = PollCache(int(os.getenv("POLL_CACHE_SIZE", "256")))
+
 # XSD şemasını yükle ve XML_SCHEMA ile hazırlık yap
 with open(SCHEMA_PATH, "rb") as f:
     schema_doc = etree.XML(f.read())
 XML_SCHEMA = etree.XMLSchema(schema_doc)
 
 
+# Kilit nesneleri yol başına bir kez üretilir; aynı thread içinde
+# iç içe alınabilmeleri (reentrant) için aynı nesnenin paylaşılması gerekir.
+# ProcessFileLock fork sonrası çocuk işlemde kendi kilidini kurar.
+# Kilitler bekleme süresi ölçülsün diye TimedLock ile sarılır.
+_locks: Dict[str, TimedLock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock(path: str, kind: str) -> TimedLock:
+    """Verilen yol için paylaşılan kilit nesnesini döner."""
+    with _locks_guard:
+        lock = _locks.get(path)
+        if lock is None:
+            lock = _locks[path] = TimedLock(ProcessFileLock(path), kind)
+        return lock
+
+
+def poll_lock(poll_id: int) -> TimedLock:
+    """
+    Tek bir ankete ait kilit.
+    Bir anketteki oy, başka anketlerin okunmasını/yazılmasını bekletmez.
+    """
+    return _lock(os.path.join(LOCK_DIR, f"poll_{poll_id}.lock"), "poll")
+
+
+def dir_lock() -> TimedLock:
+    """
+    Dizin düzeyindeki işlemler (oluşturma, silme) için kilit.
+    Sıralama her zaman önce dir_lock, sonra poll_lock şeklindedir.
+    """
+    return _lock(LOCK_PATH, "dir")
+
+
 def validate_xml(xml_bytes: bytes) -> None:
     """
     XML içeriğini XSD şemasıyla doğrular.
@@ -40,95 +88,288 @@ def _poll_filepath(poll_id: int) -> str:
     return os.path.join(DATA_DIR, f"poll_{poll_id}.xml")
 
 
+def _voters_filepath(poll_id: int) -> str:
+    """
+    Eski biçimdeki oy veren listesinin (JSON dizi) yolu.
+    Yalnızca voters.migrate tarafından okunur.
+    Örn: data/poll_1_voters.json
+    """
+    return os.path.join(DATA_DIR, f"poll_{poll_id}_voters.json")
+
+
+def _voter_log_filepath(poll_id: int) -> str:
+    """
+    Oy verenlerin ekleme günlüğü (her satır bir kullanıcı).
+    Örn: data/poll_1.voters
+    """
+    return os.path.join(DATA_DIR, f"poll_{poll_id}.voters")
+
+
+def _journal_filepath(poll_id: int) -> str:
+    """
+    Oy günlüğü (journal) dosyasının yolu.
+    Örn: data/poll_1.journal
+    """
+    return os.path.join(DATA_DIR, f"poll_{poll_id}.journal")
+
+
+def _counts_filepath(poll_id: int) -> str:
+    """
+    Paylaşılan oy sayaçlarının (VOTE_COUNTERS=shm) dosyası.
+    Örn: data/poll_1.counts
+    """
+    return os.path.join(DATA_DIR, f"poll_{poll_id}.counts")
+
+
 def list_poll_ids() -> List[int]:
+    """Katalogdaki tüm anket ID'lerini sıralı olarak döner (dizin taraması yapmaz)."""
+    return CATALOG.ids()
+
+
+def poll_exists(poll_id: int) -> bool:
+    """Anket var mı? (katalogdan, O(1))"""
+    return CATALOG.exists(poll_id)
+
+
+def catalog_entry(poll: Poll, total_votes: Optional[int] = None,
+                  voter_count: Optional[int] = None) -> Dict:
+    """
+    Anketin katalogda tutulan özeti; toplam oy biliniyorsa yeniden sayılmaz.
+    voters, toplamın sayıldığı andaki oy veren sayısıdır. Oylar kataloğa
+    yazılmaz: her kabul edilen oy bir oy veren eklediği için güncel toplam
+    okurken bu farktan bulunur (bkz. votes.poll_summaries).
+    """
+    entry = {
+        "id":           poll.id,
+        "owner":        poll.owner,
+        "question":     poll.question,
+        "option_count": len(poll.options),
+        "total_votes":  sum(o.votes for o in poll.options) if total_votes is None else total_votes,
+    }
+    if voter_count is not None:
+        entry["voters"] = voter_count
+    return entry
+
+
+def _scan_catalog() -> Iterator[Dict]:
     """
-    data klasöründeki tüm poll_*.xml dosyalarından ID'leri çıkarır
-    ve sıralı bir liste olarak döner.
+    Katalog yeniden kurulurken veri klasöründeki poll_*.xml dosyalarını okur.
+    Kilit alınmaz; o an yazılmakta olan ve ayrıştırılamayan dosya atlanır
+    (yazan işlem kendi katalog kaydını zaten ekleyecektir).
     """
-    ids: List[int] = []
     for fname in os.listdir(DATA_DIR):
-        if fname.startswith("poll_") and fname.endswith(".xml"):
-            try:
-                ids.append(int(fname[5:-4]))
-            except ValueError:
-                pass
-    return sorted(ids)
+        if not (fname.startswith("poll_") and fname.endswith(".xml")):
+            continue
+        try:
+            poll_id = int(fname[5:-4])
+            path = os.path.join(DATA_DIR, fname)
+            with open(path, "rb") as f:
+                xml_bytes = f.read()
+                created = os.fstat(f.fileno()).st_mtime
+            entry = catalog_entry(_parse_poll(poll_id, xml_bytes))
+        except (ValueError, OSError):
+            continue
+        entry["created"] = created
+        yield entry
+
+
+def serialize_poll(poll: Poll) -> bytes:
+    """
+    Poll modelini XML baytlarına çevirir (owner attribute'u dahil).
+    XML_VALIDATE=never değilse sonuç XSD ile doğrulanır.
+    """
+    with STAGE.time("encode"):
+        xml_bytes = encode_poll(poll)
+    if XML_VALIDATE != "never":
+        with STAGE.time("validate"):
+            validate_xml(xml_bytes)
+    return xml_bytes
 
 
 def write_poll(poll: Poll) -> None:
     """
     Poll modelini alır, XML'e çevirir, doğrular ve dosyaya yazar.
-    - owner attribute'u da eklenir
-    - Dosya kilidi ile eşzamanlı yazma çatışmaları önlenir
+    - Anketin kilidi yalnızca yazanları sıraya koyar; dosya atomik olarak
+      değiştirildiği için okuyucular kilit almaz
     """
     os.makedirs(DATA_DIR, exist_ok=True)
+    xml_bytes = serialize_poll(poll)
+
+    # Yalnızca bu anketin kilidini alıp dosyaya yaz,
+    # yazılan hali yeni imzasıyla önbelleğe koy
+    from . import voters
+    with poll_lock(poll.id):
+        sig = _write_file(poll.id, xml_bytes)
+        POLL_CACHE.put(poll.id, sig, poll.model_copy(deep=True))
+        CATALOG.put(catalog_entry(poll, voter_count=voters.count(poll.id)))
+
+
+def write_counts(poll: Poll, slots: OptionSlots) -> None:
+    """
+    Yalnızca oy sayıları değişmiş bir sürümü (slots.with_votes) yazar. XML
+    değişmeyen seçeneklerin önceden kodlanmış parçalarından kurulur; yapı aynı
+    ve sayılar kodlayıcının ürettiği tamsayılar olduğu için XSD doğrulaması
+    yapılmaz. Sürüm kopyalanmadan önbelleğe konur. Katalog güncellenmez
+    (ortak katalog kilidi oy yolunda alınmaz; bkz. catalog_entry).
+    """
+    with STAGE.time("encode"):
+        xml_bytes = slots.encode(poll)
+    with poll_lock(poll.id):
+        sig = _write_file(poll.id, xml_bytes)
+        POLL_CACHE.put(poll.id, sig, poll, slots)
 
-    # Kök <poll> elementi: id ve owner attribute'ları
-    attrs = {"id": str(poll.id)}
-    if poll.owner:
-        attrs["owner"] = poll.owner
-    root = etree.Element("poll", **attrs)
-
-    # <question> elementi: anket sorusu
-    etree.SubElement(root, "question").text = poll.question
-
-    # <options> sarmalayıcısı ve içindeki her <option>
-    opts_wrap = etree.SubElement(root, "options")
-    for opt in poll.options:
-        o = etree.SubElement(opts_wrap, "option", id=str(opt.id))
-        etree.SubElement(o, "text").text  = opt.text
-        etree.SubElement(o, "votes").text = str(opt.votes)
-
-    # XML bayt haline getir ve XSD ile kontrol et
-    xml_bytes = etree.tostring(root, xml_declaration=True, encoding="UTF-8")
-    validate_xml(xml_bytes)
-
-    # Kilit alıp dosyaya yaz
-    with FileLock(LOCK_PATH):
-        with open(_poll_filepath(poll.id), "wb") as f:
+
+def _write_file(poll_id: int, xml_bytes: bytes) -> tuple:
+    """
+    Anketi geçici dosyaya yazıp os.replace ile yerine koyar; yeni imzasını döner.
+    Okuyucular her an eski ya da yeni dosyanın tamamını görür. Geçici dosya
+    yerine konmadan önce diske zorlanır: çökme sonrası yarım anket kalmaz.
+    Çağıranın poll_lock tutması beklenir.
+    """
+    path = _poll_filepath(poll_id)
+    tmp = path + ".tmp"
+    prev = _mtime_ns(path)
+    with STAGE.time("write_io"):
+        with open(tmp, "wb") as f:
             f.write(xml_bytes)
+            f.flush()
+            sig = advance_mtime(f.fileno(), prev)
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    return sig
+
+
+def _signature(st: os.stat_result) -> tuple:
+    """Önbellek geçerliliği için dosya imzası."""
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def advance_mtime(fd: int, prev_ns: Optional[int]) -> tuple:
+    """
+    Yeni yazılan anket dosyasının mtime'ını önceki sürümünkinden kesin büyük
+    yapar ve imzasını döner. Çekirdek zaman damgası kaba (tik) çözünürlüklüdür;
+    aynı tikte aynı boyutta iki yazma aynı imzayı üretirse başka bir işlemin
+    önbelleği eski anketi güncel sanar ve üzerine yazılan oylar kaybolur.
+    Çağıranın poll_lock tutması beklenir.
+    """
+    st = os.fstat(fd)
+    if prev_ns is not None and st.st_mtime_ns <= prev_ns:
+        os.utime(fd, ns=(st.st_atime_ns, prev_ns + 1))
+        st = os.fstat(fd)
+    return _signature(st)
 
 
 def read_poll(poll_id: int) -> Poll:
     """
-    Verilen ID'li XML dosyasını okur, önce XSD ile doğrular,
-    sonra pydantic-xml ile modele dönüştürmeyi dener.
-    Hata olursa manuel parse yapar.
+    Verilen ID'li anketi döner.
+    Dosya imzası önbellektekiyle aynıysa disk/XSD/parse yapılmaz;
+    değilse dosyayı okuyup ayrıştırır ve önbelleğe koyar.
+    Çağıran nesneyi değiştirebileceği için her zaman kopya döner.
     """
+    return _read_shared(poll_id).model_copy(deep=True)
+
+
+def read_snapshot(poll_id: int) -> Tuple[Poll, OptionSlots]:
+    """
+    Önbellekteki güncel sürüm ve seçenek yuvaları (kopyalanmaz, değiştirilmemeli).
+    Yeni sürümler slots.with_votes ile üretilir.
+    """
+    poll = _read_shared(poll_id)
+    slots = POLL_CACHE.slots(poll_id, poll)
+    if slots is None:
+        slots = OptionSlots.of(poll)
+        POLL_CACHE.set_slots(poll_id, poll, slots)
+    return poll, slots
+
+
+def _read_shared(poll_id: int) -> Poll:
+    """read_poll gibi, fakat önbellekteki nesnenin kendisini döner; değiştirilmemelidir."""
     path = _poll_filepath(poll_id)
-    if not os.path.exists(path):
+    try:
+        sig = _signature(os.stat(path))
+    except FileNotFoundError:
+        POLL_CACHE.invalidate(poll_id)
         raise FileNotFoundError(f"Anket bulunamadı: {path}")
 
-    # Kilit alıp dosyayı oku
-    with FileLock(LOCK_PATH):
-        xml_bytes = open(path, "rb").read()
+    poll = POLL_CACHE.get(poll_id, sig)
+    if poll is None:
+        # Kilit gerekmez: dosya yalnızca os.replace ile değişir, açılan
+        # tanımlayıcı tek bir tam sürümü gösterir; imza da aynı tanımlayıcıdan alınır
+        try:
+            with STAGE.time("read_io"), open(path, "rb") as f:
+                xml_bytes = f.read()
+                sig = _signature(os.fstat(f.fileno()))
+        except FileNotFoundError:
+            POLL_CACHE.invalidate(poll_id)
+            raise FileNotFoundError(f"Anket bulunamadı: {path}")
+        with STAGE.time("parse"):
+            poll = _parse_poll(poll_id, xml_bytes)
+        POLL_CACHE.put(poll_id, sig, poll)
+    return poll
 
-    # XSD uyarılarını görüp devam et
-    try:
-        validate_xml(xml_bytes)
-    except Exception as ve:
-        print(f"[xml_utils] XSD uyarı: {ve}")
 
-    # pydantic-xml ile hızlı parse et
-    try:
-        return Poll.from_xml(xml_bytes)
-    except Exception as pe:
-        print(f"[xml_utils] pydantic_xml hata: {pe}, manuel parse...")
-
-    # ————— Manuel parse —————
-    root = etree.fromstring(xml_bytes)
-    owner = root.get("owner")
-    question = root.findtext("question", "").strip()
-
-    # Her <option> için Option objesi oluştur
-    opts: List[Option] = []
-    for oe in root.findall("./options/option"):
-        opts.append(
-            Option(
-                id=int(oe.get("id")),
-                text=oe.findtext("text", "").strip(),
-                votes=int(oe.findtext("votes", "0")),
-            )
-        )
-
-    return Poll(id=poll_id, owner=owner, question=question, options=opts)
+def _parse_poll(poll_id: int, xml_bytes: bytes) -> Poll:
+    """
+    XML içeriğini tek parse ile modele dönüştürür.
+    Dosyalar yazılırken doğrulandığı için XSD kontrolü yalnızca
+    XML_VALIDATE=always ise (aynı ağaç üzerinde) yapılır.
+    """
+    return decode_poll(xml_bytes, poll_id, XML_SCHEMA if XML_VALIDATE == "always" else None)
+
+
+def create_poll(poll: Poll, allocate_id: bool = False) -> Poll:
+    """
+    Yeni anketi yazar; aynı ID'li anket varsa FileExistsError fırlatır.
+    allocate_id verilirse ID katalogdan atomik olarak ayrılır.
+    Varlık kontrolü ile yazma dizin kilidi altında tek adımda yapılır.
+    """
+    with dir_lock():
+        if allocate_id:
+            poll.id = CATALOG.allocate_id()
+        elif CATALOG.exists(poll.id):
+            raise FileExistsError(f"Anket zaten mevcut: {poll.id}")
+        write_poll(poll)
+    return poll
+
+
+def delete_poll(poll_id: int) -> bool:
+    """
+    Anketi, oy veren kullanıcı kaydını ve oy günlüğünü siler.
+    Anket dosyası bulunduysa True döner.
+    """
+    with dir_lock(), poll_lock(poll_id):
+        path = _poll_filepath(poll_id)
+        existed = os.path.exists(path)
+        if existed:
+            os.remove(path)
+        POLL_CACHE.invalidate(poll_id)
+        CATALOG.remove(poll_id)
+        journal = _journal_filepath(poll_id)
+        for extra in (_voters_filepath(poll_id), _voter_log_filepath(poll_id), journal,
+                      journal + ".folded", path + ".next", path + ".tmp",
+                      _counts_filepath(poll_id)):
+            if os.path.exists(extra):
+                os.remove(extra)
+        return existed
+
+
+# Anket kataloğu; dosyaları yoksa ilk erişimde _scan_catalog ile kurulur
+CATALOG = PollCatalog(os.path.join(DATA_DIR, "catalog.json"),
+                      os.path.join(DATA_DIR, "catalog.log"),
+                      os.path.join(LOCK_DIR, "catalog.lock"),
+                      _scan_catalog)
+
+# Veri klasörü boyutu ve önbellek sayaçları /metrics okunurken hesaplanır
+Gauge("votesys_data_dir_bytes", "Veri klasöründeki dosyaların toplam boyutu",
+      callback=lambda: {(): data_dir_usage(DATA_DIR)[1]})
+Gauge("votesys_data_dir_files", "Veri klasöründeki dosya sayısı",
+      callback=lambda: {(): data_dir_usage(DATA_DIR)[0]})
+Gauge("votesys_poll_cache", "Anket önbelleği sayaçları", ["counter"],
+      callback=lambda: {(k,): v for k, v in POLL_CACHE.stats().items()})
@@ -0,0 +1,95 @@
+"""
+İstatistik indeksi ölçümü
+-------------------------
+--polls anket ve rastgele oylarla veri klasörü kurulur, sonra:
+  * kayıt: oy yolunda indeks kaydının maliyeti (tampona ekleme), µs/oy
+  * toplu yazma: tamponun günlüğe yazılıp indekse uygulanması, µs/oy
+  * sorgu: en çok oy alanlar / yükselenler / özet, µs/sorgu
+  * tarama: aynı "en çok oy alanlar" sorusunun tüm anketleri okuyarak cevabı
+  * yeniden kurulum: indeksin depolamadan baştan kurulması
+
+Kullanım:
+    python -m benchmarks.bench_analytics --polls 5000 --votes 50000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+
+def _us(fn, n: int) -> float:
+    started = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - started) / n * 1e6
+
+
+def run(polls: int, vote_count: int, queries: int) -> None:
+    from app import votes, voters
+    from app.analytics import ANALYTICS
+    from app.models import Poll, Option
+    from app.storage import STORE
+
+    votes.JOURNAL_MODE = False
+    rng = random.Random(0)
+    poll_ids = []
+    for i in range(polls):
+        poll = STORE.create_poll(Poll(id=0, owner=f"sahip{i % 50}", question=f"Soru {i}?", options=[
+            Option(id=o, text=f"Seçenek {o}", votes=0) for o in range(1, 5)]), allocate_id=True)
+        ANALYTICS.poll_created(poll)
+        poll_ids.append(poll.id)
+
+    # Oylar doğrudan oy veren günlüklerine yazılır; ölçülen yalnızca indeks kaydıdır
+    per_poll = {}
+    now = time.time()
+    for v in range(vote_count):
+        per_poll.setdefault(rng.choice(poll_ids), []).append((f"u{v}", now - rng.random() * 7200))
+    started = time.perf_counter()
+    for poll_id, entries in per_poll.items():
+        for username, _ in entries:
+            ANALYTICS.votes_cast(poll_id, [username])
+    print(f"kayıt             {(time.perf_counter() - started) / vote_count * 1e6:>9.1f} µs/oy")
+    started = time.perf_counter()
+    ANALYTICS.flush()
+    print(f"toplu yazma       {(time.perf_counter() - started) / vote_count * 1e6:>9.1f} µs/oy")
+    for poll_id, entries in per_poll.items():
+        voters.add(poll_id, entries)
+
+    print(f"sorgu en çok      {_us(lambda: ANALYTICS.top_polls(10), queries):>9.1f} µs")
+    print(f"sorgu yükselen    {_us(lambda: ANALYTICS.trending(10), queries):>9.1f} µs")
+    print(f"sorgu özet        {_us(ANALYTICS.summary, queries):>9.1f} µs")
+
+    started = time.perf_counter()
+    counts = sorted(((sum(1 for _ in voters.iter_voters(pid)), pid) for pid in STORE.list_poll_ids()),
+                    reverse=True)[:10]
+    print(f"tarama en çok     {(time.perf_counter() - started) * 1e3:>9.1f} ms   (ilk: {counts[0][0]} oy)")
+
+    started = time.perf_counter()
+    ANALYTICS.rebuild(STORE)
+    print(f"yeniden kurulum   {(time.perf_counter() - started) * 1e3:>9.1f} ms   "
+          f"(yükselen penceresinde {ANALYTICS.summary()['recent_votes']} oy)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--polls", type=int, default=5000)
+    ap.add_argument("--votes", type=int, default=50000)
+    ap.add_argument("--queries", type=int, default=2000)
+    args = ap.parse_args()
+
+    # Veri klasörü app modülleri yüklenmeden önce ayarlanmalı
+    data_dir = tempfile.mkdtemp(prefix="votesys-analytics-")
+    os.environ["VOTESYS_DATA_DIR"] = data_dir
+    sys.stdout.reconfigure(line_buffering=True)
+    try:
+        run(args.polls, args.votes, args.queries)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
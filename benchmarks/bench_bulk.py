@@ -0,0 +1,90 @@
+"""
+Toplu dışa/içe aktarma ölçümü
+-----------------------------
+N anketlik (oy verenleriyle) sentetik bir NDJSON arşivini içe aktarır, sonra
+NDJSON ve XML olarak dışa aktarır; anket/sn ve tepe bellek kullanımını
+raporlar. Karşılaştırma için anket başına create_poll + oy veren yazma
+yolu (eski tek tek POST /api/polls karşılığı) bir örneklem üzerinde ölçülür.
+
+Kullanım:
+    python -m benchmarks.bench_bulk --polls 100000 --voters 10
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+
+def _archive(polls: int, options: int, voter_count: int) -> bytes:
+    out = io.BytesIO()
+    for i in range(1, polls + 1):
+        rec = {"id": i, "owner": f"sahip{i % 100}", "question": f"Soru {i}?",
+               "options": [{"id": o, "text": f"Seçenek {o}", "votes": 1 if o == 1 else 0}
+                           for o in range(1, options + 1)],
+               "created": 1.7e9 + i,
+               "voters": [[f"k{i}_{v}", 1.7e9 + v] for v in range(voter_count)]}
+        out.write((json.dumps(rec, ensure_ascii=False) + "\n").encode())
+    return out.getvalue()
+
+
+def _peak_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--polls", type=int, default=100_000)
+    ap.add_argument("--options", type=int, default=4)
+    ap.add_argument("--voters", type=int, default=10, help="anket başına oy veren")
+    ap.add_argument("--sample", type=int, default=1000, help="tek tek oluşturma örneklemi")
+    args = ap.parse_args()
+
+    # Veri klasörü app modülleri yüklenmeden önce ayarlanmalı
+    data_dir = tempfile.mkdtemp(prefix="votesys-bulk-")
+    os.environ["VOTESYS_DATA_DIR"] = data_dir
+    sys.stdout.reconfigure(line_buffering=True)
+    from app import bulk, voters, xml_utils
+    from app.models import Poll
+
+    try:
+        archive = _archive(args.polls, args.options, args.voters)
+        print(f"arşiv: {args.polls} anket, {len(archive) / 1e6:.1f} MB")
+
+        started = time.perf_counter()
+        report = bulk.import_stream(io.BytesIO(archive), "ndjson")
+        elapsed = time.perf_counter() - started
+        assert report["imported"] == args.polls, report
+        print(f"  içe aktarma      {elapsed:7.2f} sn  {args.polls / elapsed:8.0f} anket/sn"
+              f"  tepe bellek {_peak_mb():.0f} MB")
+
+        for fmt in bulk.FORMATS:
+            started, size = time.perf_counter(), 0
+            for chunk in bulk.export(fmt):
+                size += len(chunk)
+            elapsed = time.perf_counter() - started
+            print(f"  dışa aktarma {fmt:<6}{elapsed:5.2f} sn  {args.polls / elapsed:8.0f} anket/sn"
+                  f"  {size / 1e6:.1f} MB  tepe bellek {_peak_mb():.0f} MB")
+
+        # Eski yol: anket başına ayrı oluşturma + oy veren ekleme
+        lines = archive.splitlines()[:args.sample]
+        started = time.perf_counter()
+        for line in lines:
+            rec = json.loads(line)
+            rec["id"] += args.polls
+            xml_utils.create_poll(Poll.model_validate(rec))
+            voters.add(rec["id"], [tuple(v) for v in rec["voters"]])
+        per_poll = (time.perf_counter() - started) / len(lines)
+        print(f"  tek tek oluşturma {1 / per_poll:8.0f} anket/sn "
+              f"(HTTP gidiş-dönüşleri hariç; {args.polls} anket ≈ {per_poll * args.polls:.0f} sn)")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
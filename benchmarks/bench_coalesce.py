@@ -0,0 +1,69 @@
+"""
+Sıcak ankette oy birleştirme
+----------------------------
+Tek bir ankete aynı anda gelen oyları iki şekilde uygular:
+her oy kendi oku-değiştir-yaz döngüsüyle (thread havuzunda, anket kilidinde
+sıraya girerek) ya da VoteCoalescer ile gruplanarak. Saniyedeki oy sayısını
+karşılaştırır.
+
+Kullanım (depo kökünden):
+    python -m benchmarks.bench_coalesce --votes 2000 --concurrency 200
+    python -m benchmarks.bench_coalesce --votes 2000 --journal
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+
+async def run(total: int, concurrency: int, coalesced: bool, window_ms: float) -> float:
+    from app import votes, xml_utils
+    from app.coalesce import VoteCoalescer
+    from app.models import Poll, Option
+
+    poll_id = (2 if coalesced else 1) + (10 if votes.JOURNAL_MODE else 0)
+    xml_utils.write_poll(Poll(id=poll_id, question="Sıcak?", options=[
+        Option(id=i, text=f"S{i}", votes=0) for i in range(1, 6)]))
+    coalescer = VoteCoalescer(window_ms=window_ms)
+    loop = asyncio.get_running_loop()
+    sem = asyncio.Semaphore(concurrency)
+
+    async def vote(i):
+        async with sem:
+            if coalesced:
+                await coalescer.submit(poll_id, 1 + i % 5, f"user{i}")
+            else:
+                await loop.run_in_executor(None, votes.cast_vote, poll_id, 1 + i % 5, f"user{i}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(vote(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    assert sum(o.votes for o in votes.read_poll(poll_id).options) == total
+    if coalesced:
+        print(f"  ortalama grup: {coalescer.stats()['avg_batch']:.1f} oy")
+    return total / elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--votes", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=200)
+    ap.add_argument("--window-ms", type=float, default=5.0)
+    ap.add_argument("--journal", action="store_true", help="günlük modunda ölç")
+    args = ap.parse_args()
+
+    # Uygulama modülleri içe aktarılmadan önce geçici veri klasörü seçilir
+    os.environ.setdefault("VOTESYS_DATA_DIR", tempfile.mkdtemp(prefix="votesys-bench-"))
+    os.environ["VOTE_JOURNAL"] = "1" if args.journal else "0"
+    sys.stdout.reconfigure(line_buffering=True)
+
+    for coalesced in (False, True):
+        rate = asyncio.run(run(args.votes, args.concurrency, coalesced, args.window_ms))
+        print(f"{'birleştirilmiş' if coalesced else 'tek tek':>15}: {rate:10.0f} oy/sn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Anket XML kodlayıcı ölçümü
+--------------------------
+Farklı seçenek sayılarında tek bir anketin okunma (XML -> Poll) ve yazılma
+(Poll -> XML) maliyetini eski yol ile yeni codec için karşılaştırır.
+Eski okuma: validate_xml (parse + XSD) + Poll.from_xml, başarısızsa elle parse.
+Eski yazma: lxml ağacı kur + tostring + yeniden parse ederek XSD doğrula.
+
+Kullanım:
+    python -m benchmarks.bench_codec --sizes 2 100 10000
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+
+def _legacy_serialize(poll, schema):
+    from lxml import etree
+    attrs = {"id": str(poll.id)}
+    if poll.owner:
+        attrs["owner"] = poll.owner
+    root = etree.Element("poll", **attrs)
+    etree.SubElement(root, "question").text = poll.question
+    opts_wrap = etree.SubElement(root, "options")
+    for opt in poll.options:
+        o = etree.SubElement(opts_wrap, "option", id=str(opt.id))
+        etree.SubElement(o, "text").text = opt.text
+        etree.SubElement(o, "votes").text = str(opt.votes)
+    xml_bytes = etree.tostring(root, xml_declaration=True, encoding="UTF-8")
+    schema.assertValid(etree.fromstring(xml_bytes))
+    return xml_bytes
+
+
+def _legacy_parse(poll_id, xml_bytes, schema):
+    from lxml import etree
+    from app.models import Poll, Option
+    try:
+        schema.assertValid(etree.fromstring(xml_bytes))
+    except Exception as ve:
+        print(f"[xml_utils] XSD uyarı: {ve}")
+    try:
+        return Poll.from_xml(xml_bytes)
+    except Exception as pe:
+        print(f"[xml_utils] pydantic_xml hata: {pe}, manuel parse...")
+    root = etree.fromstring(xml_bytes)
+    opts = [Option(id=int(oe.get("id")), text=oe.findtext("text", "").strip(),
+                   votes=int(oe.findtext("votes", "0")))
+            for oe in root.findall("./options/option")]
+    return Poll(id=poll_id, owner=root.get("owner"),
+                question=root.findtext("question", "").strip(), options=opts)
+
+
+def _per_op(fn, budget: float = 0.5) -> float:
+    """fn'i en az budget saniye çalıştırıp çağrı başına mikro saniye döner."""
+    n, started = 0, time.perf_counter()
+    while True:
+        fn()
+        n += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= budget:
+            return elapsed / n * 1e6
+
+
+def run(size: int) -> tuple:
+    from app import xml_utils
+    from app.codec import decode_poll, encode_poll
+    from app.models import Poll, Option
+
+    schema = xml_utils.XML_SCHEMA
+    poll = Poll(id=1, owner="ali", question="Hangisi?", options=[
+        Option(id=i, text=f"Seçenek {i}", votes=i) for i in range(1, size + 1)])
+    xml_bytes = encode_poll(poll)
+
+    # Eski yolun uyarı çıktıları ölçümü bozmasın
+    with contextlib.redirect_stdout(io.StringIO()):
+        old_read = _per_op(lambda: _legacy_parse(1, xml_bytes, schema))
+        old_write = _per_op(lambda: _legacy_serialize(poll, schema))
+    new_read = _per_op(lambda: decode_poll(xml_bytes, 1))
+    new_write = _per_op(lambda: xml_utils.validate_xml(encode_poll(poll)))
+    trusted_write = _per_op(lambda: encode_poll(poll))
+    return old_read, new_read, old_write, new_write, trusted_write
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[2, 100, 10000])
+    args = ap.parse_args()
+
+    print(f"{'seçenek':>8} | {'okuma eski':>11} {'yeni':>9} | "
+          f"{'yazma eski':>11} {'yeni':>9} {'güvenilir':>10}   (µs/işlem)")
+    for size in args.sizes:
+        old_read, new_read, old_write, new_write, trusted = run(size)
+        print(f"{size:>8} | {old_read:>11.1f} {new_read:>9.1f} | "
+              f"{old_write:>11.1f} {new_write:>9.1f} {trusted:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
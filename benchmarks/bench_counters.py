@@ -0,0 +1,74 @@
+"""
+Paylaşılan oy sayaçları ölçümü
+------------------------------
+Sıcak bir ankette oy + okuma karışık yükünü doğrudan, günlük ve paylaşılan
+sayaç (VOTE_COUNTERS=shm) modlarında çalıştırıp işlem/sn ile okuma başına
+maliyeti karşılaştırır. Her oydan sonra --reads kadar okuma yapılır
+(api_get_poll'un yaptığı gibi ETag + anket).
+
+Kullanım:
+    python -m benchmarks.bench_counters --options 4 100 --reads 10 --seconds 2
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+def run(mode: str, options: int, reads: int, seconds: float) -> tuple:
+    from app import journal, votes, xml_utils
+    from app.models import Poll, Option
+
+    for name in os.listdir(xml_utils.DATA_DIR):
+        path = os.path.join(xml_utils.DATA_DIR, name)
+        shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+    votes.JOURNAL_MODE = mode != "direct"
+    votes.SHARED_COUNTERS = mode == "shm"
+    poll = xml_utils.create_poll(Poll(id=0, owner="bench", question="Sıcak?", options=[
+        Option(id=o, text=f"Seçenek {o}", votes=0) for o in range(1, options + 1)]),
+        allocate_id=True)
+
+    n = read_time = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        votes.cast_vote(poll.id, 1 + n % options, f"u{n}")
+        t0 = time.perf_counter()
+        for _ in range(reads):
+            votes.poll_etag(poll.id)
+            votes.read_poll(poll.id)
+        read_time += time.perf_counter() - t0
+        n += 1
+        # Sıkıştırıcının periyodik katlamasını taklit et
+        if votes.JOURNAL_MODE and n % 2000 == 0:
+            journal.compact(poll.id)
+    elapsed = time.perf_counter() - started
+    assert sum(o.votes for o in votes.read_poll(poll.id).options) == n
+    return n / elapsed, read_time / max(n * reads, 1) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--options", type=int, nargs="+", default=[4, 100])
+    ap.add_argument("--reads", type=int, default=10, help="oy başına okuma")
+    ap.add_argument("--seconds", type=float, default=2.0)
+    args = ap.parse_args()
+
+    # Veri klasörü app modülleri yüklenmeden önce ayarlanmalı
+    data_dir = tempfile.mkdtemp(prefix="votesys-counters-")
+    os.environ["VOTESYS_DATA_DIR"] = data_dir
+    sys.stdout.reconfigure(line_buffering=True)
+    try:
+        print(f"{'seçenek':>8} {'mod':>8} | {'oy/sn':>8} {'okuma µs':>9}")
+        for options in args.options:
+            for mode in ("direct", "journal", "shm"):
+                rate, read_us = run(mode, options, args.reads, args.seconds)
+                print(f"{options:>8} {mode:>8} | {rate:>8.0f} {read_us:>9.1f}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Kilit paylaşımı (sharding) ölçümü
+---------------------------------
+N işlem aynı anda oku-değiştir-yaz (oy) döngüsü çalıştırır.
+Dokunulan anket sayısı arttıkça toplam işlem/sn artmalıdır;
+--global ile tüm işlemler tek kilide zorlanır (eski davranış).
+
+Kullanım:
+    python -m benchmarks.bench_locks --workers 8 --seconds 3
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+def _use_data_dir(xml_utils, data_dir):
+    # Anketler, kilitler ve katalog geçici klasöre yönlendirilir
+    from app.catalog import PollCatalog
+    xml_utils.DATA_DIR = data_dir
+    xml_utils.LOCK_DIR = os.path.join(data_dir, "locks")
+    xml_utils.CATALOG = PollCatalog(os.path.join(data_dir, "catalog.json"),
+                                    os.path.join(data_dir, "catalog.log"),
+                                    os.path.join(data_dir, "locks", "catalog.lock"),
+                                    xml_utils._scan_catalog)
+
+
+def _worker(data_dir, poll_ids, seconds, use_global, counter):
+    # xml_utils uyarı çıktıları ölçümü bozmasın
+    sys.stdout = open(os.devnull, "w")
+    from app import xml_utils
+    _use_data_dir(xml_utils, data_dir)
+    xml_utils.LOCK_PATH = os.path.join(data_dir, "global.lock")
+
+    done, i = 0, 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pid = poll_ids[i % len(poll_ids)]
+        lock = xml_utils.dir_lock() if use_global else xml_utils.poll_lock(pid)
+        with lock:
+            poll = xml_utils.read_poll(pid)
+            poll.options[0].votes += 1
+            xml_utils.write_poll(poll)
+        done += 1
+        i += 1
+    with counter.get_lock():
+        counter.value += done
+
+
+def run(workers: int, polls: int, seconds: float, use_global: bool) -> float:
+    from app import xml_utils
+    from app.models import Poll, Option
+
+    data_dir = tempfile.mkdtemp(prefix="votesys-bench-")
+    try:
+        _use_data_dir(xml_utils, data_dir)
+        for pid in range(1, polls + 1):
+            xml_utils.write_poll(Poll(id=pid, question="?", options=[
+                Option(id=o, text=f"opt {o}", votes=0) for o in range(1, 11)
+            ]))
+        counter = mp.Value("q", 0)
+        procs = []
+        for w in range(workers):
+            # İşlemler anketlere sırayla dağıtılır
+            ids = [w % polls + 1]
+            p = mp.Process(target=_worker, args=(data_dir, ids, seconds, use_global, counter))
+            p.start()
+            procs.append(p)
+        for p in procs:
+            p.join()
+        return counter.value / seconds
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    ap.add_argument("--seconds", type=float, default=2.0)
+    ap.add_argument("--global", dest="use_global", action="store_true",
+                    help="tek global kilit (karşılaştırma için)")
+    args = ap.parse_args()
+
+    print(f"workers={args.workers} global={args.use_global}")
+    polls = 1
+    while polls <= args.workers:
+        ops = run(args.workers, polls, args.seconds, args.use_global)
+        print(f"  polls={polls:<4} {ops:10.0f} oy/sn")
+        polls *= 2
+
+
+if __name__ == "__main__":
+    main()
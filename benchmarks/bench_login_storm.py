@@ -0,0 +1,95 @@
+"""
+Giriş fırtınası sırasında okuma gecikmesi
+-----------------------------------------
+Uygulama süreç içinde (ASGI) çalıştırılır. Birçok eşzamanlı /login isteği
+bcrypt çalıştırırken ayrı bir istemci /api/polls/{id} okuma gecikmesini ölçer.
+--inline eski davranışı (bcrypt'in event loop'ta çalışması) taklit eder.
+
+Kullanım (depo kökünden):
+    python -m benchmarks.bench_login_storm --logins 32 --seconds 5
+    python -m benchmarks.bench_login_storm --logins 32 --seconds 5 --inline
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] * 1000 if values else 0.0
+
+
+async def run(logins: int, seconds: float, inline: bool) -> None:
+    import httpx
+    from app import auth, main, xml_utils
+    from app.models import Poll, Option
+
+    if inline:
+        async def authenticate_inline(username, password):
+            return auth.authenticate(username, password)
+        main.authenticate_async = authenticate_inline
+
+    pw_hash = auth._hash_pw("parola")
+    for i in range(logins):
+        auth.users_repo.put({"username": f"user{i}", "email": f"user{i}@x",
+                             "password_hash": pw_hash, "role": "user", "email_confirmed": True})
+    xml_utils.write_poll(Poll(id=1, question="Gecikme?", options=[
+        Option(id=i, text=f"S{i}", votes=0) for i in range(1, 6)]))
+
+    transport = httpx.ASGITransport(app=main.app)
+    stop = asyncio.Event()
+    read_lat, login_ok, login_busy = [], 0, 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login_loop(i):
+            nonlocal login_ok, login_busy
+            while not stop.is_set():
+                r = await client.post("/login", data={"username": f"user{i}", "password": "parola"})
+                if r.status_code == 200:
+                    login_ok += 1
+                    # ASGITransport'ta gerçek G/Ç yok; zamanlayıcının çalışabilmesi için
+                    await asyncio.sleep(0)
+                else:
+                    login_busy += 1
+                    await asyncio.sleep(0.05)
+
+        async def read_loop():
+            while not stop.is_set():
+                started = time.perf_counter()
+                r = await client.get("/api/polls/1")
+                read_lat.append(time.perf_counter() - started)
+                assert r.status_code == 200
+                await asyncio.sleep(0.01)
+
+        tasks = [asyncio.create_task(login_loop(i)) for i in range(logins)]
+        tasks.append(asyncio.create_task(read_loop()))
+        await asyncio.sleep(seconds)
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    print(f"mod={'inline' if inline else 'havuz'} logins={logins} workers={auth.AUTH_WORKERS}")
+    print(f"  giriş: {login_ok / seconds:.1f}/sn başarılı, {login_busy} adet 503")
+    print(f"  okuma: n={len(read_lat)} p50={_percentile(read_lat, 50):.1f}ms "
+          f"p95={_percentile(read_lat, 95):.1f}ms p99={_percentile(read_lat, 99):.1f}ms "
+          f"max={max(read_lat, default=0) * 1000:.1f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--logins", type=int, default=32)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--inline", action="store_true")
+    args = ap.parse_args()
+
+    # Uygulama modülleri içe aktarılmadan önce geçici veri klasörü seçilir
+    os.environ.setdefault("VOTESYS_DATA_DIR", tempfile.mkdtemp(prefix="votesys-bench-"))
+    sys.stdout.reconfigure(line_buffering=True)
+    asyncio.run(run(args.logins, args.seconds, args.inline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Açılış süresi ölçümü
+--------------------
+Her denemede yeni bir Python süreci başlatıp iki şeyi ölçer:
+  * import: `import app.main` süresi (süreç içinden, yorumlayıcı açılışı hariç)
+  * ilk istek: uvicorn sürecinin başlatılmasından ilk başarılı
+    GET /api/polls yanıtına kadar geçen süre
+
+Durumlar:
+  * ilk: boş veri klasörü (admin oluşturulur, bcrypt hash'i hesaplanır)
+  * sıcak: admin daha önce eşitlenmiş (admin.sync parmak izi geçerli)
+  * izsiz: admin var ama admin.sync yok (parmak izi öncesi davranış:
+    her açılışta bcrypt doğrulaması)
+
+Kullanım:
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def _prepare(data_dir: str, state: str) -> None:
+    if state == "ilk":
+        shutil.rmtree(data_dir, ignore_errors=True)
+        os.makedirs(data_dir)
+    elif state == "izsiz":
+        try:
+            os.remove(os.path.join(data_dir, "admin.sync"))
+        except FileNotFoundError:
+            pass
+
+
+def time_import(env: dict) -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_first_request(env: dict) -> float:
+    import httpx
+
+    port = _free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--log-level", "warning"], env=env)
+    try:
+        deadline = started + 60
+        while time.perf_counter() < deadline:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/api/polls").status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.005)
+        raise RuntimeError("uvicorn başlatılamadı")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--states", nargs="+", default=["ilk", "sıcak", "izsiz"])
+    args = ap.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="votesys-startup-")
+    env = dict(os.environ, VOTESYS_DATA_DIR=data_dir)
+    sys.stdout.reconfigure(line_buffering=True)
+    try:
+        # Sıcak/izsiz durumlar için admin bir kez eşitlenir
+        time_import(env)
+        print(f"{'durum':>6} | {'import ms':>10} {'ilk istek ms':>13}  (medyan, {args.runs} deneme)")
+        for state in args.states:
+            imports, firsts = [], []
+            for _ in range(args.runs):
+                _prepare(data_dir, state)
+                imports.append(time_import(env))
+                _prepare(data_dir, state)
+                firsts.append(time_first_request(env))
+            print(f"{state:>6} | {statistics.median(imports) * 1e3:>10.0f} "
+                  f"{statistics.median(firsts) * 1e3:>13.0f}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
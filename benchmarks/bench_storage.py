@@ -0,0 +1,114 @@
+"""
+Depolama arka uçları ölçümü
+---------------------------
+Aynı iş yükünü dosya (files) ve SQLite arka uçlarında çalıştırır:
+  * oluşturma: --polls anket, anket/sn
+  * oy: N işlem rastgele anketlere oy verir (her 4 denemeden biri tüm
+    işlemlerin paylaştığı kullanıcılardan), deneme/sn; sonunda toplam oy ==
+    kabul edilen oy doğrulanır
+  * okuma: rastgele anketlerde ETag + anket okuma, µs/okuma
+
+Kullanım:
+    python -m benchmarks.bench_storage --polls 2000 --workers 1 4 --seconds 3
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+SHARED_USERS = 50
+
+
+def _open(backend: str):
+    from app.storage import open_storage
+    return open_storage(backend, os.path.join(os.environ["VOTESYS_DATA_DIR"], "bench.db"))
+
+
+def _worker(backend, worker, poll_ids, seconds, results):
+    from fastapi import HTTPException
+
+    store = _open(backend)
+    rng = random.Random(worker)
+    attempts = accepted = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        user = f"ortak{rng.randrange(SHARED_USERS)}" if attempts % 4 == 0 else f"w{worker}_{attempts}"
+        try:
+            store.cast_vote(rng.choice(poll_ids), rng.randint(1, 4), user)
+            accepted += 1
+        except HTTPException:
+            pass
+        attempts += 1
+    results.put((attempts, accepted))
+
+
+def run(backend: str, polls: int, workers_list, seconds: float, reads: int) -> None:
+    from app import votes, xml_utils
+    from app.models import Poll, Option
+
+    for name in os.listdir(xml_utils.DATA_DIR):
+        path = os.path.join(xml_utils.DATA_DIR, name)
+        shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+    votes.JOURNAL_MODE = False
+    store = _open(backend)
+
+    started = time.perf_counter()
+    poll_ids = [store.create_poll(Poll(id=0, owner="bench", question=f"Soru {i}?", options=[
+        Option(id=o, text=f"Seçenek {o}", votes=0) for o in range(1, 5)]), allocate_id=True).id
+        for i in range(polls)]
+    print(f"{backend:>7} oluşturma   {polls / (time.perf_counter() - started):>9.0f} anket/sn")
+
+    ctx = mp.get_context("fork")
+    total_accepted = 0
+    for workers in workers_list:
+        results = ctx.Queue()
+        procs = [ctx.Process(target=_worker, args=(backend, w + 100 * workers, poll_ids, seconds, results))
+                 for w in range(workers)]
+        for p in procs:
+            p.start()
+        counts = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        total_accepted += sum(c for _, c in counts)
+        rate = sum(a for a, _ in counts) / seconds
+        print(f"{backend:>7} oy işçi={workers:<3} {rate:>7.0f} deneme/sn")
+
+    rng = random.Random(0)
+    started = time.perf_counter()
+    for _ in range(reads):
+        poll_id = rng.choice(poll_ids)
+        store.poll_etag(poll_id)
+        store.read_poll(poll_id)
+    read_us = (time.perf_counter() - started) / reads * 1e6
+    recorded = sum(o.votes for pid in poll_ids for o in store.read_poll(pid).options)
+    status = "tutarlı" if recorded == total_accepted else f"HATA: kabul={total_accepted} kayıtlı={recorded}"
+    print(f"{backend:>7} okuma       {read_us:>9.1f} µs/okuma   {status}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backends", nargs="+", default=["files", "sqlite"])
+    ap.add_argument("--polls", type=int, default=2000)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--reads", type=int, default=20000)
+    args = ap.parse_args()
+
+    # Veri klasörü app modülleri yüklenmeden önce ayarlanmalı
+    data_dir = tempfile.mkdtemp(prefix="votesys-storage-")
+    os.environ["VOTESYS_DATA_DIR"] = data_dir
+    sys.stdout.reconfigure(line_buffering=True)
+    try:
+        for backend in args.backends:
+            run(backend, args.polls, args.workers, args.seconds, args.reads)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Kullanıcı deposu ölçümü
+-----------------------
+Kullanıcı sayısı arttıkça giriş (arama) ve kayıt (ekleme) maliyetini,
+eski "users.json'u oku + doğrusal ara + tamamını yaz" yolu ile karşılaştırır.
+Yönetici listesi için 100'lük imleçli sayfa ile tüm kullanıcıları tek seferde
+döndürmenin maliyeti de ölçülür.
+bcrypt bu ölçüme dahil değildir; yalnızca depo maliyeti ölçülür.
+
+Kullanım:
+    python -m benchmarks.bench_users --sizes 1000 10000 100000
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+
+def _user(name: str) -> dict:
+    return {"username": name, "email": f"{name}@example.com", "password_hash": "x" * 60,
+            "role": "user", "email_confirmed": True}
+
+
+def run(size: int, ops: int) -> dict:
+    from app.users import UserRepo
+
+    with tempfile.TemporaryDirectory(prefix="votesys-bench-") as d:
+        d = Path(d)
+        seed = [_user(f"user{i}") for i in range(size)]
+
+        legacy = d / "legacy.json"
+        legacy.write_text(json.dumps(seed, indent=2))
+        started = time.perf_counter()
+        for i in range(ops):
+            users = json.loads(legacy.read_text())
+            next(u for u in users if u["username"] == f"user{size - 1 - i}")
+        legacy_login = (time.perf_counter() - started) / ops * 1e6
+        started = time.perf_counter()
+        for i in range(ops):
+            users = json.loads(legacy.read_text())
+            assert not any(u["username"] == f"new{i}" for u in users)
+            users.append(_user(f"new{i}"))
+            legacy.write_text(json.dumps(users, indent=2))
+        legacy_register = (time.perf_counter() - started) / ops * 1e6
+
+        (d / "users.json").write_text(json.dumps(seed))
+        repo = UserRepo(d / "users.json", d / "users.log", d / "users.lock")
+        repo.get("ısınma")
+        started = time.perf_counter()
+        for i in range(ops):
+            repo.get(f"user{size - 1 - i}")
+        repo_login = (time.perf_counter() - started) / ops * 1e6
+        started = time.perf_counter()
+        for i in range(ops):
+            with repo.locked():
+                assert repo.get(f"new{i}") is None
+                repo.put(_user(f"new{i}"))
+        repo_register = (time.perf_counter() - started) / ops * 1e6
+
+        started = time.perf_counter()
+        for i in range(ops):
+            repo.page(f"user{i * 7919 % size}", 100)
+        repo_page = (time.perf_counter() - started) / ops * 1e6
+        started = time.perf_counter()
+        for _ in range(max(1, ops // 10)):
+            repo.all()
+        repo_all = (time.perf_counter() - started) / max(1, ops // 10) * 1e6
+        return {"legacy_login": legacy_login, "legacy_register": legacy_register,
+                "repo_login": repo_login, "repo_register": repo_register,
+                "repo_page": repo_page, "repo_all": repo_all}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--ops", type=int, default=50)
+    args = ap.parse_args()
+
+    print(f"{'kullanıcı':>10} {'json giriş':>12} {'json kayıt':>12} {'depo giriş':>12} {'depo kayıt':>12}"
+          f" {'sayfa':>10} {'tam liste':>12}  (µs)")
+    for size in args.sizes:
+        r = run(size, args.ops)
+        print(f"{size:>10} {r['legacy_login']:>12.0f} {r['legacy_register']:>12.0f} "
+              f"{r['repo_login']:>12.0f} {r['repo_register']:>12.0f} "
+              f"{r['repo_page']:>10.0f} {r['repo_all']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
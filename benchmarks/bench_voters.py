@@ -0,0 +1,91 @@
+"""
+Oy veren kaydı ölçümü
+---------------------
+Farklı oy veren sayılarında tek bir oyun "daha önce oy verdi mi? + ekle"
+maliyetini, eski JSON listesi ile yeni günlük + küme indeksi için karşılaştırır.
+Yeni yolda maliyet oy veren sayısından bağımsız kalmalıdır.
+
+Kullanım:
+    python -m benchmarks.bench_voters --sizes 1000 10000 100000 200000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+
+def _legacy_vote(path: str, user: str) -> None:
+    # Eski api_vote davranışı: listeyi oku, doğrusal ara, tamamını yaz
+    voters = json.loads(open(path).read()) if os.path.exists(path) else []
+    if user in voters:
+        raise RuntimeError("tekrar oy")
+    voters.append(user)
+    with open(path, "w") as f:
+        f.write(json.dumps(voters))
+
+
+def _use_data_dir(xml_utils, voters, data_dir):
+    # Anketler, kilitler ve katalog geçici klasöre yönlendirilir; önceki
+    # çalıştırmanın (silinmiş klasördeki) oy veren indeksleri bırakılır
+    from app.catalog import PollCatalog
+    xml_utils.DATA_DIR = data_dir
+    xml_utils.LOCK_DIR = os.path.join(data_dir, "locks")
+    xml_utils.CATALOG = PollCatalog(os.path.join(data_dir, "catalog.json"),
+                                    os.path.join(data_dir, "catalog.log"),
+                                    os.path.join(data_dir, "locks", "catalog.lock"),
+                                    xml_utils._scan_catalog)
+    with voters._guard:
+        voters._indexes.clear()
+
+
+def run(size: int, votes: int) -> tuple:
+    from app import voters, xml_utils
+    from app.applog import append_records
+
+    data_dir = tempfile.mkdtemp(prefix="votesys-bench-")
+    try:
+        _use_data_dir(xml_utils, voters, data_dir)
+        seed = [f"user{i}" for i in range(size)]
+
+        legacy = xml_utils._voters_filepath(1)
+        with open(legacy, "w") as f:
+            json.dump(seed, f)
+        started = time.perf_counter()
+        for i in range(votes):
+            _legacy_vote(legacy, f"new{i}")
+        legacy_us = (time.perf_counter() - started) / votes * 1e6
+        os.remove(legacy)
+
+        append_records(xml_utils._voter_log_filepath(1), ({"u": u, "t": 0} for u in seed))
+        # İndeksi bir kez yükle; ölçülen indeks gerçekten tohum kayıtları içermeli
+        if voters.count(1) != size or not voters.has_voted(1, seed[-1]):
+            raise RuntimeError("oy veren indeksi tohum kayıtlarını görmüyor")
+        started = time.perf_counter()
+        for i in range(votes):
+            user = f"new{i}"
+            if voters.has_voted(1, user):
+                raise RuntimeError("tekrar oy")
+            voters.add(1, [(user, time.time())])
+        indexed_us = (time.perf_counter() - started) / votes * 1e6
+        return legacy_us, indexed_us
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 200000])
+    ap.add_argument("--votes", type=int, default=200)
+    args = ap.parse_args()
+
+    print(f"{'oy veren':>10} {'json µs/oy':>12} {'günlük µs/oy':>14}")
+    for size in args.sizes:
+        legacy_us, indexed_us = run(size, args.votes)
+        print(f"{size:>10} {legacy_us:>12.0f} {indexed_us:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
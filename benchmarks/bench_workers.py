@@ -0,0 +1,122 @@
+"""
+Çok işçili oy stres testi
+-------------------------
+N işlem aynı veri klasörüne votes.cast_vote ile oy yağdırır; her işlem kendi
+kullanıcılarının yanında tüm işlemlerin paylaştığı kullanıcılarla da oy dener
+(tekrar oy). Süre sonunda şunlar doğrulanır:
+  * kabul edilen oy sayısı == anketlerdeki toplam oy (kayıp yok)
+  * oy veren günlüğünde her kullanıcı anket başına bir kez (tekrar yok)
+İşçi sayısı arttıkça toplam oy/sn artmalıdır (anket kilitleri bağımsızdır).
+HTTP katmanıyla birlikte ölçmek için:
+    python -m benchmarks.loadtest run --server uvicorn --workers 4 --scenario spread_vote
+
+Kullanım:
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --polls 64 --seconds 3
+    python -m benchmarks.bench_workers --journal
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+SHARED_USERS = 50
+
+
+def _worker(worker, poll_ids, seconds, results):
+    from fastapi import HTTPException
+    from app import votes
+
+    rng = random.Random(worker)
+    attempts = accepted = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        poll_id = rng.choice(poll_ids)
+        # Her 4 denemeden biri bütün işlemlerin paylaştığı kullanıcılardan
+        if attempts % 4 == 0:
+            user = f"ortak{rng.randrange(SHARED_USERS)}"
+        else:
+            user = f"w{worker}_{attempts}"
+        try:
+            votes.cast_vote(poll_id, rng.randint(1, 4), user)
+            accepted += 1
+        except HTTPException:
+            pass
+        attempts += 1
+    results.put((attempts, accepted))
+
+
+def _verify(poll_ids, accepted: int) -> str:
+    from app import journal, votes, voters
+
+    total = 0
+    for poll_id in poll_ids:
+        journal.compact(poll_id)
+        total += sum(o.votes for o in votes.read_poll(poll_id).options)
+        users = [u for u, _ in voters.iter_voters(poll_id)]
+        if len(users) != len(set(users)):
+            return f"HATA: anket {poll_id} için tekrar eden oy veren"
+    if total != accepted:
+        return f"HATA: kabul={accepted} kayıtlı={total}"
+    return "tutarlı"
+
+
+def run(workers: int, polls: int, seconds: float) -> tuple:
+    from app import xml_utils
+    from app.models import Poll, Option
+
+    for name in os.listdir(xml_utils.DATA_DIR):
+        path = os.path.join(xml_utils.DATA_DIR, name)
+        shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+    poll_ids = []
+    for i in range(polls):
+        poll = xml_utils.create_poll(Poll(id=0, owner="bench", question=f"Soru {i}?", options=[
+            Option(id=o, text=f"Seçenek {o}", votes=0) for o in range(1, 5)]), allocate_id=True)
+        poll_ids.append(poll.id)
+
+    ctx = mp.get_context("fork")
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(w, poll_ids, seconds, results))
+             for w in range(workers)]
+    for p in procs:
+        p.start()
+    counts = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    attempts = sum(a for a, _ in counts)
+    accepted = sum(c for _, c in counts)
+    return attempts / seconds, _verify(poll_ids, accepted)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--polls", type=int, default=64)
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--journal", action="store_true", help="VOTE_JOURNAL=1 ile çalıştır")
+    args = ap.parse_args()
+
+    # Veri klasörü app modülleri yüklenmeden önce ayarlanmalı
+    data_dir = tempfile.mkdtemp(prefix="votesys-workers-")
+    os.environ["VOTESYS_DATA_DIR"] = data_dir
+    sys.stdout.reconfigure(line_buffering=True)
+    from app import votes
+    votes.JOURNAL_MODE = args.journal
+
+    try:
+        base = None
+        print(f"mod: {'günlük' if args.journal else 'doğrudan'}, {args.polls} anket")
+        for workers in args.workers:
+            rate, status = run(workers, args.polls, args.seconds)
+            base = base or rate
+            print(f"  işçi={workers:<3} {rate:>9.0f} deneme/sn  x{rate / base:.2f}  {status}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
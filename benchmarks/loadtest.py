@@ -0,0 +1,302 @@
+"""
+HTTP API yük ve gecikme ölçümü
+------------------------------
+Veri klasörünü istenen ölçekte sentetik olarak doldurur (anket, seçenek,
+oy veren, kullanıcı), ardından senaryoları uygulamaya karşı kapalı döngüde
+çalıştırır ve uç nokta başına işlem hızı ile p50/p95/p99 gecikmeyi raporlar.
+Sonuçlar JSON olarak kaydedilir; iki sonuç dosyası karşılaştırılabilir.
+
+Hedefler:
+    --server inproc   uygulama bu süreçte (ASGI) çalışır (varsayılan)
+    --server uvicorn  yerel bir uvicorn başlatılır (--workers ile)
+    --url URL         zaten çalışan bir sunucu (veri klasörü önceden doldurulmuş olmalı)
+
+Senaryolar: browse, hot_vote, spread_vote, login, create, mixed (ya da all)
+
+Kullanım (depo kökünden):
+    python -m benchmarks.loadtest run --scenario all --polls 1000 --seconds 10 --out sonuc.json
+    python -m benchmarks.loadtest run --server uvicorn --workers 4 --scenario mixed
+    python -m benchmarks.loadtest compare eski.json yeni.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+# Senaryo = (ağırlık, işlem) listesi
+SCENARIOS: Dict[str, List[Tuple[int, str]]] = {
+    "browse":      [(90, "poll"), (10, "list")],
+    "hot_vote":    [(100, "vote_hot")],
+    "spread_vote": [(100, "vote_spread")],
+    "login":       [(100, "login")],
+    "create":      [(100, "create")],
+    "mixed":       [(70, "poll"), (10, "list"), (10, "vote_spread"),
+                    (5, "vote_hot"), (3, "login"), (2, "create")],
+}
+PASSWORD = "parola"
+
+
+def _percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] * 1000 if values else 0.0
+
+
+# ————— Veri Hazırlama —————
+def seed(polls: int, options: int, voters: int, users: int, rng: random.Random) -> None:
+    """VOTESYS_DATA_DIR'i sentetik anket, oy veren ve kullanıcılarla doldurur."""
+    from app import auth, voters as voter_log, xml_utils
+    from app.models import Poll, Option
+
+    started = time.perf_counter()
+    for pid in range(1, polls + 1):
+        counts = [rng.randint(0, voters) for _ in range(options)]
+        xml_utils.write_poll(Poll(id=pid, owner=f"user{pid % max(users, 1)}",
+                                  question=f"Anket {pid}?", options=[
+            Option(id=o, text=f"Seçenek {o}", votes=c) for o, c in enumerate(counts, 1)]))
+        if voters:
+            voter_log.add(pid, ((f"seed{pid}-{v}", 0.0) for v in range(voters)))
+    # Tüm kullanıcılar aynı hash'i paylaşır; bcrypt bir kez çalışır
+    pw_hash = auth._hash_pw(PASSWORD)
+    for i in range(users):
+        auth.users_repo.put({"username": f"user{i}", "email": f"user{i}@example.com",
+                             "password_hash": pw_hash, "role": "user", "email_confirmed": True})
+    print(f"veri hazır: {polls} anket × {options} seçenek, anket başına {voters} oy veren, "
+          f"{users} kullanıcı ({time.perf_counter() - started:.1f} sn)")
+
+
+# ————— Yük Üretimi —————
+class Runner:
+    """Bir senaryoyu concurrency kadar eşzamanlı istemciyle seconds boyunca çalıştırır."""
+
+    def __init__(self, client, polls: int, users: int, rng: random.Random):
+        from app.auth import create_access_token
+        self.client, self.polls, self.users, self.rng = client, polls, users, rng
+        self._token = create_access_token
+        self._voter_ids = itertools.count()
+        self._run_tag = f"{os.getpid()}-{int(time.time())}"
+        self.latency: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    def _auth(self, username: str) -> Dict[str, str]:
+        return {"Authorization": "Bearer " + self._token({"sub": username, "role": "user"})}
+
+    def _voter(self) -> str:
+        # Her oy benzersiz kullanıcıdan gelir, yoksa 403 ölçümü bozar
+        return f"lt-{self._run_tag}-{next(self._voter_ids)}"
+
+    async def _op(self, op: str):
+        c, rng = self.client, self.rng
+        if op == "poll":
+            return "GET /api/polls/{id}", c.get(f"/api/polls/{rng.randint(1, self.polls)}")
+        if op == "list":
+            offset = rng.randrange(0, max(self.polls, 1), 100)
+            return "GET /api/polls?expand=summary", c.get(
+                "/api/polls", params={"expand": "summary", "offset": offset, "limit": 100})
+        if op in ("vote_hot", "vote_spread"):
+            pid = 1 if op == "vote_hot" else rng.randint(1, self.polls)
+            return f"POST /api/polls/{{id}}/vote ({op[5:]})", c.post(
+                f"/api/polls/{pid}/vote", json={"option_id": 1}, headers=self._auth(self._voter()))
+        if op == "login":
+            return "POST /login", c.post("/login", data={
+                "username": f"user{rng.randrange(max(self.users, 1))}", "password": PASSWORD})
+        if op == "create":
+            return "POST /api/polls", c.post("/api/polls", headers=self._auth("creator"), json={
+                "question": "Yük testi?",
+                "options": [{"id": o, "text": f"S{o}", "votes": 0} for o in range(1, 5)]})
+        raise ValueError(op)
+
+    async def run(self, mix: List[Tuple[int, str]], concurrency: int, seconds: float) -> float:
+        ops, weights = [op for _, op in mix], [w for w, _ in mix]
+        deadline = time.perf_counter() + seconds
+
+        async def client_loop():
+            while time.perf_counter() < deadline:
+                label, request = await self._op(self.rng.choices(ops, weights)[0])
+                started = time.perf_counter()
+                try:
+                    status = str((await request).status_code)
+                except Exception as e:
+                    status = type(e).__name__
+                self.latency.setdefault(label, []).append(time.perf_counter() - started)
+                counts = self.statuses.setdefault(label, {})
+                counts[status] = counts.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> Dict[str, Dict]:
+        out = {}
+        for label, lat in sorted(self.latency.items()):
+            ok = sum(n for s, n in self.statuses[label].items() if s.startswith("2") or s == "304")
+            out[label] = {
+                "count":  len(lat),
+                "rps":    len(lat) / elapsed,
+                "ok":     ok,
+                "p50_ms": _percentile(lat, 50),
+                "p95_ms": _percentile(lat, 95),
+                "p99_ms": _percentile(lat, 99),
+                "max_ms": max(lat) * 1000,
+                "status": self.statuses[label],
+            }
+        return out
+
+
+def _print_report(name: str, endpoints: Dict[str, Dict]) -> None:
+    print(f"\n[{name}]")
+    print(f"  {'uç nokta':<40} {'istek/sn':>9} {'p50':>8} {'p95':>8} {'p99':>8}  durum")
+    for label, r in endpoints.items():
+        print(f"  {label:<40} {r['rps']:>9.1f} {r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms "
+              f"{r['p99_ms']:>7.1f}ms  {r['status']}")
+
+
+# ————— Sunucu —————
+def _start_uvicorn(port: int, workers: int) -> subprocess.Popen:
+    """Aynı ortam değişkenleriyle (veri klasörü, JWT anahtarı) yerel uvicorn başlatır."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"], env=os.environ.copy())
+    import httpx
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/polls").status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("uvicorn başlatılamadı")
+
+
+async def _run_scenarios(args, names: List[str], base_url: str) -> Dict[str, Dict]:
+    import httpx
+    rng = random.Random(args.seed)
+    results = {}
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url, timeout=60,
+                                   limits=httpx.Limits(max_connections=args.concurrency))
+        lifespan = None
+    else:
+        from app import main
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app),
+                                   base_url="http://loadtest", timeout=60)
+        lifespan = main.lifespan(main.app)
+        await lifespan.__aenter__()
+    try:
+        async with client:
+            for name in names:
+                runner = Runner(client, args.polls, args.users, rng)
+                elapsed = await runner.run(SCENARIOS[name], args.concurrency, args.seconds)
+                results[name] = {"seconds": elapsed, "endpoints": runner.report(elapsed)}
+                _print_report(name, results[name]["endpoints"])
+    finally:
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+    return results
+
+
+def cmd_run(args) -> None:
+    names = list(SCENARIOS) if args.scenario == "all" else args.scenario.split(",")
+    for name in names:
+        if name not in SCENARIOS:
+            sys.exit(f"bilinmeyen senaryo: {name}")
+
+    # Uygulama modülleri içe aktarılmadan önce veri klasörü seçilir
+    if not args.url:
+        os.environ["VOTESYS_DATA_DIR"] = args.data_dir or tempfile.mkdtemp(prefix="votesys-load-")
+    sys.stdout.reconfigure(line_buffering=True)
+    if not args.no_seed and not args.url:
+        seed(args.polls, args.options, args.voters, args.users, random.Random(args.seed))
+
+    proc = None
+    base_url = args.url
+    if args.server == "uvicorn" and not args.url:
+        proc = _start_uvicorn(args.port, args.workers)
+        base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        results = asyncio.run(_run_scenarios(args, names, base_url))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    if args.out:
+        try:
+            commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                    text=True).stdout.strip()
+        except OSError:
+            commit = ""
+        meta = {"commit": commit, "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(), "cpus": os.cpu_count(),
+                "target": base_url or "inproc",
+                "config": {k: v for k, v in vars(args).items() if k != "func"},
+                "env": {k: v for k, v in os.environ.items()
+                        if k.startswith(("VOTE_", "JOURNAL_", "POLL_", "XML_", "AUTH_", "LIVE_"))}}
+        with open(args.out, "w") as f:
+            json.dump({"meta": meta, "scenarios": results}, f, indent=2, ensure_ascii=False)
+        print(f"\nsonuçlar: {args.out}")
+
+
+def cmd_compare(args) -> None:
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"eski: {old['meta']['commit']} ({old['meta']['time']})  "
+          f"yeni: {new['meta']['commit']} ({new['meta']['time']})")
+    for name, scenario in new["scenarios"].items():
+        print(f"\n[{name}]")
+        before = old["scenarios"].get(name, {}).get("endpoints", {})
+        for label, r in scenario["endpoints"].items():
+            o = before.get(label)
+            if not o:
+                print(f"  {label:<40} (eskide yok)")
+                continue
+            print(f"  {label:<40} istek/sn {o['rps']:>8.1f} -> {r['rps']:>8.1f} "
+                  f"({(r['rps'] / o['rps'] - 1) * 100 if o['rps'] else 0:+.0f}%)   "
+                  f"p95 {o['p95_ms']:>7.1f} -> {r['p95_ms']:>7.1f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="senaryoları çalıştır")
+    run.add_argument("--scenario", default="all", help="virgülle ayrılmış liste ya da all")
+    run.add_argument("--seconds", type=float, default=10.0)
+    run.add_argument("--concurrency", type=int, default=32)
+    run.add_argument("--polls", type=int, default=1000)
+    run.add_argument("--options", type=int, default=5)
+    run.add_argument("--voters", type=int, default=100, help="anket başına hazır oy veren")
+    run.add_argument("--users", type=int, default=1000)
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--server", choices=["inproc", "uvicorn"], default="inproc")
+    run.add_argument("--workers", type=int, default=1, help="uvicorn işçi sayısı")
+    run.add_argument("--port", type=int, default=8799)
+    run.add_argument("--url", help="zaten çalışan sunucu adresi")
+    run.add_argument("--data-dir", help="veri klasörü (varsayılan: geçici klasör)")
+    run.add_argument("--no-seed", action="store_true", help="mevcut veriyi kullan")
+    run.add_argument("--out", help="JSON sonuç dosyası")
+    run.set_defaults(func=cmd_run)
+
+    cmp_ = sub.add_parser("compare", help="iki sonuç dosyasını karşılaştır")
+    cmp_.add_argument("old")
+    cmp_.add_argument("new")
+    cmp_.set_defaults(func=cmd_compare)
+
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -34,6 +34,17 @@ async function fetchAuth(url, opts = {}) {
   return fetch(url, opts);
 }
 
+// Anket özetlerini sayfa sayfa getirir (anket başına ayrı istek atmadan)
+async function fetchPollSummaries(fetchFn = fetch, pageSize = 500) {
+  const polls = [];
+  for (let offset = 0; ; offset += pageSize) {
+    const page = await fetchFn(`/api/polls?expand=summary&offset=${offset}&limit=${pageSize}`)
+      .then(r => r.json());
+    polls.push(...page.items);
+    if (offset + pageSize >= page.total) return polls;
+  }
+}
+
 // client-side koruma ♟
 function requireAuth(needAdmin = false) {
   const { token, role } = session();
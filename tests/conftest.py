@@ -0,0 +1,66 @@
+# votesys/tests/conftest.py
+# Ortak test düzeni: veri klasörü depodaki app/data değil, geçici bir klasördür.
+# Uygulama modülleri yollarını (katalog, analiz dizini, kullanıcı deposu, iptal
+# listesi) içe aktarılırken belirler; bu yüzden klasör, app içe aktarılmadan
+# önce VOTESYS_DATA_DIR ile seçilir ve her test boş bir klasörle başlar.
+# make_poll ve seed_poll testlerin ortak örnek anketini kurar.
+
+import atexit
+import os
+import shutil
+import tempfile
+
+DATA_ROOT = tempfile.mkdtemp(prefix="votesys-test-")
+os.environ["VOTESYS_DATA_DIR"] = DATA_ROOT
+atexit.register(shutil.rmtree, DATA_ROOT, True)
+
+import pytest  # noqa: E402
+
+from app import votes, voters, xml_utils  # noqa: E402
+from app.models import Option, Poll  # noqa: E402
+
+
+def _empty(path: str) -> None:
+    for name in os.listdir(path):
+        full = os.path.join(path, name)
+        if os.path.isdir(full):
+            shutil.rmtree(full)
+        else:
+            os.remove(full)
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path):
+    """
+    Boş veri klasörü; önbellekler temiz, günlük kipi kapalı. Ayrı bir
+    MonkeyPatch kullanılır ki testteki monkeypatch.undo() bu ayarları geri almasın.
+    """
+    assert xml_utils.DATA_DIR == DATA_ROOT
+    _empty(DATA_ROOT)
+    xml_utils.POLL_CACHE.clear()
+    with voters._guard:
+        voters._indexes.clear()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(xml_utils, "LOCK_PATH", str(tmp_path / "data.lock"))
+        mp.setattr(votes, "JOURNAL_MODE", False)
+        yield DATA_ROOT
+    _empty(DATA_ROOT)
+
+
+def make_poll(poll_id: int = 0, votes: int = 0, owner: str = "owner") -> Poll:
+    """İki seçenekli örnek anket; votes ilk seçeneğin oy sayısıdır."""
+    return Poll(id=poll_id, owner=owner, question=f"Soru {poll_id}?", options=[
+        Option(id=1, text="A", votes=votes), Option(id=2, text="B", votes=0)])
+
+
+
+@pytest.fixture
+def seed_poll(request, data_dir):
+    """
+    1 numaralı anketi diske yazar. İlk seçeneğin oy sayısı dolaylı
+    parametreyle verilebilir:
+        pytestmark = pytest.mark.parametrize("seed_poll", [3], indirect=True)
+    """
+    poll = make_poll(1, votes=getattr(request, "param", 0))
+    xml_utils.write_poll(poll)
+    return poll
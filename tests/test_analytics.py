@@ -0,0 +1,159 @@
+# votesys/tests/test_analytics.py
+# İstatistik indeksi: yazma yollarından artımlı güncelleme, zaman penceresi,
+# işçiler arası görünürlük ve depolamadan yeniden kurulumla tutarlılık.
+
+import os
+import threading
+import time
+from fastapi.testclient import TestClient
+
+from app import analytics, auth, main, voters
+from app.analytics import AnalyticsIndex, Leaderboard
+from app.models import Poll, Option
+from app.storage import FileStorage
+
+
+def _hdr(username: str, role: str = "user") -> dict:
+    return {"Authorization": "Bearer " + auth.create_access_token({"sub": username, "role": role})}
+
+
+def _create(client, owner: str, question: str) -> int:
+    r = client.post("/api/polls", headers=_hdr(owner), json={"question": question, "options": [
+        {"id": 1, "text": "A", "votes": 0}, {"id": 2, "text": "B", "votes": 0}]})
+    assert r.status_code == 201
+    return r.json()["id"]
+
+
+def _vote(client, poll_id: int, username: str) -> None:
+    assert client.post(f"/api/polls/{poll_id}/vote", headers=_hdr(username),
+                       json={"option_id": 1}).status_code == 200
+
+
+def test_leaderboard_orders_and_drops_zero_scores():
+    board = Leaderboard([("b", 2), ("a", 2), ("c", 0)])
+    board.add("c", 3)
+    assert board.top(10) == [("c", 3), ("a", 2), ("b", 2)]
+    board.add("c", -3)
+    assert board.discard("a") == 2
+    assert board.top(10) == [("b", 2)] and len(board) == 1
+
+
+def test_api_updates_index_incrementally():
+    client = TestClient(main.app)
+    first = _create(client, "ali", "Birinci?")
+    second = _create(client, "ali", "İkinci?")
+    for user in ("u1", "u2", "u3"):
+        _vote(client, second, user)
+    _vote(client, first, "u1")
+    # Reddedilen oy sayılmaz
+    assert client.post(f"/api/polls/{first}/vote", headers=_hdr("u1"),
+                       json={"option_id": 1}).status_code == 403
+
+    top = client.get("/api/analytics/top?limit=1").json()
+    assert top == [{"id": second, "owner": "ali", "question": "İkinci?", "votes": 3}]
+    assert [p["id"] for p in client.get("/api/analytics/trending").json()] == [second, first]
+    assert client.get("/api/analytics/summary").json() == \
+        {"polls": 2, "votes": 4, "voters": 3, "window": analytics.WINDOW, "recent_votes": 4}
+
+    me = client.get("/api/analytics/users/u1", headers=_hdr("u1")).json()
+    assert (me["votes"], me["polls_created"]) == (2, 0)
+    assert client.get("/api/analytics/users/u1", headers=_hdr("u2")).status_code == 403
+    assert client.get("/api/analytics/users/ali", headers=_hdr("admin", "admin")).json()["polls_created"] == 2
+    assert client.get("/api/analytics/voters", headers=_hdr("u1")).status_code == 403
+    voters_top = client.get("/api/analytics/voters?limit=1", headers=_hdr("admin", "admin")).json()
+    assert voters_top[0]["username"] == "u1"
+
+    # Silinen anket sıralamalardan ve oy verenlerinin katılımından düşer
+    assert client.delete(f"/api/polls/{second}", headers=_hdr("admin", "admin")).status_code == 200
+    assert client.get("/api/analytics/summary").json()["votes"] == 1
+    assert client.get("/api/analytics/users/u1", headers=_hdr("u1")).json()["votes"] == 1
+    assert client.get("/api/analytics/users/ali", headers=_hdr("ali")).json()["polls_created"] == 1
+
+
+def test_other_workers_see_records_and_compaction(tmp_path):
+    paths = (str(tmp_path / "a.json"), str(tmp_path / "a.log"), str(tmp_path / "a.lock"))
+    mine, other = AnalyticsIndex(*paths), AnalyticsIndex(*paths)
+    mine.poll_created(Poll(id=1, owner="ali", question="S?", options=[Option(id=1, text="A", votes=0)]))
+    for i in range(1200):
+        mine.votes_cast(1, [f"u{i}"])
+    assert mine.flush() == 1200
+    # Günlük sıkıştırıldı; diğer işlem anlık görüntü + günlükten aynı sonucu görür
+    assert os.path.exists(paths[0])
+    assert other.summary() == mine.summary()
+    assert other.summary()["votes"] == 1200
+    # Diğer işlemin oyu tamponundan yazılınca görünür
+    other.votes_cast(1, ["son"])
+    assert mine.top_polls(1)[0]["votes"] == 1200
+    other.flush()
+    assert mine.top_polls(1)[0]["votes"] == 1201
+
+
+def test_vote_path_skips_file_lock_and_timer_flushes(tmp_path, monkeypatch):
+    paths = (str(tmp_path / "a.json"), str(tmp_path / "a.log"), str(tmp_path / "a.lock"))
+    index, other = AnalyticsIndex(*paths, flush_ms=50), AnalyticsIndex(*paths)
+    index.poll_created(Poll(id=1, owner="ali", question="S?", options=[Option(id=1, text="A", votes=0)]))
+    lock, holders = index._lock, []
+
+    class Spy:
+        def __enter__(self):
+            holders.append(threading.current_thread())
+            return lock.__enter__()
+
+        def __exit__(self, *exc):
+            return lock.__exit__(*exc)
+
+    monkeypatch.setattr(index, "_lock", Spy())
+    for i in range(100):
+        index.votes_cast(1, [f"u{i}"])
+    # Oy veren thread dosya kilidini hiç almadı; yazmayı zamanlayıcı yaptı
+    assert threading.current_thread() not in holders
+    deadline = time.time() + 5
+    while other.summary()["votes"] < 100 and time.time() < deadline:
+        time.sleep(0.02)
+    assert other.summary()["votes"] == 100
+
+
+def test_reader_between_snapshot_and_log_removal_does_not_double_count(tmp_path, monkeypatch):
+    paths = (str(tmp_path / "a.json"), str(tmp_path / "a.log"), str(tmp_path / "a.lock"))
+    writer = AnalyticsIndex(*paths)
+    writer.poll_created(Poll(id=1, owner="ali", question="S?", options=[Option(id=1, text="A", votes=0)]))
+    for i in range(5):
+        writer.votes_cast(1, [f"u{i}"])
+    writer.flush()
+    # Görüntü yerine kondu ama eski günlük henüz silinmedi: o anda okuyan işlem
+    monkeypatch.setattr(os, "remove", lambda path: None)
+    with writer._lock:
+        writer._write_snapshot()
+    assert os.path.exists(paths[1])
+    assert AnalyticsIndex(*paths).summary()["votes"] == 5
+    monkeypatch.undo()
+    writer.votes_cast(1, ["u5"])
+    writer.flush()
+    assert AnalyticsIndex(*paths).summary()["votes"] == 6
+
+
+def _state():
+    index = analytics.ANALYTICS
+    # Son oy zamanı depolamadaki kayıttan gelir, API'ninkinden mikrosaniyeler farklıdır
+    return (index.summary(), index.top_polls(5),
+            [dict(v, last_vote=None) for v in index.top_voters(5)])
+
+
+def test_rebuild_matches_incremental_and_expires_window():
+    client = TestClient(main.app)
+    poll_id = _create(client, "ali", "Yeni?")
+    _vote(client, poll_id, "u1")
+    _vote(client, poll_id, "u2")
+    before = _state()
+    assert analytics.ANALYTICS.rebuild(FileStorage()) == 1
+    assert _state() == before
+
+    # Pencereden eski oylar toplamda sayılır ama yükselenlere girmez
+    store = FileStorage()
+    store.create_poll(Poll(id=50, owner="veli", question="Eski?", options=[
+        Option(id=1, text="A", votes=3)]))
+    voters.add(50, [(f"eski{i}", time.time() - 2 * analytics.WINDOW) for i in range(3)])
+    analytics.ANALYTICS.rebuild(store)
+    assert analytics.ANALYTICS.top_polls(1)[0]["id"] == 50
+    assert [p["id"] for p in analytics.ANALYTICS.trending(5)] == [poll_id]
+    assert analytics.ANALYTICS.summary()["recent_votes"] == 2
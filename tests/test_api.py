@@ -1,25 +1,13 @@
 # votesys/tests/test_api.py
 
-import os
-import shutil
-import pytest
 from fastapi.testclient import TestClient
 
+from app import votes, xml_utils
 from app.main import app
-from app.xml_utils import DATA_DIR
+from app.models import Poll, Option
 
 client = TestClient(app)
 
-@pytest.fixture(autouse=True)
-def clear_data_dir():
-    # Her testten önce data klasörünü temizle
-    if os.path.exists(DATA_DIR):
-        shutil.rmtree(DATA_DIR)
-    os.makedirs(DATA_DIR)
-    yield
-    # (opsiyonel) Sonra tekrar temizle:
-    shutil.rmtree(DATA_DIR)
-
 def test_get_empty_polls():
     res = client.get("/api/polls")
     assert res.status_code == 200
@@ -77,3 +65,49 @@ def test_invalid_option_vote():
     # Geçersiz option_id
     res = client.post("/api/polls/2/vote", json={"option_id": 999})
     assert res.status_code == 400
+
+def test_poll_summaries_paginated():
+    for i in range(1, 6):
+        xml_utils.write_poll(Poll(id=i, owner="ali", question=f"Soru {i}?", options=[
+            Option(id=1, text="A", votes=i), Option(id=2, text="B", votes=1)]))
+
+    res = client.get("/api/polls", params={"expand": "summary", "offset": 1, "limit": 2})
+    assert res.status_code == 200
+    page = res.json()
+    assert page["total"] == 5
+    assert [p["id"] for p in page["items"]] == [2, 3]
+    assert page["items"][0].pop("created") > 0
+    assert page["items"][0] == {"id": 2, "question": "Soru 2?", "owner": "ali",
+                                "option_count": 2, "total_votes": 3}
+
+    # expand verilmezse eski biçim (ID listesi) korunur
+    assert client.get("/api/polls").json() == [1, 2, 3, 4, 5]
+
+def test_poll_etag_and_not_modified(monkeypatch):
+    xml_utils.write_poll(Poll(id=1, question="Önbellek?", options=[Option(id=1, text="A", votes=0)]))
+
+    res = client.get("/api/polls/1")
+    etag = res.headers["etag"]
+    assert res.headers["cache-control"]
+
+    # 304 hiçbir okuma/ayrıştırma yapmadan dönmeli
+    def fail(*args):
+        raise AssertionError("304 için anket okundu")
+    monkeypatch.setattr(votes, "read_poll", fail)
+    res = client.get("/api/polls/1", headers={"If-None-Match": etag})
+    assert res.status_code == 304 and res.headers["etag"] == etag
+    monkeypatch.undo()
+
+    votes.cast_vote(1, 1, "ayse")
+    res = client.get("/api/polls/1", headers={"If-None-Match": etag})
+    assert res.status_code == 200 and res.headers["etag"] != etag
+    assert res.json()["options"][0]["votes"] == 1
+
+
+def test_poll_list_etag_changes_with_catalog():
+    etag = client.get("/api/polls").headers["etag"]
+    assert client.get("/api/polls", headers={"If-None-Match": etag}).status_code == 304
+
+    xml_utils.write_poll(Poll(id=3, question="Yeni?", options=[Option(id=1, text="A", votes=0)]))
+    res = client.get("/api/polls", headers={"If-None-Match": etag})
+    assert res.status_code == 200 and res.json() == [3]
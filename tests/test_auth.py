@@ -0,0 +1,235 @@
+# votesys/tests/test_auth.py
+
+import json
+import pytest
+from fastapi import HTTPException
+
+from app import auth
+from app.users import UserRepo
+
+
+@pytest.fixture
+def repo(tmp_path):
+    return UserRepo(tmp_path / "users.json", tmp_path / "users.log", tmp_path / "users.lock")
+
+
+@pytest.fixture
+def fresh_users(monkeypatch, repo):
+    monkeypatch.setattr(auth, "users_repo", repo)
+    # Testlerde bcrypt maliyetini düşür
+    monkeypatch.setattr(auth, "_hash_pw", lambda pw: "h:" + pw)
+    monkeypatch.setattr(auth, "_verify_pw", lambda pw, h: h == "h:" + pw)
+    return repo
+
+
+def _user(name, role="user"):
+    return {"username": name, "email": f"{name}@x", "password_hash": "h",
+            "role": role, "email_confirmed": True}
+
+
+def test_register_authenticate_delete(fresh_users):
+    auth.register("alice", "a@x", "pw")
+    with pytest.raises(HTTPException):
+        auth.register("alice", "a@x", "pw")
+    assert auth.authenticate("alice", "pw")["username"] == "alice"
+    with pytest.raises(HTTPException):
+        auth.authenticate("alice", "yanlis")
+    assert auth.list_users() == [{"username": "alice", "email": "a@x", "role": "user"}]
+    auth.delete_user("alice")
+    with pytest.raises(HTTPException) as e:
+        auth.delete_user("alice")
+    assert e.value.status_code == 404
+
+
+def test_writes_are_appends_until_compaction(repo):
+    repo.put(_user("a"))
+    repo.put(_user("b"))
+    repo.remove("a")
+    assert not repo.snapshot.exists()
+    assert len(repo.log_path.read_text().splitlines()) == 3
+    assert [u["username"] for u in repo.all()] == ["b"]
+
+
+def test_compaction_rewrites_snapshot(repo, monkeypatch):
+    for i in range(1002):
+        repo.put(_user(f"u{i}"))
+    # Eşik aşılınca günlük anlık görüntüye katlanır
+    assert repo.snapshot.exists()
+    assert len(json.loads(repo.snapshot.read_text())) == 1000
+    assert repo.get("u1001") is not None
+
+
+def test_sees_changes_from_other_process(repo, tmp_path):
+    repo.put(_user("a"))
+    other = UserRepo(repo.snapshot, repo.log_path, tmp_path / "users.lock")
+    other.put(_user("b"))
+    other._compact()
+    assert repo.get("b") is not None
+    other.remove("a")
+    assert repo.get("a") is None
+
+
+def test_name_index_follows_log_and_compaction(repo, tmp_path):
+    for i in range(1005):
+        repo.put(_user(f"u{i:04d}"))
+    repo.remove("u0003")
+    other = UserRepo(repo.snapshot, repo.log_path, tmp_path / "users.lock")
+    other.put(_user("u0003x"))
+    other.remove("u0004")
+    assert [u["username"] for u in repo.page(limit=4)] == ["u0000", "u0001", "u0002", "u0003x"]
+    assert [u["username"] for u in repo.page("u0003x", 2)] == ["u0005", "u0006"]
+
+
+def test_admin_user_pages_and_stream(fresh_users):
+    from fastapi.testclient import TestClient
+    from app import main
+
+    for i in range(25):
+        fresh_users.put(_user(f"k{i:02d}"))
+    fresh_users.put(_user("zeynep"))
+    client = TestClient(main.app)
+    hdr = {"Authorization": "Bearer " + auth.create_access_token({"sub": "yonetici", "role": "admin"})}
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 10, "prefix": "k", **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/users", params=params, headers=hdr).json()
+        seen += [u["username"] for u in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"k{i:02d}" for i in range(25)]
+    assert client.get("/api/users", params={"prefix": "zey"}, headers=hdr).json() == \
+        {"items": [{"username": "zeynep", "email": "zeynep@x", "role": "user"}], "next_cursor": None}
+
+    r = client.get("/api/users", params={"format": "ndjson", "cursor": "k20"}, headers=hdr)
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["username"] for line in r.text.splitlines()] == \
+        ["k21", "k22", "k23", "k24", "zeynep"]
+    user_hdr = {"Authorization": "Bearer " + auth.create_access_token({"sub": "k01", "role": "user"})}
+    assert client.get("/api/users", headers=user_hdr).status_code == 403
+
+
+def test_get_returns_copies(repo):
+    repo.put(_user("a"))
+    repo.get("a")["role"] = "admin"
+    assert repo.get("a")["role"] == "user"
+
+
+def test_password_work_runs_off_the_loop(monkeypatch):
+    import asyncio, time
+    from concurrent.futures import ThreadPoolExecutor
+
+    monkeypatch.setattr(auth, "AUTH_WORKERS", 1)
+    monkeypatch.setattr(auth, "AUTH_QUEUE", 0)
+    monkeypatch.setattr(auth, "_pw_pool", ThreadPoolExecutor(1))
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        t = asyncio.create_task(ticker())
+        slow = asyncio.create_task(auth._offload(time.sleep, 0.3))
+        await asyncio.sleep(0)
+        # Havuz dolu: ikinci istek beklemeden 503 almalı
+        with pytest.raises(HTTPException) as e:
+            await auth._offload(time.sleep, 0.3)
+        assert e.value.status_code == 503
+        await slow
+        t.cancel()
+        return ticks
+
+    # bcrypt süresince loop çalışmaya devam etmeli
+    assert asyncio.run(scenario()) >= 10
+
+
+@pytest.fixture
+def tokens(monkeypatch, fresh_users, tmp_path):
+    monkeypatch.setattr(auth, "token_cache", auth.TokenCache(16))
+    monkeypatch.setattr(auth, "revocations",
+                        auth.RevocationList(tmp_path / "revoked.log", tmp_path / "revoked.lock", 1.0))
+    return auth.token_cache
+
+
+def _current(token):
+    import asyncio
+    return asyncio.run(auth.get_current_user(token))
+
+
+def test_repeat_token_skips_decode(tokens, monkeypatch):
+    token = auth.create_access_token({"sub": "alice", "role": "user"})
+    assert _current(token)["sub"] == "alice"
+    # İkinci istekte imza doğrulaması yapılmamalı
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **k: pytest.fail("decode çağrıldı"))
+    claims = _current(token)
+    assert claims["sub"] == "alice"
+    claims["role"] = "admin"
+    assert _current(token)["role"] == "user"
+
+
+def test_cached_token_expires_at_exp(tokens):
+    token = auth.create_access_token({"sub": "alice"})
+    claims = _current(token)
+    assert tokens.get(token, claims["exp"] - 1) is not None
+    assert tokens.get(token, claims["exp"]) is None
+    with pytest.raises(HTTPException):
+        _current("bozuk.token.degeri")
+
+
+def test_deleted_user_is_locked_out(tokens, tmp_path):
+    auth.register("alice", "a@x", "pw")
+    token = auth.create_access_token({"sub": "alice"})
+    _current(token)
+    auth.delete_user("alice")
+    with pytest.raises(HTTPException) as e:
+        _current(token)
+    assert e.value.status_code == 401
+    # Aynı adla yeniden kayıt olan kullanıcının yeni token'ı geçerli
+    auth.register("alice", "a@x", "pw")
+    assert _current(auth.create_access_token({"sub": "alice"}))["sub"] == "alice"
+
+    # Başka bir işlem iptali yenileme aralığından sonra görür
+    other = auth.RevocationList(tmp_path / "revoked.log", tmp_path / "revoked.lock", 0)
+    bob = auth.create_access_token({"sub": "bob"})
+    assert other.revoked_at("bob", 0) is None
+    auth.revocations.revoke("bob")
+    iat = auth.jwt.get_unverified_claims(bob)["iat"]
+    assert other.revoked_at("bob", 0) >= iat
+
+
+def test_revocation_log_drops_expired_entries(tokens):
+    revs = auth.revocations
+    # Token ömründen eski 999 kayıt: sıkıştırmada atılmalı
+    auth.append_records(str(revs.path), ({"sub": f"u{i}", "at": 1.0} for i in range(999)))
+    revs.revoke("son")
+    assert revs.path.read_text().count("\n") == 1
+    assert revs.revoked_at("u1", 0) is None
+    assert revs.revoked_at("son", 0) is not None
+
+
+def test_admin_sync_skips_bcrypt_when_unchanged(fresh_users, monkeypatch, tmp_path):
+    monkeypatch.setattr(auth, "ADMIN_SYNC", tmp_path / "admin.sync")
+    calls = []
+    monkeypatch.setattr(auth, "_verify_pw", lambda pw, h: calls.append(pw) or h == "h:" + pw)
+    auth._ensure_admin()
+    auth._ensure_admin()
+    assert fresh_users.get(auth.ADMIN_USER)["role"] == "admin"
+    assert calls == []
+
+    # .env parolası değişince parmak izi tutmaz: doğrulanır ve hash yenilenir
+    monkeypatch.setattr(auth, "ADMIN_PASS", "yeni")
+    auth._ensure_admin()
+    assert calls == ["yeni"]
+    assert fresh_users.get(auth.ADMIN_USER)["password_hash"] == "h:yeni"
+    auth._ensure_admin()
+    assert calls == ["yeni"]
+
+    # Kayıt başka yoldan değişirse (rol düşürüldü) yeniden eşitlenir
+    fresh_users.put(dict(fresh_users.get(auth.ADMIN_USER), role="user"))
+    auth._ensure_admin()
+    assert fresh_users.get(auth.ADMIN_USER)["role"] == "admin"
@@ -0,0 +1,102 @@
+# votesys/tests/test_bulk.py
+
+import io
+import json
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app import bulk, journal, votes, voters, xml_utils
+from app.auth import create_access_token
+from app.main import app
+from app.models import Poll, Option
+
+client = TestClient(app)
+ADMIN = {"Authorization": "Bearer " + create_access_token({"sub": "admin", "role": "admin"})}
+
+
+def _seed():
+    xml_utils.create_poll(Poll(id=1, owner="ali", question="Kedi & köpek <hangisi>?", options=[
+        Option(id=1, text='"Kedi"', votes=0), Option(id=2, text="Köpek", votes=0)]))
+    xml_utils.create_poll(Poll(id=7, owner="veli", question="Çay mı?", options=[
+        Option(id=1, text="Evet", votes=0)]))
+    votes.cast_vote(1, 1, "ayşe")
+    votes.cast_vote(1, 2, "o'neil & co")
+    votes.cast_vote(7, 1, "ayşe")
+
+
+def _state():
+    return {pid: (votes.read_poll(pid).model_dump(), sorted(u for u, _ in voters.iter_voters(pid)),
+                  xml_utils.CATALOG.get(pid)["created"])
+            for pid in xml_utils.list_poll_ids()}
+
+
+def _wipe():
+    for pid in xml_utils.list_poll_ids():
+        xml_utils.delete_poll(pid)
+    assert xml_utils.list_poll_ids() == []
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "xml"])
+def test_export_import_roundtrip(fmt):
+    _seed()
+    before = _state()
+    archive = b"".join(bulk.export(fmt))
+    _wipe()
+
+    report = bulk.import_stream(io.BytesIO(archive))   # biçim içerikten tahmin edilir
+    assert report == {"imported": 2, "skipped": 0, "failed": 0, "errors": []}
+    assert _state() == before
+    # Oy veren kayıtları geri geldiği için tekrar oy reddedilir
+    with pytest.raises(HTTPException):
+        votes.cast_vote(1, 1, "ayşe")
+
+
+def test_export_includes_unfolded_journal_votes(monkeypatch):
+    _seed()
+    monkeypatch.setattr(votes, "JOURNAL_MODE", True)
+    votes.cast_vote(7, 1, "fatma")
+    assert journal.pending_votes(7) == 1
+
+    recs = {r["id"]: r for r in map(json.loads, b"".join(bulk.export_ndjson()).splitlines())}
+    assert recs[7]["options"][0]["votes"] == 2
+    assert sorted(u for u, _ in recs[7]["voters"]) == ["ayşe", "fatma"]
+
+
+def test_import_skips_or_replaces_existing_and_reports_bad_records():
+    _seed()
+    lines = [
+        json.dumps({"id": 1, "owner": "x", "question": "Yeni?", "options": [{"id": 1, "text": "A", "votes": 5}]}),
+        "{bozuk",
+        json.dumps({"id": 9, "question": "Seçeneksiz"}),
+        json.dumps({"owner": "y", "question": "ID'siz?", "options": [{"id": 1, "text": "A", "votes": 0}]}),
+    ]
+    data = ("\n".join(lines) + "\n").encode()
+
+    report = bulk.import_stream(io.BytesIO(data), batch_size=2)
+    assert (report["imported"], report["skipped"], report["failed"]) == (1, 1, 2)
+    assert len(report["errors"]) == 2
+    assert votes.read_poll(1).question.startswith("Kedi")
+    # ID'siz kayda sunucu tarafında yeni ID ayrılır
+    assert xml_utils.list_poll_ids() == [1, 7, 8]
+
+    report = bulk.import_stream(io.BytesIO(data), replace=True)
+    assert report["imported"] == 2
+    poll = votes.read_poll(1)
+    assert poll.question == "Yeni?" and poll.options[0].votes == 5
+    assert list(voters.iter_voters(1)) == []
+
+
+def test_export_and_import_endpoints_are_admin_only():
+    _seed()
+    assert client.get("/api/export").status_code == 401
+    res = client.get("/api/export?format=xml", headers=ADMIN)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/xml")
+    archive = res.content
+    _wipe()
+
+    res = client.post("/api/import", content=archive, headers=ADMIN)
+    assert res.status_code == 200 and res.json()["imported"] == 2
+    assert client.post("/api/import?format=xml", content=b"<archive><entry>",
+                       headers=ADMIN).status_code == 400
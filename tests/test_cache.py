@@ -0,0 +1,64 @@
+# votesys/tests/test_cache.py
+
+import pytest
+
+from app import xml_utils
+from app.cache import PollCache
+from tests.conftest import make_poll
+
+
+def test_hit_skips_parse(monkeypatch):
+    xml_utils.write_poll(make_poll(1))
+    xml_utils.POLL_CACHE.clear()
+    xml_utils.read_poll(1)
+
+    # İkinci okumada ayrıştırma yapılmamalı
+    def fail(*args):
+        raise AssertionError("önbellek isabetinde parse çağrıldı")
+    monkeypatch.setattr(xml_utils, "_parse_poll", fail)
+    before = xml_utils.POLL_CACHE.hits
+    assert xml_utils.read_poll(1).question == "Soru 1?"
+    assert xml_utils.POLL_CACHE.hits == before + 1
+
+
+def test_returns_independent_copies():
+    xml_utils.write_poll(make_poll(2))
+    poll = xml_utils.read_poll(2)
+    poll.options[0].votes = 99
+    assert xml_utils.read_poll(2).options[0].votes == 0
+
+
+def test_write_and_external_change_are_seen():
+    xml_utils.write_poll(make_poll(3))
+    xml_utils.read_poll(3)
+    xml_utils.write_poll(make_poll(3, votes=5))
+    assert xml_utils.read_poll(3).options[0].votes == 5
+
+    # Başka bir işlemin yazdığı dosya da imzadan fark edilmeli
+    with open(xml_utils._poll_filepath(3), "wb") as f:
+        f.write(b'<poll id="3"><question>Yeni?</question><options>'
+                b'<option id="1"><text>A</text><votes>12</votes></option>'
+                b'</options></poll>')
+    assert xml_utils.read_poll(3).options[0].votes == 12
+
+
+def test_delete_invalidates():
+    xml_utils.write_poll(make_poll(4))
+    xml_utils.read_poll(4)
+    xml_utils.delete_poll(4)
+    with pytest.raises(FileNotFoundError):
+        xml_utils.read_poll(4)
+
+
+def test_lru_eviction_counters():
+    cache = PollCache(2)
+    for pid in (1, 2, 3):
+        cache.put(pid, "sig", make_poll(pid))
+    assert cache.get(1, "sig") is None
+    assert cache.get(3, "sig") is not None
+    assert cache.get(3, "other-sig") is None
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
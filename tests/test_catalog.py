@@ -0,0 +1,79 @@
+# votesys/tests/test_catalog.py
+
+import os
+import pytest
+
+from app import journal, votes, xml_utils
+from tests.conftest import make_poll
+
+
+def test_write_and_delete_keep_catalog_current():
+    xml_utils.write_poll(make_poll(3))
+    xml_utils.write_poll(make_poll(1))
+    created = xml_utils.CATALOG.get(1)["created"]
+    xml_utils.write_poll(make_poll(1, votes=4))
+
+    entry = xml_utils.CATALOG.get(1)
+    assert entry["total_votes"] == 4 and entry["option_count"] == 2
+    assert entry["created"] == created
+    assert xml_utils.list_poll_ids() == [1, 3]
+
+    xml_utils.delete_poll(3)
+    assert not xml_utils.poll_exists(3)
+    assert xml_utils.list_poll_ids() == [1]
+
+
+def test_rebuilds_from_disk_when_missing():
+    for i in (1, 2):
+        xml_utils.write_poll(make_poll(i, votes=i))
+    # Katalogdan habersiz kalmış eski veri klasörü
+    for path in (xml_utils.CATALOG.snapshot, xml_utils.CATALOG.log_path):
+        if os.path.exists(path):
+            os.remove(path)
+    assert xml_utils.list_poll_ids() == [1, 2]
+    assert xml_utils.CATALOG.get(2)["total_votes"] == 2
+
+
+def test_allocated_ids_are_unique():
+    xml_utils.create_poll(make_poll(7))
+    a = xml_utils.create_poll(make_poll(0), allocate_id=True).id
+    b = xml_utils.create_poll(make_poll(0), allocate_id=True).id
+    assert (a, b) == (8, 9)
+    # Silinen ankete ait ID tekrar verilmez
+    xml_utils.delete_poll(b)
+    assert xml_utils.CATALOG.allocate_id() == 10
+    with pytest.raises(FileExistsError):
+        xml_utils.create_poll(make_poll(7))
+
+
+def test_summaries_include_journal_votes(monkeypatch):
+    monkeypatch.setattr(votes, "JOURNAL_MODE", True)
+    xml_utils.write_poll(make_poll(1))
+    votes.cast_vote(1, 1, "veli")
+    total, items = votes.poll_summaries(0, 10)
+    assert total == 1 and items[0]["total_votes"] == 1
+
+    journal.compact(1)
+    assert xml_utils.CATALOG.get(1)["total_votes"] == 1
+    assert votes.poll_summaries(0, 10)[1][0]["total_votes"] == 1
+
+
+def test_direct_votes_skip_catalog_but_show_in_summaries(monkeypatch):
+    monkeypatch.setattr(votes, "JOURNAL_MODE", False)
+    xml_utils.write_poll(make_poll(1))
+    generation = xml_utils.CATALOG.generation()
+    etag = votes.list_etag([1])
+    votes.cast_votes(1, [(1, "a"), (2, "b")])
+    # Oy yolu ortak katalog kilidini almaz ve katalog günlüğüne yazmaz
+    assert xml_utils.CATALOG.generation() == generation
+    assert xml_utils.CATALOG.get(1)["total_votes"] == 0
+    assert votes.poll_summaries(0, 10)[1][0]["total_votes"] == 2
+    assert votes.list_etag([1]) != etag
+
+    # Taramayla kurulan kayıtta oy veren sayısı yoktur; toplam anketten okunur
+    for path in (xml_utils.CATALOG.snapshot, xml_utils.CATALOG.log_path):
+        os.remove(path)
+    xml_utils.CATALOG.rebuild()
+    assert votes.poll_summaries(0, 10)[1][0]["total_votes"] == 2
+    votes.cast_vote(1, 1, "c")
+    assert votes.poll_summaries(0, 10)[1][0]["total_votes"] == 3
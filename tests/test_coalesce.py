@@ -0,0 +1,60 @@
+# votesys/tests/test_coalesce.py
+
+import asyncio
+import pytest
+from fastapi import HTTPException
+
+from app import voters, votes, xml_utils
+from app.coalesce import VoteCoalescer
+from app.models import Poll
+
+
+pytestmark = pytest.mark.usefixtures("seed_poll")
+
+
+def test_cast_votes_gives_each_vote_its_result():
+    voters.add(1, [("old", 1.0)])
+    results = votes.cast_votes(1, [(1, "a"), (2, "a"), (9, "b"), (1, "owner"), (2, "old"), (2, "c")])
+    codes = [r.status_code if isinstance(r, HTTPException) else 200 for r in results]
+    assert codes == [200, 403, 400, 403, 403, 200]
+    assert [o.votes for o in votes.read_poll(1).options] == [1, 1]
+    assert voters.count(1) == 3
+
+
+def test_coalescer_batches_into_one_write(monkeypatch):
+    writes = []
+    real_write = xml_utils.write_counts
+    monkeypatch.setattr(xml_utils, "write_counts", lambda p, s: (writes.append(p.id), real_write(p, s)))
+
+    async def scenario():
+        c = VoteCoalescer(window_ms=20, max_batch=100)
+        return await asyncio.gather(
+            *(c.submit(1, 1 + i % 2, f"user{i}") for i in range(50)),
+            c.submit(1, 1, "user0"),
+            c.submit(1, 7, "x"),
+            return_exceptions=True,
+        ), c
+
+    results, c = asyncio.run(scenario())
+    assert all(isinstance(r, Poll) for r in results[:50])
+    assert results[50].status_code == 403 and results[51].status_code == 400
+    assert writes == [1] and c.batches == 1
+    assert [o.votes for o in votes.read_poll(1).options] == [25, 25]
+
+
+def test_full_batch_flushes_without_waiting():
+    async def scenario():
+        c = VoteCoalescer(window_ms=10_000, max_batch=3)
+        return await asyncio.wait_for(asyncio.gather(
+            *(c.submit(1, 1, f"u{i}") for i in range(3))), timeout=5)
+
+    assert asyncio.run(scenario())[-1].options[0].votes == 3
+
+
+def test_missing_poll_rejects_whole_batch():
+    async def scenario():
+        c = VoteCoalescer(window_ms=1)
+        return await asyncio.gather(c.submit(99, 1, "a"), c.submit(99, 1, "b"),
+                                    return_exceptions=True)
+
+    assert [r.status_code for r in asyncio.run(scenario())] == [404, 404]
@@ -0,0 +1,49 @@
+# votesys/tests/test_codec.py
+
+import pytest
+from lxml import etree
+
+from app.codec import decode_poll, encode_poll
+from app.models import Poll, Option
+from app.xml_utils import XML_SCHEMA, validate_xml
+
+
+def _poll(n: int = 2) -> Poll:
+    return Poll(id=3, owner='a"li <&>', question="Hangisi? <b>&amp;</b>\ttab\r\n",
+                options=[Option(id=i, text=f"Şık {i} & <{i}>", votes=i * 7) for i in range(1, n + 1)])
+
+
+def test_round_trip_and_schema_valid():
+    poll = _poll(50)
+    xml_bytes = encode_poll(poll)
+    validate_xml(xml_bytes)
+    assert decode_poll(xml_bytes).model_dump() == poll.model_dump()
+
+
+def test_matches_lxml_reading_of_same_document():
+    xml_bytes = encode_poll(_poll())
+    root = etree.fromstring(xml_bytes)
+    assert root.get("owner") == 'a"li <&>'
+    assert root.findtext("question") == "Hangisi? <b>&amp;</b>\ttab\r\n"
+
+
+def test_rejects_characters_xml_cannot_hold():
+    with pytest.raises(ValueError):
+        encode_poll(Poll(id=1, question="kontrol\x01", options=[Option(id=1, text="A", votes=0)]))
+
+
+def test_decode_errors_are_value_errors():
+    with pytest.raises(ValueError):
+        decode_poll(b"<poll><broken></poll>")
+    with pytest.raises(ValueError):
+        decode_poll(b'<poll id="1"><question>?</question><options>'
+                    b'<option id="1"><text>A</text></option></options></poll>')
+    # Şema verilirse aynı ağaç üzerinde doğrulanır
+    with pytest.raises(ValueError):
+        decode_poll(b'<poll id="1"><question>?</question><options/></poll>', schema=XML_SCHEMA)
+
+
+def test_missing_id_attribute_uses_given_id():
+    poll = decode_poll(b'<poll><question>?</question><options>'
+                       b'<option id="1"><text>A</text><votes>2</votes></option></options></poll>', 9)
+    assert poll.id == 9 and poll.options[0].votes == 2
@@ -0,0 +1,79 @@
+# votesys/tests/test_counters.py
+
+import os
+import pytest
+
+from app import journal, votes, xml_utils
+from app.counters import CounterRegion
+from app.models import Option
+
+
+pytestmark = pytest.mark.parametrize("seed_poll", [3], indirect=True)
+
+
+@pytest.fixture(autouse=True)
+def counters_mode(seed_poll, monkeypatch):
+    monkeypatch.setattr(votes, "JOURNAL_MODE", True)
+    monkeypatch.setattr(votes, "SHARED_COUNTERS", True)
+
+
+def _votes(poll_id: int = 1) -> dict:
+    return {o.id: o.votes for o in votes.read_poll(poll_id).options}
+
+
+def test_region_snapshot_checks_tag_and_sequence(tmp_path):
+    path = str(tmp_path / "c")
+    region = CounterRegion.create(path, {1: 5, 2: 0}, b"a" * 12)
+    assert region.snapshot(b"a" * 12) == {1: 5, 2: 0}
+    assert region.snapshot(b"b" * 12) is None
+
+    # Başka bir işlemin eşlemesi aynı belleği görür
+    other = CounterRegion(path)
+    with region.writing():
+        region.add(2, 4)
+        assert other.snapshot(b"a" * 12) is None   # yazma sürüyor
+    assert other.snapshot(b"a" * 12) == {1: 5, 2: 4}
+
+
+def test_votes_update_counters_without_rewriting_xml():
+    path = xml_utils._poll_filepath(1)
+    before = os.stat(path).st_mtime_ns
+    for n in range(5):
+        votes.cast_vote(1, 2, f"u{n}")
+    assert os.stat(path).st_mtime_ns == before
+    assert _votes() == {1: 3, 2: 5}
+    assert os.path.exists(xml_utils._counts_filepath(1))
+
+
+def test_checkpoint_and_option_edit_rebuild_counters():
+    votes.cast_vote(1, 1, "a")
+    assert journal.compact(1) == 1
+    assert _votes() == {1: 4, 2: 0}
+
+    poll = xml_utils.read_poll(1)
+    poll.options.append(Option(id=3, text="C", votes=0))
+    xml_utils.write_poll(poll)
+    votes.cast_vote(1, 3, "b")
+    assert _votes() == {1: 4, 2: 0, 3: 1}
+
+
+def test_interrupted_write_is_recovered():
+    votes.cast_vote(1, 1, "a")
+    region = votes.COUNTERS.get(1)
+    # Oy günlüğe yazılmış ama sayaç güncellenmeden işlem çökmüş gibi
+    with pytest.raises(RuntimeError):
+        with region.writing():
+            journal.append_batch(1, [("b", 2)])
+            raise RuntimeError("çökme")
+    rebuilds = votes.COUNTERS.rebuilds
+    assert _votes() == {1: 4, 2: 1}
+    assert votes.COUNTERS.rebuilds == rebuilds + 1
+
+
+def test_missing_counter_file_is_rebuilt():
+    votes.cast_vote(1, 1, "a")
+    os.remove(xml_utils._counts_filepath(1))
+    votes.COUNTERS.forget(1)
+    assert _votes() == {1: 4, 2: 0}
+    votes.cast_vote(1, 2, "b")
+    assert _votes() == {1: 4, 2: 1}
@@ -0,0 +1,103 @@
+# votesys/tests/test_journal.py
+
+import logging
+import os
+import pytest
+from fastapi import HTTPException
+
+from app import journal, voters, votes, xml_utils
+
+
+pytestmark = pytest.mark.parametrize("seed_poll", [3], indirect=True)
+
+
+@pytest.fixture(autouse=True)
+def journal_mode(seed_poll, monkeypatch):
+    monkeypatch.setattr(votes, "JOURNAL_MODE", True)
+
+
+def _snapshot_votes():
+    xml_utils.POLL_CACHE.clear()
+    return [o.votes for o in xml_utils.read_poll(1).options]
+
+
+def test_votes_go_to_journal_and_reads_merge():
+    poll = votes.cast_vote(1, 1, "alice")
+    assert [o.votes for o in poll.options] == [4, 0]
+    votes.cast_vote(1, 2, "bob")
+
+    # XML dosyasına dokunulmamalı, okuma yine kesin olmalı
+    assert _snapshot_votes() == [3, 0]
+    assert [o.votes for o in votes.read_poll(1).options] == [4, 1]
+    assert os.path.exists(xml_utils._journal_filepath(1))
+
+
+def test_duplicate_and_owner_rejected_from_journal():
+    votes.cast_vote(1, 1, "alice")
+    with pytest.raises(HTTPException) as e:
+        votes.cast_vote(1, 2, "alice")
+    assert e.value.status_code == 403
+    with pytest.raises(HTTPException) as e:
+        votes.cast_vote(1, 2, "owner")
+    assert e.value.status_code == 403
+
+
+def test_compact_folds_journal_into_xml():
+    votes.cast_vote(1, 1, "alice")
+    votes.cast_vote(1, 2, "bob")
+    assert journal.compact(1) == 2
+
+    assert _snapshot_votes() == [4, 1]
+    assert not os.path.exists(xml_utils._journal_filepath(1))
+    assert [u for u, _ in voters.iter_voters(1)] == ["alice", "bob"]
+    assert [o.votes for o in votes.read_poll(1).options] == [4, 1]
+    # Katlanmış oy veren yine tekrar oy veremez
+    with pytest.raises(HTTPException):
+        votes.cast_vote(1, 1, "bob")
+
+
+def test_direct_mode_folds_pending_journal_first(monkeypatch):
+    votes.cast_vote(1, 1, "alice")
+    monkeypatch.setattr(votes, "JOURNAL_MODE", False)
+    poll = votes.cast_vote(1, 2, "bob")
+    assert [o.votes for o in poll.options] == [4, 1]
+    assert _snapshot_votes() == [4, 1]
+
+
+def test_recover_committed_fold():
+    votes.cast_vote(1, 1, "alice")
+    # Taahhütten sonra (günlük .folded yapıldıktan sonra) çökmüş gibi
+    poll = votes.read_poll(1)
+    with open(journal._next_path(1), "wb") as f:
+        f.write(xml_utils.serialize_poll(poll))
+    os.replace(xml_utils._journal_filepath(1), journal._folded_path(1))
+
+    assert [o.votes for o in votes.read_poll(1).options] == [4, 0]
+    assert not os.path.exists(journal._folded_path(1))
+    assert [u for u, _ in voters.iter_voters(1)] == ["alice"]
+
+
+def test_recover_uncommitted_fold():
+    votes.cast_vote(1, 1, "alice")
+    # .next yazılmış ama günlük henüz taahhüt edilmemiş
+    with open(journal._next_path(1), "wb") as f:
+        f.write(b"yarim")
+    assert [o.votes for o in votes.read_poll(1).options] == [4, 0]
+    assert not os.path.exists(journal._next_path(1))
+
+
+def test_compactor_logs_errors_and_keeps_running(monkeypatch, caplog):
+    calls = []
+
+    def failing():
+        calls.append(1)
+        if len(calls) == 2:
+            journal._stop.set()
+        raise OSError("disk dolu")
+
+    monkeypatch.setattr(journal, "compact_all", failing)
+    with caplog.at_level(logging.ERROR, logger="app.journal"):
+        journal._run(0.001)
+    journal._stop.clear()
+    assert len(calls) == 2
+    assert [r.exc_info[1].args[0] for r in caplog.records] == ["disk dolu"] * 2
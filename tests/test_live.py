@@ -0,0 +1,126 @@
+# votesys/tests/test_live.py
+
+import asyncio
+import json
+import threading
+import pytest
+
+from app import live, main, votes, xml_utils
+from app.live import TallyBroadcaster
+from app.models import Poll, Option
+
+
+pytestmark = pytest.mark.usefixtures("seed_poll")
+
+
+def _data(event: str) -> dict:
+    return json.loads(event.split("data: ", 1)[1])
+
+
+def test_one_merged_event_per_tick_for_all_subscribers():
+    async def scenario():
+        b = TallyBroadcaster(tick_ms=20)
+        subs = [b.subscribe(1) for _ in range(100)]
+        # Oylar thread havuzundan da yayınlanabilir
+        t = threading.Thread(target=lambda: [b.publish(1, {1: n}) for n in range(1, 6)])
+        t.start(); t.join()
+        b.publish(1, {2: 1})
+        events = [await s.get(timeout=1) for s in subs]
+        return b, events
+
+    b, events = asyncio.run(scenario())
+    assert b.broadcasts == 1
+    assert all(e is events[0] for e in events)
+    assert _data(events[0]) == {"id": 1, "options": {"1": 5, "2": 1}}
+
+
+def test_slow_subscriber_is_resynced():
+    async def scenario():
+        b = TallyBroadcaster(tick_ms=10_000, queue_size=2)
+        sub = b.subscribe(1)
+        for n in range(3):
+            b.publish(1, {1: n})
+            b.flush()
+        return await sub.get(timeout=1)
+
+    assert asyncio.run(scenario()) is live.RESYNC
+
+
+def test_cast_votes_publishes_new_totals(monkeypatch):
+    async def scenario():
+        b = TallyBroadcaster(tick_ms=10_000)
+        monkeypatch.setattr(live, "broadcaster", b)
+        sub = b.subscribe(1)
+        votes.cast_votes(1, [(1, "a"), (1, "b"), (2, "c"), (7, "d")])
+        b.flush()
+        return await sub.get(timeout=1)
+
+    assert _data(asyncio.run(scenario()))["options"] == {"1": 2, "2": 1}
+
+
+def test_votes_from_other_workers_are_picked_up():
+    async def scenario():
+        b = TallyBroadcaster(tick_ms=10_000)
+        b.watch(votes.poll_etag, votes._live_totals)
+        sub = b.subscribe(1)
+        assert b.check_sources() == 0
+        # Başka bir işçinin yazması: bu işlemin yayıncısına publish gelmez
+        poll = xml_utils.read_poll(1)
+        poll.options[1].votes = 7
+        xml_utils.write_poll(poll)
+        assert b.check_sources() == 1
+        assert b.check_sources() == 0
+        b.flush()
+        return await sub.get(timeout=1)
+
+    assert _data(asyncio.run(scenario()))["options"] == {"1": 0, "2": 7}
+
+
+def test_local_vote_on_watched_poll_sends_only_changed_option(monkeypatch):
+    xml_utils.write_poll(Poll(id=2, owner="owner", question="Çok seçenekli?", options=[
+        Option(id=i, text=f"S{i}", votes=0) for i in range(1, 51)]))
+    reads = []
+
+    async def scenario():
+        b = TallyBroadcaster(tick_ms=10_000)
+        b.watch(votes.poll_etag, lambda pid: reads.append(pid) or votes._live_totals(pid))
+        monkeypatch.setattr(live, "broadcaster", b)
+        sub = b.subscribe(2)
+        votes.cast_vote(2, 30, "a")
+        # Bu işlemin yazması imzayı ilerletti: anket yeniden okunmaz
+        assert b.check_sources() == 0
+        b.flush()
+        return await sub.get(timeout=1)
+
+    assert _data(asyncio.run(scenario()))["options"] == {"30": 1}
+    assert reads == []
+
+
+def test_watch_only_with_multiple_workers(monkeypatch):
+    monkeypatch.setattr(live, "WATCH", "auto")
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert not live.watch_enabled()
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert live.watch_enabled()
+    monkeypatch.setattr(live, "WATCH", "0")
+    assert not live.watch_enabled()
+
+
+def test_stream_ends_when_poll_is_deleted(monkeypatch):
+    async def scenario():
+        b = TallyBroadcaster(tick_ms=10_000, queue_size=1)
+        monkeypatch.setattr(live, "broadcaster", b)
+        events = (await main.api_poll_stream(1)).body_iterator
+        first = await events.__anext__()
+        xml_utils.delete_poll(1)
+        # Kuyruk taşar, abone RESYNC alır; anket artık yok
+        for n in range(2):
+            b.publish(1, {1: n})
+            b.flush()
+        rest = [e async for e in events]
+        return first, rest, b.subscribers(1)
+
+    first, rest, left = asyncio.run(scenario())
+    assert first.startswith("event: snapshot")
+    assert rest == [live.sse("deleted", {"id": 1})]
+    assert left == 0
@@ -0,0 +1,115 @@
+# votesys/tests/test_locks.py
+
+import os
+import threading
+import pytest
+from filelock import Timeout
+
+from app import xml_utils
+from tests.conftest import make_poll
+
+
+def _hold(lock, acquired: threading.Event, release: threading.Event):
+    # Kilidi başka bir thread'de tut
+    with lock:
+        acquired.set()
+        release.wait(5)
+
+
+def test_poll_locks_are_independent():
+    xml_utils.write_poll(make_poll(1))
+    xml_utils.write_poll(make_poll(2))
+
+    acquired, release = threading.Event(), threading.Event()
+    t = threading.Thread(target=_hold, args=(xml_utils.poll_lock(1), acquired, release))
+    t.start()
+    try:
+        assert acquired.wait(5)
+        # Anket 1 kilitliyken anket 2 okunup yazılabilmeli
+        poll = xml_utils.read_poll(2)
+        poll.options[0].votes += 1
+        xml_utils.write_poll(poll)
+        assert xml_utils.read_poll(2).options[0].votes == 1
+        # Aynı anketin kilidi ise beklemeli
+        with pytest.raises(Timeout):
+            xml_utils.poll_lock(1).acquire(timeout=0.1)
+    finally:
+        release.set()
+        t.join()
+
+
+def test_poll_lock_is_reentrant():
+    xml_utils.write_poll(make_poll(3))
+    with xml_utils.poll_lock(3):
+        poll = xml_utils.read_poll(3)
+        poll.options[0].votes = 4
+        xml_utils.write_poll(poll)
+    assert xml_utils.read_poll(3).options[0].votes == 4
+
+
+def test_create_and_delete_poll():
+    xml_utils.create_poll(make_poll(4))
+    with pytest.raises(FileExistsError):
+        xml_utils.create_poll(make_poll(4))
+    assert xml_utils.list_poll_ids() == [4]
+    assert xml_utils.delete_poll(4) is True
+    assert xml_utils.delete_poll(4) is False
+    assert xml_utils.list_poll_ids() == []
+
+
+def test_read_does_not_wait_for_writer_lock():
+    xml_utils.write_poll(make_poll(5))
+    acquired, release = threading.Event(), threading.Event()
+    t = threading.Thread(target=_hold, args=(xml_utils.poll_lock(5), acquired, release))
+    t.start()
+    try:
+        assert acquired.wait(5)
+        # Önbellek boşken bile okuma kilidi beklemeden diskten yapılmalı
+        xml_utils.POLL_CACHE.invalidate(5)
+        assert xml_utils.read_poll(5).id == 5
+    finally:
+        release.set()
+        t.join()
+
+
+def test_failed_write_keeps_previous_poll(monkeypatch):
+    xml_utils.write_poll(make_poll(6))
+
+    def crash(fd):
+        raise OSError("disk hatası")
+
+    poll = make_poll(6)
+    poll.options[0].votes = 9
+    monkeypatch.setattr(os, "fsync", crash)
+    with pytest.raises(OSError):
+        xml_utils.write_poll(poll)
+    monkeypatch.undo()
+    # Eski sürüm eksiksiz kalır; yarım kalan geçici dosya bir sonraki yazmada ezilir
+    xml_utils.POLL_CACHE.invalidate(6)
+    assert xml_utils.read_poll(6).options[0].votes == 0
+    xml_utils.write_poll(poll)
+    assert xml_utils.read_poll(6).options[0].votes == 9
+
+
+def test_reads_see_complete_polls_during_writes():
+    xml_utils.write_poll(make_poll(7))
+    done, errors = threading.Event(), []
+
+    def writer():
+        poll = make_poll(7)
+        for i in range(200):
+            poll.options[0].votes = i
+            with xml_utils.poll_lock(7):
+                xml_utils.write_poll(poll)
+        done.set()
+
+    t = threading.Thread(target=writer)
+    t.start()
+    while not done.is_set():
+        xml_utils.POLL_CACHE.invalidate(7)
+        try:
+            xml_utils.read_poll(7)
+        except Exception as e:   # yarım dosya ayrıştırma hatası verirdi
+            errors.append(e)
+    t.join()
+    assert errors == []
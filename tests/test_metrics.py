@@ -0,0 +1,73 @@
+# votesys/tests/test_metrics.py
+
+import threading
+import time
+from fastapi.testclient import TestClient
+from filelock import FileLock
+
+from app import metrics, xml_utils
+from app.main import app
+from app.metrics import Counter, Histogram, TimedLock
+from app.models import Poll, Option
+
+client = TestClient(app)
+
+
+def _isolated(metric):
+    # Test metrikleri genel kayda karışmasın
+    metrics.REGISTRY.remove(metric)
+    return metric
+
+
+def test_histogram_buckets_are_cumulative():
+    h = _isolated(Histogram("t_seconds", "test", ["stage"], buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        h.labels("x").observe(value)
+    lines = h.render()
+    assert 't_seconds_bucket{stage="x",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{stage="x",le="1"} 3' in lines
+    assert 't_seconds_bucket{stage="x",le="+Inf"} 4' in lines
+    assert 't_seconds_count{stage="x"} 4' in lines
+    assert 't_seconds_sum{stage="x"} 6.05' in lines
+
+
+def test_counter_label_values_are_escaped():
+    c = _isolated(Counter("t_total", "test", ["route"]))
+    c.labels('a"b').inc(2)
+    assert 't_total{route="a\\"b"} 2' in c.render()
+
+
+def test_timed_lock_records_wait(tmp_path):
+    lock = FileLock(str(tmp_path / "x.lock"))
+    timed = TimedLock(lock, "test")
+    child = metrics.LOCK_WAIT.labels("test")
+    before = child.sum
+
+    lock.acquire()
+    t = threading.Thread(target=lambda: (timed.acquire(), timed.release()))
+    t.start()
+    time.sleep(0.1)
+    lock.release()
+    t.join()
+    assert child.sum - before >= 0.05
+
+
+def test_metrics_endpoint_exposes_stages_and_http():
+    xml_utils.write_poll(Poll(id=1, owner="o", question="Q?", options=[
+        Option(id=1, text="A", votes=0)]))
+    xml_utils.POLL_CACHE.clear()
+    xml_utils.read_poll(1)
+
+    client.get("/api/polls/9999")
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    body = res.text
+    for stage in ("encode", "write_io", "read_io", "parse"):
+        assert f'votesys_stage_seconds_count{{stage="{stage}"}}' in body
+    assert 'votesys_lock_wait_seconds_count{lock="poll"}' in body
+    # Rota etiketi yol şablonudur, ham yol değil
+    assert 'route="/api/polls/{poll_id}"' in body
+    assert "/api/polls/9999" not in body
+    assert "votesys_http_in_flight" in body
+    assert "votesys_data_dir_bytes" in body
@@ -0,0 +1,77 @@
+# votesys/tests/test_slots.py
+# Seçenek yuvaları: oy yeni bir sürüm üretir, eski sürüme dokunulmaz; XML
+# parçalardan kurulur ve tam kodlamayla aynıdır; büyük ankette oy ve sayfalı
+# seçenek okuma tüm seçenekleri yeniden kodlamaz/doğrulamaz.
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import auth, journal, main, votes, xml_utils
+from app.codec import encode_poll
+from app.models import Poll, Option
+from app.slots import OptionSlots, with_votes
+
+
+def _big(poll_id: int = 1, n: int = 2000) -> Poll:
+    return Poll(id=poll_id, owner="sahip", question="Hangi şehir?", options=[
+        Option(id=i, text=f"Şehir <{i}>", votes=0) for i in range(1, n + 1)])
+
+
+def test_with_votes_copies_only_changed_options():
+    poll = _big(n=5)
+    slots = OptionSlots.of(poll)
+    slots.encode(poll)
+    new, new_slots = with_votes(poll, slots, {2: 3, 4: 1, 99: 5})
+    assert [o.votes for o in poll.options] == [0] * 5
+    assert [o.votes for o in new.options] == [0, 3, 0, 1, 0]
+    assert new.options[0] is poll.options[0] and new.options[1] is not poll.options[1]
+    assert new_slots.encode(new) == encode_poll(new)
+    assert new_slots.total_votes(new) == 4
+    assert with_votes(new, new_slots, {}) == (new, new_slots)
+
+
+def test_vote_on_large_poll_skips_full_validation(monkeypatch):
+    xml_utils.write_poll(_big())
+    monkeypatch.setattr(xml_utils, "validate_xml", lambda b: pytest.fail("tam doğrulama"))
+    votes.cast_vote(1, 1500, "ali")
+    result = votes.cast_votes(1, [(1500, "veli"), (7, "ayşe"), (5000, "can")])
+    assert result[2].status_code == 400
+    assert result[0] is result[1] and result[0].options[1499].votes == 2
+
+    # Diskteki XML tam kodlamayla aynı ve şemaya uygun
+    monkeypatch.undo()
+    with open(xml_utils._poll_filepath(1), "rb") as f:
+        xml_bytes = f.read()
+    xml_utils.validate_xml(xml_bytes)
+    assert xml_bytes == encode_poll(result[0])
+    assert votes.poll_summaries(0, 1)[1][0]["total_votes"] == 3
+    # Okuyucunun aldığı kopya önbellekteki sürümü etkilemez
+    xml_utils.read_poll(1).options[6].votes = 99
+    assert votes.read_poll(1).options[6].votes == 1
+
+
+def test_journal_fold_keeps_counts(monkeypatch):
+    monkeypatch.setattr(votes, "JOURNAL_MODE", True)
+    xml_utils.write_poll(_big(n=50))
+    votes.cast_votes(1, [(10, "a"), (10, "b"), (20, "c")])
+    assert votes.read_poll(1).options[9].votes == 2
+    assert journal.compact(1) == 3
+    assert [votes.read_poll(1).options[i].votes for i in (9, 19)] == [2, 1]
+    xml_utils.POLL_CACHE.clear()
+    assert [xml_utils.read_poll(1).options[i].votes for i in (9, 19)] == [2, 1]
+
+
+def test_paged_options_endpoint():
+    xml_utils.write_poll(_big(n=250))
+    client = TestClient(main.app)
+    r = client.get("/api/polls/1/options?offset=200&limit=100")
+    body = r.json()
+    assert (body["total"], len(body["items"]), body["items"][0]) == \
+        (250, 50, {"id": 201, "text": "Şehir <201>", "votes": 0})
+    assert client.get("/api/polls/1/options?offset=200&limit=100",
+                      headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+
+    hdr = {"Authorization": "Bearer " + auth.create_access_token({"sub": "veli"})}
+    assert client.post("/api/polls/1/vote", headers=hdr, json={"option_id": 210}).status_code == 200
+    assert client.get("/api/polls/1/options?offset=209&limit=1").json()["items"][0]["votes"] == 1
+    assert client.get("/api/polls/2/options").status_code == 404
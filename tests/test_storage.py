@@ -0,0 +1,180 @@
+# votesys/tests/test_storage.py
+# Depolama arayüzü: aynı sözleşme hem dosya hem SQLite arka ucunda sağlanmalı;
+# arka uçlar arası taşıma veriyi (oylar, oy verenler, kullanıcılar) korumalı.
+
+import multiprocessing as mp
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app import auth, bulk, coalesce, main, xml_utils
+from app.models import Poll, Option
+from app.sqlstore import SQLiteStorage
+from app.storage import FileStorage, Storage
+from tests.conftest import make_poll
+
+ctx = mp.get_context("fork")
+
+
+@pytest.fixture(params=["files", "sqlite"])
+def store(request, tmp_path):
+    return FileStorage() if request.param == "files" else SQLiteStorage(str(tmp_path / "v.db"))
+
+
+def test_backend_contract(store):
+    first = store.create_poll(make_poll(5))
+    second = store.create_poll(make_poll(), allocate_id=True)
+    assert second.id > first.id
+    with pytest.raises(FileExistsError):
+        store.create_poll(make_poll(5))
+    assert store.list_poll_ids() == [5, second.id]
+    assert store.poll_exists(5) and not store.poll_exists(99)
+
+    etag, list_etag = store.poll_etag(5), store.list_etag(0, 10)
+    results = store.cast_votes(5, [(1, "a"), (2, "a"), (9, "b"), (1, "owner"), (2, "c")])
+    assert [r.status_code if isinstance(r, HTTPException) else "ok" for r in results] == \
+        ["ok", 403, 400, 403, "ok"]
+    with pytest.raises(HTTPException):
+        store.cast_vote(5, 1, "a")
+    assert [o.votes for o in store.read_poll(5).options] == [1, 1]
+    assert store.poll_etag(5) != etag and store.list_etag(0, 10) != list_etag
+    assert store.live_totals(5) == {1: 1, 2: 1}
+
+    total, items = store.poll_summaries(0, 1)
+    assert total == 2
+    assert {k: items[0][k] for k in ("id", "owner", "option_count", "total_votes")} == \
+        {"id": 5, "owner": "owner", "option_count": 2, "total_votes": 2}
+
+    poll = store.read_poll(5)
+    poll.question = "Değişti?"
+    store.write_poll(poll)
+    assert store.read_poll(5).question == "Değişti?"
+
+    assert store.delete_poll(5) and not store.delete_poll(5)
+    assert store.poll_etag(5) is None
+    with pytest.raises(HTTPException) as e:
+        store.read_poll(5)
+    assert e.value.status_code == 404
+    assert store.cast_votes(5, [(1, "x")])[0].status_code == 404
+
+
+def test_users_contract(store):
+    with store.users.locked():
+        store.users.put({"username": "ali", "email": "a@x", "password_hash": "h",
+                         "role": "user", "email_confirmed": True})
+    assert store.users.get("ali")["email"] == "a@x"
+    assert [u["username"] for u in store.users.all()] == ["ali"]
+    assert store.users.remove("ali") and not store.users.remove("ali")
+    assert store.users.get("ali") is None
+
+
+def test_users_page_contract(store):
+    names = ["ali", "alican", "ayşe", "al", "b", "alı", "alz"]
+    with store.users.locked():
+        for name in names:
+            store.users.put({"username": name, "email": "e", "password_hash": "h",
+                             "role": "user", "email_confirmed": True})
+        store.users.remove("b")
+    page = lambda *a, **k: [u["username"] for u in store.users.page(*a, **k)]
+    assert page(limit=3) == ["al", "ali", "alican"]
+    assert page("alican", 3) == ["alz", "alı", "ayşe"]
+    assert page(prefix="ali") == ["ali", "alican"]
+    assert page("ali", prefix="ali") == ["alican"]
+    assert page("zz") == [] and page(prefix="b") == []
+
+
+def test_storage_interface_is_abstract():
+    class Partial(Storage):
+        def read_poll(self, poll_id):
+            return make_poll(poll_id)
+
+    with pytest.raises(TypeError, match="cast_votes"):
+        Partial()
+
+
+def _sqlite_worker(path: str, worker: int) -> int:
+    store = SQLiteStorage(path)
+    accepted = 0
+    for i in range(30):
+        # Ortak kullanıcılar her işçide aynıdır; yalnızca biri kabul edilmeli
+        for user in (f"ortak{i}", f"w{worker}_{i}"):
+            try:
+                store.cast_vote(1, 1 + i % 2, user)
+                accepted += 1
+            except HTTPException:
+                pass
+    return accepted
+
+
+def test_sqlite_votes_across_processes(tmp_path):
+    path = str(tmp_path / "v.db")
+    store = SQLiteStorage(path)
+    store.create_poll(make_poll(1))
+    store.read_poll(1)   # ebeveynin bağlantısı çocuklara geçer; kullanılmamalı
+    with ctx.Pool(4) as pool:
+        accepted = sum(pool.starmap(_sqlite_worker, [(path, w) for w in range(4)]))
+    assert accepted == 30 + 4 * 30
+    assert sum(o.votes for o in store.read_poll(1).options) == accepted
+    assert store.poll_summaries(0, 1)[1][0]["total_votes"] == accepted
+
+
+def test_migrate_between_backends(tmp_path):
+    files = FileStorage()
+    files.create_poll(Poll(id=3, owner="ali", question="Kedi & köpek?", options=[
+        Option(id=1, text="<Kedi>", votes=0), Option(id=2, text="Köpek", votes=0)]))
+    files.create_poll(make_poll(8))
+    files.cast_vote(3, 1, "ayşe")
+    files.cast_vote(3, 2, "veli")
+    files.users.put({"username": "ayşe", "email": "a@x", "password_hash": "h",
+                     "role": "user", "email_confirmed": True})
+
+    sql = SQLiteStorage(str(tmp_path / "v.db"))
+    report = bulk.migrate(files, sql)
+    assert (report["imported"], report["failed"], report["users"]) == (2, 0, 1)
+    assert sql.read_poll(3).model_dump() == files.read_poll(3).model_dump()
+    assert sql.users.get("ayşe")["password_hash"] == "h"
+    # Taşınan oy verenler tekrar oy veremez
+    with pytest.raises(HTTPException):
+        sql.cast_vote(3, 1, "veli")
+    # İkinci taşıma var olanları atlar
+    assert bulk.migrate(files, sql)["skipped"] == 2
+
+    # Geri taşıma: yeni oylar dahil
+    sql.cast_vote(8, 2, "zeynep")
+    for pid in files.list_poll_ids():
+        files.delete_poll(pid)
+    bulk.migrate(sql, files)
+    assert [o.votes for o in files.read_poll(8).options] == [0, 1]
+    with pytest.raises(HTTPException):
+        files.cast_vote(8, 1, "zeynep")
+
+
+def test_api_on_sqlite(monkeypatch, tmp_path):
+    sql = SQLiteStorage(str(tmp_path / "v.db"))
+    monkeypatch.setattr(main, "STORE", sql)
+    monkeypatch.setattr(coalesce, "STORE", sql)
+    monkeypatch.setattr(auth, "users_repo", sql.users)
+    monkeypatch.setattr(auth, "_hash_pw", lambda pw: "h:" + pw)
+    monkeypatch.setattr(auth, "_verify_pw", lambda pw, h: h == "h:" + pw)
+    client = TestClient(main.app)
+
+    assert client.post("/register", json={"username": "ali", "email": "a@x", "password": "pw"}).status_code < 300
+    token = client.post("/login", data={"username": "ali", "password": "pw"}).json()["access_token"]
+    hdr = {"Authorization": f"Bearer {token}"}
+    r = client.post("/api/polls", headers=hdr, json={"question": "Q?", "options": [
+        {"id": 1, "text": "A", "votes": 0}, {"id": 2, "text": "B", "votes": 0}]})
+    assert r.status_code == 201
+    poll_id = r.json()["id"]
+
+    vote_hdr = {"Authorization": "Bearer " + auth.create_access_token({"sub": "veli"})}
+    assert client.post(f"/api/polls/{poll_id}/vote", headers=vote_hdr,
+                       json={"option_id": 2}).json()["options"][1]["votes"] == 1
+    assert client.post(f"/api/polls/{poll_id}/vote", headers=vote_hdr,
+                       json={"option_id": 2}).status_code == 403
+    r = client.get(f"/api/polls/{poll_id}")
+    assert r.json()["options"][1]["votes"] == 1
+    assert client.get(f"/api/polls/{poll_id}",
+                      headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+    assert client.get("/api/polls").json() == [poll_id]
+    # Dosya arka ucuna hiçbir şey yazılmadı
+    assert xml_utils.list_poll_ids() == []
@@ -0,0 +1,45 @@
+# votesys/tests/test_voters.py
+
+import json
+import os
+import pytest
+
+from app import voters, xml_utils
+from app.applog import append_records
+
+
+pytestmark = pytest.mark.usefixtures("seed_poll")
+
+
+def test_add_and_lookup():
+    assert not voters.has_voted(1, "alice")
+    assert voters.add(1, [("alice", 1.0), ("bob", 2.0)]) == 2
+    assert voters.has_voted(1, "alice")
+    # Tekrar eklemek kayıt üretmemeli
+    assert voters.add(1, [("alice", 3.0), ("carol", 4.0), ("carol", 5.0)]) == 1
+    assert list(voters.iter_voters(1)) == [("alice", 1.0), ("bob", 2.0), ("carol", 4.0)]
+    assert voters.count(1) == 3
+
+
+def test_migrates_legacy_json():
+    with open(xml_utils._voters_filepath(1), "w") as f:
+        json.dump(["alice", "bob", "alice"], f)
+    assert voters.migrate_all() == 1
+    assert not os.path.exists(xml_utils._voters_filepath(1))
+    assert voters.has_voted(1, "bob")
+    assert voters.count(1) == 2
+
+
+def test_sees_appends_from_other_processes():
+    voters.add(1, [("alice", 1.0)])
+    # Başka bir işlemin eklediği satır
+    append_records(xml_utils._voter_log_filepath(1), [{"u": "zed", "t": 2.0}])
+    assert voters.has_voted(1, "zed")
+
+
+def test_delete_poll_resets_index():
+    voters.add(1, [("alice", 1.0)])
+    xml_utils.delete_poll(1)
+    assert not voters.has_voted(1, "alice")
+    voters.add(1, [("bob", 1.0)])
+    assert list(voters.iter_voters(1)) == [("bob", 1.0)]
@@ -0,0 +1,80 @@
+# votesys/tests/test_workers.py
+# Çok işçili (çok işlemli) dağıtım: aynı veri klasörünü paylaşan işlemler
+# oy kaybetmemeli, aynı kullanıcının oyunu iki kez saymamalı.
+
+import multiprocessing as mp
+import os
+import random
+import pytest
+from fastapi import HTTPException
+
+from app import journal, votes, voters, xml_utils
+
+# fork: ebeveynde kullanılmış kilitlerin çocuklara geçtiği durum da sınanır
+ctx = mp.get_context("fork")
+
+WORKERS = 4
+SHARED = [f"ortak{i}" for i in range(40)]
+OWN = 25
+
+
+pytestmark = pytest.mark.usefixtures("seed_poll")
+
+
+def _vote_worker(worker: int) -> int:
+    # Her işçi ortak kullanıcıları (farklı sırada) ve kendi kullanıcılarını oylatır
+    users = SHARED + [f"w{worker}_{i}" for i in range(OWN)]
+    random.Random(worker).shuffle(users)
+    accepted = 0
+    for n, user in enumerate(users):
+        try:
+            votes.cast_vote(1, 1 + n % 2, user)
+            accepted += 1
+        except HTTPException as e:
+            assert e.status_code == 403
+    return accepted
+
+
+@pytest.mark.parametrize("mode", ["direct", "journal", "shm"])
+def test_no_lost_or_duplicate_votes_across_processes(monkeypatch, mode):
+    monkeypatch.setattr(votes, "JOURNAL_MODE", mode != "direct")
+    monkeypatch.setattr(votes, "SHARED_COUNTERS", mode == "shm")
+    # Ebeveyn kilitleri ve önbelleği kullanmış olsun
+    votes.read_poll(1)
+    with ctx.Pool(WORKERS) as pool:
+        accepted = pool.map(_vote_worker, range(WORKERS))
+
+    expected = len(SHARED) + WORKERS * OWN
+    assert sum(accepted) == expected
+    poll = votes.read_poll(1)
+    assert sum(o.votes for o in poll.options) == expected
+
+    journal.compact(1)
+    recorded = [user for user, _ in voters.iter_voters(1)]
+    assert len(recorded) == len(set(recorded)) == expected
+    assert sum(o.votes for o in xml_utils.read_poll(1).options) == expected
+
+
+def _write_votes(votes_a: int) -> None:
+    poll = xml_utils.read_poll(1)
+    poll.options[0].votes = votes_a
+    xml_utils.write_poll(poll)
+
+
+def test_cache_sees_same_size_write_from_other_process():
+    # Ebeveyn anketi önbelleğe alır; çocuk aynı boyutta yeni bir sürüm yazar.
+    # Kaba zaman damgalı dosya sistemlerinde iki yazma aynı tike düşebilir;
+    # bu durum önceki sürümün mtime'ı ileriye alınarak sınanır: yeni sürümün
+    # mtime'ı yine de büyük olmalı, yoksa imza çakışır ve eski sayı okunur.
+    _write_votes(1)
+    path = xml_utils._poll_filepath(1)
+    future = os.stat(path).st_mtime_ns + 10**9
+    os.utime(path, ns=(future, future))
+    assert xml_utils.read_poll(1).options[0].votes == 1
+
+    child = ctx.Process(target=_write_votes, args=(2,))
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+    assert os.stat(path).st_mtime_ns > future
+    assert xml_utils.read_poll(1).options[0].votes == 2